@@ -0,0 +1,110 @@
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.ubs_landing_zone.pipeline import Pipeline
+
+# usage (from the repository root):
+#   python -m benchmarks.checksum_benchmark --sizes 10M,1G,10G --buffer-size 1M
+
+_UNITS: dict[str, int] = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(size: str) -> int:
+    size = size.strip().upper()
+    if size and size[-1] in _UNITS:
+        return int(size[:-1]) * _UNITS[size[-1]]
+    return int(size)
+
+
+def generate_feed(directory: Path, size: int, algorithm: str) -> Path:
+    feed: Path = directory / f"feed_{size}.tar"
+    block: bytes = os.urandom(1024 * 1024)
+    h = hashlib.new(algorithm)
+
+    with open(feed, "wb") as f:
+        written: int = 0
+        while written < size:
+            chunk: bytes = block[: min(len(block), size - written)]
+            f.write(chunk)
+            h.update(chunk)
+            written += len(chunk)
+
+    feed.with_suffix(".md5").write_text(h.hexdigest())
+    return feed
+
+
+def measure(feed: Path, algorithm: str, buffer_size: int) -> dict:
+    pipeline: Pipeline = Pipeline(
+        uploader=None,
+        checksum_extension=".md5",
+        algorithm=algorithm,
+        failed_dir=feed.parent / "failed",
+        processing_dir=feed.parent / "processing",
+        checksum_buffer_size=buffer_size
+    )
+
+    start: float = time.perf_counter()
+    pipeline._verify_checksum(feed)
+    elapsed: float = time.perf_counter() - start
+
+    size: int = feed.stat().st_size
+    return {
+        "size_bytes": size,
+        "buffer_size": buffer_size,
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(size / 1024 ** 2 / elapsed, 1),
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Checksum verification throughput and peak RSS per feed size")
+    parser.add_argument("--sizes", default="10M,1G,10G")
+    parser.add_argument("--buffer-size", default="1M")
+    parser.add_argument("--algorithm", default="md5")
+    parser.add_argument("--dir", default=None, help="where test feeds are generated, defaults to a temp dir")
+    parser.add_argument("--feed", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # child mode: measure one already generated feed, so peak RSS is not shared between sizes
+    if args.feed:
+        print(json.dumps(measure(Path(args.feed), args.algorithm, parse_size(args.buffer_size))))
+        return
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        results: list[dict] = []
+        for size in args.sizes.split(","):
+            feed: Path = generate_feed(Path(tmp), parse_size(size), args.algorithm)
+            out = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.checksum_benchmark",
+                    "--feed", str(feed),
+                    "--buffer-size", args.buffer_size,
+                    "--algorithm", args.algorithm,
+                ],
+                capture_output=True,
+                check=True,
+                text=True
+            )
+            result: dict = json.loads(out.stdout.splitlines()[-1])
+            results.append(result)
+            print(
+                f"{size:>6}: {result['mb_per_s']:>8} MB/s, "
+                f"{result['seconds']:>8}s, peak RSS {result['peak_rss_mb']} MB"
+            )
+            feed.unlink()
+
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.checksum_benchmark import parse_size
+from benchmarks.feed_generator import COMPRESSIONS, CONTENTS, generate_feeds
+from src.ubs_landing_zone.compression import Decompressor
+from src.ubs_landing_zone.extractor import Extractor
+from src.ubs_landing_zone.pipeline import Pipeline
+
+# usage (from the repository root):
+#   python -m benchmarks.compression_benchmark --feeds 4 --members 20 --member-size 10M --content csv
+# the same feeds (same seed) as .tar, .tar.gz and .tar.zst: bytes to land, time to verify and unpack
+
+
+def measure(feeds: list[Path], work_dir: Path, decompress_threads: int, extract_threads: int) -> dict:
+    pipeline: Pipeline = Pipeline(
+        uploader=None,
+        checksum_extension=".md5",
+        algorithm="md5",
+        failed_dir=work_dir / "failed",
+        processing_dir=work_dir / "processing",
+        extractor=Extractor(threads=extract_threads) if extract_threads else None,
+        decompressor=Decompressor(threads=decompress_threads)
+    )
+
+    verify_seconds: float = 0.0
+    unpack_seconds: float = 0.0
+    unpacked_bytes: int = 0
+    for feed in feeds:
+        start: float = time.perf_counter()
+        pipeline.verify(feed)
+        verify_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        unpacked_dir: Path = pipeline.prepare(feed)
+        unpack_seconds += time.perf_counter() - start
+
+        unpacked_bytes += sum(file.stat().st_size for file in unpacked_dir.rglob("*") if file.is_file())
+        Pipeline._delete_path(unpacked_dir)
+
+    landed_bytes: int = sum(feed.stat().st_size for feed in feeds)
+    return {
+        "landed_mb": round(landed_bytes / 1024 ** 2, 1),
+        "ratio": round(unpacked_bytes / landed_bytes, 2),
+        "verify_s": round(verify_seconds, 3),
+        "unpack_s": round(unpack_seconds, 3),
+        # content made available downstream per second of local work
+        "content_mb_per_s": round(unpacked_bytes / 1024 ** 2 / (verify_seconds + unpack_seconds), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plain tar against compressed variants of the same feeds")
+    parser.add_argument("--feeds", type=int, default=4)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--member-size", default="4M")
+    parser.add_argument("--content", choices=CONTENTS, default="csv")
+    parser.add_argument("--compressions", default=",".join(COMPRESSIONS))
+    parser.add_argument("--decompress-threads", type=int, default=4, help="0 decodes in-process")
+    parser.add_argument("--extract-threads", type=int, default=4, help="plain tars only, 0 extracts with tarfile")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", default=None, help="where feeds are generated and unpacked, defaults to a temp dir")
+    args = parser.parse_args()
+
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for compression in args.compressions.split(","):
+            work_dir: Path = Path(tmp) / compression
+            feeds: list[Path] = generate_feeds(
+                work_dir / "landing",
+                feeds=args.feeds,
+                members=args.members,
+                member_size=parse_size(args.member_size),
+                seed=args.seed,
+                content=args.content,
+                compression=compression
+            )
+            result: dict = measure(feeds, work_dir, args.decompress_threads, args.extract_threads)
+            results[compression] = result
+            print(
+                f"{compression:>5}: {result['landed_mb']:>8} MB landed (x{result['ratio']}), "
+                f"verify {result['verify_s']}s, unpack {result['unpack_s']}s, {result['content_mb_per_s']} MB/s of content"
+            )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
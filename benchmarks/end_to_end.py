@@ -0,0 +1,163 @@
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.checksum_benchmark import parse_size
+from benchmarks.fake_azcopy import write_launcher
+from benchmarks.feed_generator import COMPRESSIONS, CONTENTS, DISTRIBUTIONS, generate_feeds
+from src.ubs_landing_zone.async_executor import AsyncExecutor
+from src.ubs_landing_zone.az_copy import AzCopy
+from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.staged_executor import StagedExecutor
+
+# usage (from the repository root):
+#   python -m benchmarks.end_to_end --feeds 50 --members 20 --member-size 1M --latency 0.2 --output results.json
+#   python -m benchmarks.end_to_end ... --compare results.json
+#   python -m benchmarks.end_to_end ... --content csv --compression zstd --compare results.json   (same content, compressed)
+
+_FEED_PATTERN: str = r"feed_\d+\.tar(\.gz|\.zst)?$"
+_COMPARED: tuple[str, ...] = ("feeds_per_s", "mb_per_s", "latency_p50_s", "latency_p99_s", "peak_rss_mb")
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def run(args: argparse.Namespace, work_dir: Path) -> dict:
+    landing_dir: Path = work_dir / "landing"
+    feeds: list[Path] = generate_feeds(
+        landing_dir,
+        feeds=args.feeds,
+        members=args.members,
+        member_size=parse_size(args.member_size),
+        distribution=args.distribution,
+        total_size=parse_size(args.total_size) if args.total_size else None,
+        seed=args.seed,
+        content=args.content,
+        compression=args.compression
+    )
+    total_bytes: int = sum(feed.stat().st_size for feed in feeds)
+
+    pipeline: Pipeline = Pipeline(
+        uploader=AzCopy(
+            az_copy_binary=write_launcher(work_dir, args.latency, parse_size(args.bandwidth)),
+            az_copy_destination_url="https://benchmark.blob.core.windows.net/container?sv=2020-04-08&sig=benchmark"
+        ),
+        checksum_extension=".md5",
+        algorithm="md5",
+        failed_dir=work_dir / "failed",
+        processing_dir=work_dir / "processing",
+        upload_concurrency=args.upload_concurrency
+    )
+
+    # per-feed latency, from the first stage to the local copy being deleted
+    latencies: list[float] = []
+    complete = pipeline.complete
+    def timed_complete(feed: Path, unpacked_dir: Path, start_time: float) -> None:
+        complete(feed, unpacked_dir, start_time)
+        latencies.append(time.time() - start_time)
+    pipeline.complete = timed_complete
+
+    executor: Executor
+    if args.executor == "staged":
+        executor = StagedExecutor(
+            pipeline, landing_dir, _FEED_PATTERN,
+            hash_parallelism=args.hash_parallelism or args.parallelism,
+            unpack_parallelism=args.unpack_parallelism or args.parallelism,
+            upload_parallelism=args.parallelism
+        )
+    elif args.executor == "async":
+        executor = AsyncExecutor(pipeline, landing_dir, _FEED_PATTERN, parallelism=args.parallelism, upload_slots=args.upload_slots)
+    else:
+        executor = Executor(pipeline, landing_dir, _FEED_PATTERN, parallelism=args.parallelism)
+
+    start: float = time.perf_counter()
+    executor.execute_parallel()
+    elapsed: float = time.perf_counter() - start
+
+    return {
+        "feeds": len(feeds),
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "feeds_per_s": round(len(feeds) / elapsed, 2),
+        "mb_per_s": round(total_bytes / 1024 ** 2 / elapsed, 1),
+        "latency_p50_s": round(percentile(latencies, 50), 3),
+        "latency_p99_s": round(percentile(latencies, 99), 3),
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(result: dict, baseline: dict) -> None:
+    print(f"compared to {baseline.get('revision')} ({baseline.get('timestamp')}):")
+    for key in _COMPARED:
+        before, after = baseline["result"][key], result["result"][key]
+        change: str = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {key:>14}: {before:>10} -> {after:>10} ({change})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End to end Executor / Pipeline benchmark against a fake azcopy")
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--member-size", default="1M")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--total-size", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--content", choices=CONTENTS, default="random")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="none", help="same seed and content give the same tar, compressed or not")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per azcopy call")
+    parser.add_argument("--bandwidth", default="100M", help="bytes per second per azcopy process, 0 is unlimited")
+    parser.add_argument("--executor", choices=("threads", "staged", "async"), default="threads")
+    parser.add_argument("--parallelism", type=int, default=8)
+    parser.add_argument("--hash-parallelism", type=int, default=None)
+    parser.add_argument("--unpack-parallelism", type=int, default=None)
+    parser.add_argument("--upload-concurrency", type=int, default=1)
+    parser.add_argument("--upload-slots", type=int, default=64)
+    parser.add_argument("--log-level", default="INFO", help="logging is part of the measured cost, keep it as in production")
+    parser.add_argument("--dir", default=None, help="where feeds are generated and processed, defaults to a temp dir")
+    parser.add_argument("--output", default=None, help="write the result as JSON")
+    parser.add_argument("--compare", default=None, help="JSON result of an earlier run")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        result: dict = {
+            "revision": revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("dir", "output", "compare", "log_level")},
+            "result": run(args, Path(tmp)),
+        }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    if args.compare:
+        compare(result, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
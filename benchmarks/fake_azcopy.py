@@ -0,0 +1,57 @@
+import os
+import shlex
+import sys
+import time
+from pathlib import Path
+
+# stand-in for the azcopy binary: same command line, no network. Every call costs a fixed latency
+# plus size / bandwidth, so the pipeline sees realistic upload times and process counts.
+#
+#   FAKE_AZCOPY_LATENCY     seconds per azcopy call, default 0.2
+#   FAKE_AZCOPY_BANDWIDTH   bytes per second per azcopy process, 0 is unlimited, default 100M
+
+_CHUNK: int = 1024 * 1024
+
+
+def write_launcher(directory: Path, latency: float, bandwidth: int) -> Path:
+    # AzCopy wants a single executable path, the launcher pins the interpreter and the settings
+    launcher: Path = directory / "azcopy"
+    launcher.write_text(
+        "#!/bin/sh\n"
+        f"export FAKE_AZCOPY_LATENCY={latency}\n"
+        f"export FAKE_AZCOPY_BANDWIDTH={bandwidth}\n"
+        f"exec {shlex.quote(sys.executable)} {shlex.quote(str(Path(__file__).absolute()))} \"$@\"\n"
+    )
+    launcher.chmod(0o755)
+    return launcher
+
+
+def source_size(args: list[str]) -> int:
+    if "PipeBlob" in args:
+        size: int = 0
+        while chunk := sys.stdin.buffer.read(_CHUNK):
+            size += len(chunk)
+        return size
+
+    source: Path = Path(args[1])
+    if source.is_dir():
+        included: list[str] = args[args.index("--include-path") + 1].split(";") if "--include-path" in args else []
+        return sum((source / name).stat().st_size for name in included) if included else 0
+    return source.stat().st_size
+
+
+def main() -> None:
+    args: list[str] = sys.argv[1:]
+    latency: float = float(os.getenv("FAKE_AZCOPY_LATENCY", "0.2"))
+    bandwidth: int = int(os.getenv("FAKE_AZCOPY_BANDWIDTH", str(100 * 1024 * 1024)))
+
+    start: float = time.monotonic()
+    size: int = source_size(args)
+    transfer: float = size / bandwidth if bandwidth else 0
+    time.sleep(max(0.0, latency + transfer - (time.monotonic() - start)))
+
+    print('{"MessageType":"EndOfJob","MessageContent":"Job completed"}')
+
+
+if __name__ == "__main__":
+    main()
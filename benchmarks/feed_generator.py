@@ -0,0 +1,184 @@
+import argparse
+import gzip
+import hashlib
+import io
+import random
+import shutil
+import subprocess
+import tarfile
+from pathlib import Path
+
+from benchmarks.checksum_benchmark import parse_size
+from src.ubs_landing_zone.compression import checksum_file
+
+# usage (from the repository root):
+#   python -m benchmarks.feed_generator --dir /tmp/TF --feeds 100 --members 20 --member-size 1M --distribution lognormal
+#   python -m benchmarks.feed_generator --dir /tmp/TF --content csv --compression zstd
+
+DISTRIBUTIONS: tuple[str, ...] = ("fixed", "uniform", "lognormal")
+CONTENTS: tuple[str, ...] = ("random", "csv")
+COMPRESSIONS: tuple[str, ...] = ("none", "gzip", "zstd")
+_SUFFIXES: dict[str, str] = {"none": ".tar", "gzip": ".tar.gz", "zstd": ".tar.zst"}
+
+
+def member_sizes(rng: random.Random, members: int, member_size: int, distribution: str, total_size: int = None) -> list[int]:
+    if distribution == "fixed":
+        sizes: list[int] = [member_size] * members
+    elif distribution == "uniform":
+        sizes = [rng.randint(0, 2 * member_size) for _ in range(members)]
+    elif distribution == "lognormal":
+        # many small files and a long tail of big ones, the usual shape of a feed, with member_size as the median
+        sizes = [int(member_size * rng.lognormvariate(0, 1)) for _ in range(members)]
+    else:
+        raise ValueError(f"Unknown distribution: '{distribution}', expected one of {DISTRIBUTIONS}")
+
+    if total_size is not None and sum(sizes):
+        scale: float = total_size / sum(sizes)
+        sizes = [int(size * scale) for size in sizes]
+    return sizes
+
+
+def content_block(rng: random.Random, size: int, content: str = "random") -> bytes:
+    if content == "random":
+        # seeded, cheap, and not compressible at all
+        return rng.randbytes(size)
+    if content != "csv":
+        raise ValueError(f"Unknown content: '{content}', expected one of {CONTENTS}")
+
+    # text rows the way upstream sends them, compresses about as well as a real extract
+    rows: list[str] = []
+    length: int = 0
+    while length < size:
+        row: str = f"{rng.randrange(10 ** 9)},{rng.choice(_WORDS)},{rng.randrange(10 ** 7) / 100:.2f},2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n"
+        rows.append(row)
+        length += len(row)
+    return "".join(rows).encode()[:size]
+
+
+def compress(tar: Path, compression: str) -> Path:
+    if compression == "none":
+        return tar
+    target: Path = tar.with_name(f"{tar.stem}{_SUFFIXES[compression]}")
+    if compression == "gzip":
+        with open(tar, "rb") as source, gzip.open(target, "wb", compresslevel=6) as sink:
+            shutil.copyfileobj(source, sink, 1024 * 1024)
+    elif compression == "zstd":
+        subprocess.run(["zstd", "-q", "-f", "-T0", "-o", str(target), str(tar)], check=True)
+    else:
+        raise ValueError(f"Unknown compression: '{compression}', expected one of {COMPRESSIONS}")
+    tar.unlink()
+    return target
+
+
+def generate_feed(
+    directory: Path,
+    name: str,
+    sizes: list[int],
+    rng: random.Random,
+    algorithm: str = "md5",
+    content: str = "random",
+    compression: str = "none"
+) -> Path:
+    feed: Path = directory / f"{name}.tar"
+    # one block per feed, sliced per member; the same seed gives the same tar whatever the compression
+    block: bytes = content_block(rng, min(max(sizes, default=0), 4 * 1024 * 1024) or 1, content)
+
+    with tarfile.open(feed, "w") as tar:
+        for i, size in enumerate(sizes):
+            info: tarfile.TarInfo = tarfile.TarInfo(f"member_{i:05d}.csv")
+            info.size = size
+            tar.addfile(info, _RepeatingReader(block, size))
+        control: tarfile.TarInfo = tarfile.TarInfo(f"{name}.control")
+        tar.addfile(control, io.BytesIO())
+
+    feed = compress(feed, compression)
+    h = hashlib.new(algorithm)
+    with open(feed, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    checksum_file(feed, f".{algorithm.lower()}").write_text(h.hexdigest())
+    return feed
+
+
+def generate_feeds(
+    directory: Path,
+    feeds: int,
+    members: int,
+    member_size: int,
+    distribution: str = "fixed",
+    total_size: int = None,
+    seed: int = 42,
+    algorithm: str = "md5",
+    content: str = "random",
+    compression: str = "none"
+) -> list[Path]:
+    rng: random.Random = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    return [
+        generate_feed(
+            directory,
+            f"feed_{i:06d}",
+            member_sizes(rng, members, member_size, distribution, total_size),
+            rng,
+            algorithm,
+            content,
+            compression
+        )
+        for i in range(feeds)
+    ]
+
+
+_WORDS: tuple[str, ...] = ("EQUITY", "BOND", "FX", "SWAP", "OPTION", "FUTURE", "REPO", "LOAN")
+
+
+class _RepeatingReader:
+    def __init__(self, block: bytes, size: int):
+        self._block: bytes = block
+        self._remaining: int = size
+        self._offset: int = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        chunks: list[bytes] = []
+        while size:
+            chunk: bytes = self._block[self._offset:self._offset + size]
+            self._offset = (self._offset + len(chunk)) % len(self._block)
+            self._remaining -= len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic feeds: tar of data members, a control file and a checksum sidecar")
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--members", type=int, default=10, help="data members per feed, the control file comes on top")
+    parser.add_argument("--member-size", default="100K", help="fixed size, uniform mean or lognormal median")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--total-size", default=None, help="scale the members so every feed holds this many bytes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--algorithm", default="md5")
+    parser.add_argument("--content", choices=CONTENTS, default="random", help="random bytes do not compress, csv rows do")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="none")
+    args = parser.parse_args()
+
+    feeds: list[Path] = generate_feeds(
+        Path(args.dir),
+        feeds=args.feeds,
+        members=args.members,
+        member_size=parse_size(args.member_size),
+        distribution=args.distribution,
+        total_size=parse_size(args.total_size) if args.total_size else None,
+        seed=args.seed,
+        algorithm=args.algorithm,
+        content=args.content,
+        compression=args.compression
+    )
+    total: int = sum(feed.stat().st_size for feed in feeds)
+    print(f"{len(feeds)} feed(s), {total / 1024 ** 2:.1f} MB in {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
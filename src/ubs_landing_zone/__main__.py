@@ -1,4 +1,5 @@
 import os
+import signal
 import sys
 from datetime import datetime
 
@@ -6,7 +7,26 @@ from dotenv import load_dotenv, dotenv_values
 from pathlib import Path
 from .pipeline import Pipeline
 from .az_copy import AzCopy
-from .executor import Executor
+from .blob_uploader import BlobUploader
+from .uploader import Uploader
+from .digest_index import DigestIndex, DuplicatePolicy
+from .checksums import ChecksumCache
+from .adaptive import AdaptiveController
+from .admission import AdmissionControl
+from .async_executor import AsyncExecutor
+from .claimer import FeedClaimer
+from .executor import Executor, FeedOrdering
+from .fan_out import FanOutPolicy, FanOutUploader
+from .compression import Decompressor
+from .extractor import Extractor
+from .staged_executor import StagedExecutor
+from .journal import UploadJournal
+from .metrics import REGISTRY
+from .profiling import FeedProfiler
+from .retry import RetryPolicy
+from .scanner import Scanner
+from .validator import FeedValidator
+from .watcher import Watcher
 from loguru import logger
 
 def config_logging(log_level: str) -> None:
@@ -27,6 +47,12 @@ def config_logging(log_level: str) -> None:
         format=format
     )
     
+def env_flag(name: str, default: bool = False) -> bool:
+    value: str = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+    
 def main() -> None:
     load_dotenv()
     log_level: str = os.getenv("UBS_LANDING_ZONE_LOG_LEVEL")
@@ -34,68 +60,348 @@ def main() -> None:
     config_logging(log_level)
     
     preserve_source_feeds: bool = bool(os.getenv("UBS_LANDING_ZONE_PRESERVE_SOURCE_FEEDS"))
+    uploader_backend: str = os.getenv("UBS_LANDING_ZONE_UPLOADER", "azcopy").lower()
     azcopy_binary: str = os.getenv("UBS_LANDING_ZONE_AZCOPY_BINARY")
+    blob_block_size: str = os.getenv("UBS_LANDING_ZONE_BLOB_BLOCK_SIZE", str(8 * 1024 * 1024))
+    blob_concurrency: str = os.getenv("UBS_LANDING_ZONE_BLOB_CONCURRENCY", "8")
     vault_binary: str = os.getenv("UBS_LANDING_ZONE_VAULT_BINARY")
     az_copy_dry_run: bool = bool(os.getenv("UBS_LANDING_ZONE_AZCOPY_DRY_RUN"))
     az_copy_destination_url: str = os.getenv("UBS_LANDING_ZONE_AZCOPY_DESTINATION_URL")
+    fan_out_policy: str = os.getenv("UBS_LANDING_ZONE_FAN_OUT_POLICY", FanOutPolicy.ALL.value).lower()
     dir: str = os.getenv("UBS_LANDING_ZONE_DIR")
     dir_processing: str = os.getenv("UBS_LANDING_ZONE_DIR_PROCESSING")
     dir_failed: str = os.getenv("UBS_LANDING_ZONE_DIR_FAILED")
+    dir_duplicates: str = os.getenv("UBS_LANDING_ZONE_DIR_DUPLICATES")
     pattern: str = os.getenv("UBS_LANDING_ZONE_FEED_PATTERN")
     checksum_extension: str = os.getenv("UBS_LANDING_ZONE_CHECKSUM_EXTENSION")
     checksum_algorithm: str = os.getenv("UBS_LANDING_ZONE_CHECKSUM_ALGORITHM")
+    checksum_buffer_size: str = os.getenv("UBS_LANDING_ZONE_CHECKSUM_BUFFER_SIZE", str(1024 * 1024))
+    single_pass: bool = env_flag("UBS_LANDING_ZONE_SINGLE_PASS")
+    streaming_upload: bool = env_flag("UBS_LANDING_ZONE_STREAMING_UPLOAD")
+    extract_threads: str = os.getenv("UBS_LANDING_ZONE_EXTRACT_THREADS", "0")
+    decompress_threads: str = os.getenv("UBS_LANDING_ZONE_DECOMPRESS_THREADS", "4")
+    preflight: bool = env_flag("UBS_LANDING_ZONE_PREFLIGHT")
+    feed_max_members: str = os.getenv("UBS_LANDING_ZONE_FEED_MAX_MEMBERS")
+    feed_max_member_size: str = os.getenv("UBS_LANDING_ZONE_FEED_MAX_MEMBER_SIZE")
+    feed_max_size: str = os.getenv("UBS_LANDING_ZONE_FEED_MAX_SIZE")
+    feed_forbidden_names: str = os.getenv("UBS_LANDING_ZONE_FEED_FORBIDDEN_NAMES")
+    processing_budget: str = os.getenv("UBS_LANDING_ZONE_PROCESSING_BUDGET")
+    memory_budget: str = os.getenv("UBS_LANDING_ZONE_MEMORY_BUDGET")
+    compressed_ratio: str = os.getenv("UBS_LANDING_ZONE_COMPRESSED_RATIO", "4")
+    upload_retries: str = os.getenv("UBS_LANDING_ZONE_UPLOAD_RETRIES", "0")
+    retry_base_delay: str = os.getenv("UBS_LANDING_ZONE_RETRY_BASE_DELAY", "1")
+    retry_max_delay: str = os.getenv("UBS_LANDING_ZONE_RETRY_MAX_DELAY", "60")
+    retry_budget: str = os.getenv("UBS_LANDING_ZONE_RETRY_BUDGET", "100")
+    batch_upload: bool = env_flag("UBS_LANDING_ZONE_AZCOPY_BATCH")
+    upload_concurrency: str = os.getenv("UBS_LANDING_ZONE_UPLOAD_CONCURRENCY", "1")
+    journal_path: str = os.getenv("UBS_LANDING_ZONE_JOURNAL")
+    digest_index_path: str = os.getenv("UBS_LANDING_ZONE_DIGEST_INDEX")
+    digest_index_ttl: str = os.getenv("UBS_LANDING_ZONE_DIGEST_INDEX_TTL")
+    digest_index_max_entries: str = os.getenv("UBS_LANDING_ZONE_DIGEST_INDEX_MAX_ENTRIES")
+    checksum_cache_path: str = os.getenv("UBS_LANDING_ZONE_CHECKSUM_CACHE")
+    checksum_cache_max_entries: str = os.getenv("UBS_LANDING_ZONE_CHECKSUM_CACHE_MAX_ENTRIES", "10000")
+    duplicate_policy: str = os.getenv("UBS_LANDING_ZONE_DUPLICATE_POLICY", DuplicatePolicy.LOG.value).lower()
     parallelism: str = os.getenv("UBS_LANDING_ZONE_PARALLELISM")
+    executor_kind: str = os.getenv("UBS_LANDING_ZONE_EXECUTOR", "threads").lower()
+    adaptive_parallelism: bool = env_flag("UBS_LANDING_ZONE_ADAPTIVE_PARALLELISM")
+    parallelism_min: str = os.getenv("UBS_LANDING_ZONE_PARALLELISM_MIN", "1")
+    parallelism_max: str = os.getenv("UBS_LANDING_ZONE_PARALLELISM_MAX")
+    adaptive_interval: str = os.getenv("UBS_LANDING_ZONE_ADAPTIVE_INTERVAL", "30")
+    hash_parallelism: str = os.getenv("UBS_LANDING_ZONE_HASH_PARALLELISM") or parallelism
+    unpack_parallelism: str = os.getenv("UBS_LANDING_ZONE_UNPACK_PARALLELISM") or parallelism
+    upload_parallelism: str = os.getenv("UBS_LANDING_ZONE_UPLOAD_PARALLELISM") or parallelism
+    hash_in_processes: bool = env_flag("UBS_LANDING_ZONE_HASH_IN_PROCESSES")
+    async_upload_slots: str = os.getenv("UBS_LANDING_ZONE_ASYNC_UPLOAD_SLOTS", "256")
+    async_io_threads: str = os.getenv("UBS_LANDING_ZONE_ASYNC_IO_THREADS", "8")
+    queue_size: str = os.getenv("UBS_LANDING_ZONE_QUEUE_SIZE")
+    feed_ordering: str = os.getenv("UBS_LANDING_ZONE_FEED_ORDERING", FeedOrdering.NONE.value).lower()
+    max_failures: str = os.getenv("UBS_LANDING_ZONE_MAX_FAILURES")
+    scan_quiet_period: str = os.getenv("UBS_LANDING_ZONE_SCAN_QUIET_PERIOD", "0")
+    scan_trust_checksum_file: bool = env_flag("UBS_LANDING_ZONE_SCAN_TRUST_CHECKSUM_FILE")
+    watch: bool = env_flag("UBS_LANDING_ZONE_WATCH")
+    watch_quiet_period: str = os.getenv("UBS_LANDING_ZONE_WATCH_QUIET_PERIOD", "5")
+    watch_poll_interval: str = os.getenv("UBS_LANDING_ZONE_WATCH_POLL_INTERVAL", "2")
+    watch_inotify: bool = env_flag("UBS_LANDING_ZONE_WATCH_INOTIFY", default=True)
+    claim: bool = env_flag("UBS_LANDING_ZONE_CLAIM")
+    claims_dir: str = os.getenv("UBS_LANDING_ZONE_CLAIMS_DIR")
+    node_id: str = os.getenv("UBS_LANDING_ZONE_NODE_ID")
+    claim_lease: str = os.getenv("UBS_LANDING_ZONE_CLAIM_LEASE", "60")
+    metrics_textfile: str = os.getenv("UBS_LANDING_ZONE_METRICS_TEXTFILE")
+    metrics_port: str = os.getenv("UBS_LANDING_ZONE_METRICS_PORT")
+    profile: str = os.getenv("UBS_LANDING_ZONE_PROFILE", "").lower()
+    profile_dir: str = os.getenv("UBS_LANDING_ZONE_PROFILE_DIR", "logs/profiles")
+    profile_every: str = os.getenv("UBS_LANDING_ZONE_PROFILE_EVERY", "1")
+    profile_pattern: str = os.getenv("UBS_LANDING_ZONE_PROFILE_PATTERN")
     
     logger.debug("== Environment Variables ==")
     logger.debug(f"landing zone log level: {log_level}")
     logger.debug(f"preserve source feeds: {preserve_source_feeds}")
+    logger.debug(f"uploader: {uploader_backend}")
     logger.debug(f"azcopy binary: {azcopy_binary}")
+    logger.debug(f"blob block size: {blob_block_size}")
+    logger.debug(f"blob block upload concurrency: {blob_concurrency}")
     logger.debug(f"vault binary: {vault_binary}")
     logger.debug(f"preserve source feeds: {preserve_source_feeds}")
     logger.debug(f"azcopy --dry-run: {az_copy_dry_run}")
     logger.debug(f"azcopy destination url: {az_copy_destination_url}")
+    logger.debug(f"fan-out policy: {fan_out_policy}")
     logger.debug(f"landing zone directory: {dir}")
     logger.debug(f"processing directory: {dir_processing}")
     logger.debug(f"failed directory: {dir_failed}")
+    logger.debug(f"duplicates directory: {dir_duplicates}")
     logger.debug(f"file pattern: {pattern}")
     logger.debug(f"checksum extension: {checksum_extension}")
     logger.debug(f"checksum algorithm: {checksum_algorithm}")
+    logger.debug(f"checksum buffer size: {checksum_buffer_size}")
+    logger.debug(f"single pass verify and extract: {single_pass}")
+    logger.debug(f"streaming upload: {streaming_upload}")
+    logger.debug(f"extract threads: {extract_threads}")
+    logger.debug(f"decompress threads: {decompress_threads}")
+    logger.debug(f"preflight validation: {preflight}")
+    logger.debug(f"feed max members: {feed_max_members}")
+    logger.debug(f"feed max member size: {feed_max_member_size}")
+    logger.debug(f"feed max size: {feed_max_size}")
+    logger.debug(f"feed forbidden names: {feed_forbidden_names}")
+    logger.debug(f"processing dir budget: {processing_budget}")
+    logger.debug(f"in-flight memory budget: {memory_budget}")
+    logger.debug(f"compressed feed ratio estimate: {compressed_ratio}")
+    logger.debug(f"upload retries per file: {upload_retries}")
+    logger.debug(f"upload retry base delay: {retry_base_delay}")
+    logger.debug(f"upload retry max delay: {retry_max_delay}")
+    logger.debug(f"upload retry budget: {retry_budget}")
+    logger.debug(f"azcopy batch upload: {batch_upload}")
+    logger.debug(f"upload concurrency per feed: {upload_concurrency}")
+    logger.debug(f"upload journal: {journal_path}")
+    logger.debug(f"digest index: {digest_index_path}")
+    logger.debug(f"digest index ttl: {digest_index_ttl}s")
+    logger.debug(f"digest index max entries: {digest_index_max_entries}")
+    logger.debug(f"checksum cache: {checksum_cache_path}")
+    logger.debug(f"checksum cache max entries: {checksum_cache_max_entries}")
+    logger.debug(f"duplicate policy: {duplicate_policy}")
     logger.debug(f"parallelism: {parallelism}")
+    logger.debug(f"executor: {executor_kind}")
+    logger.debug(f"adaptive parallelism: {adaptive_parallelism}")
+    logger.debug(f"adaptive parallelism min: {parallelism_min}")
+    logger.debug(f"adaptive parallelism max: {parallelism_max}")
+    logger.debug(f"adaptive parallelism interval: {adaptive_interval}s")
+    logger.debug(f"staged executor hash parallelism: {hash_parallelism}")
+    logger.debug(f"staged executor unpack parallelism: {unpack_parallelism}")
+    logger.debug(f"staged executor upload parallelism: {upload_parallelism}")
+    logger.debug(f"staged executor hash in processes: {hash_in_processes}")
+    logger.debug(f"async executor upload slots: {async_upload_slots}")
+    logger.debug(f"async executor io threads: {async_io_threads}")
+    logger.debug(f"queue size: {queue_size}")
+    logger.debug(f"feed ordering: {feed_ordering}")
+    logger.debug(f"max failures: {max_failures}")
+    logger.debug(f"scan quiet period: {scan_quiet_period}s")
+    logger.debug(f"scan trusts checksum file as completion marker: {scan_trust_checksum_file}")
+    logger.debug(f"watch mode: {watch}")
+    logger.debug(f"watch quiet period: {watch_quiet_period}s")
+    logger.debug(f"watch poll interval: {watch_poll_interval}s")
+    logger.debug(f"watch with inotify: {watch_inotify}")
+    logger.debug(f"claim feeds on a shared landing dir: {claim}")
+    logger.debug(f"claims directory: {claims_dir}")
+    logger.debug(f"node id: {node_id}")
+    logger.debug(f"claim lease: {claim_lease}s")
+    logger.debug(f"metrics textfile: {metrics_textfile}")
+    logger.debug(f"metrics port: {metrics_port}")
+    logger.debug(f"profile: {profile}")
+    logger.debug(f"profile directory: {profile_dir}")
+    logger.debug(f"profile 1 in n feeds: {profile_every}")
+    logger.debug(f"profile feed pattern: {profile_pattern}")
     
     logger.debug("== Starting UBS Landing Zone processing... ==")
     
-    az_copy: AzCopy = AzCopy(
-        az_copy_binary=Path(azcopy_binary),
-        az_copy_destination_url=az_copy_destination_url, 
-        dry_run=az_copy_dry_run
+    destinations: dict[str, Uploader] = {}
+    for destination_url in (az_copy_destination_url or "").split(","):
+        destination_url = destination_url.strip()
+        destination_uploader: Uploader
+        if uploader_backend == "azcopy":
+            destination_uploader = AzCopy(
+                az_copy_binary=Path(azcopy_binary),
+                az_copy_destination_url=destination_url, 
+                dry_run=az_copy_dry_run
+            )
+        elif uploader_backend == "blob":
+            destination_uploader = BlobUploader(
+                destination_url=destination_url,
+                block_size=int(blob_block_size),
+                concurrency=int(blob_concurrency),
+                dry_run=az_copy_dry_run
+            )
+        else:
+            raise ValueError(f"Unknown uploader: '{uploader_backend}', expected 'azcopy' or 'blob'")
+        
+        # the SAS token stays out of logs and metric labels
+        destination: str = destination_url.split("?", 1)[0]
+        if destination in destinations:
+            raise ValueError(f"Duplicate destination: '{destination}'")
+        destinations[destination] = destination_uploader
+    
+    # several destinations: each file is uploaded to all of them from the same verified and extracted copy
+    uploader: Uploader = next(iter(destinations.values())) if len(destinations) == 1 else FanOutUploader(
+        destinations,
+        policy=FanOutPolicy(fan_out_policy)
     )
+    
     pipeline: Pipeline = Pipeline(
-        az_copy=az_copy,
+        uploader=uploader,
         checksum_extension=checksum_extension,
         algorithm=checksum_algorithm,
         failed_dir=Path(dir_failed),
-        processing_dir=Path(dir_processing)
+        processing_dir=Path(dir_processing),
+        checksum_buffer_size=int(checksum_buffer_size),
+        single_pass=single_pass,
+        streaming_upload=streaming_upload,
+        batch_upload=batch_upload,
+        upload_concurrency=int(upload_concurrency),
+        journal=UploadJournal(Path(journal_path)) if journal_path else None,
+        digest_index=DigestIndex(
+            Path(digest_index_path),
+            ttl=float(digest_index_ttl) if digest_index_ttl else None,
+            max_entries=int(digest_index_max_entries) if digest_index_max_entries else None
+        ) if digest_index_path else None,
+        checksum_cache=ChecksumCache(
+            Path(checksum_cache_path),
+            max_entries=int(checksum_cache_max_entries)
+        ) if checksum_cache_path else None,
+        duplicate_policy=DuplicatePolicy(duplicate_policy),
+        duplicates_dir=Path(dir_duplicates) if dir_duplicates else None,
+        extractor=Extractor(threads=int(extract_threads)) if int(extract_threads) else None,
+        decompressor=Decompressor(threads=int(decompress_threads)),
+        validator=FeedValidator(
+            forbidden_names=feed_forbidden_names,
+            max_members=int(feed_max_members) if feed_max_members else None,
+            max_member_size=int(feed_max_member_size) if feed_max_member_size else None,
+            max_size=int(feed_max_size) if feed_max_size else None
+        ) if preflight else None,
+        admission=AdmissionControl(
+            disk_budget=int(processing_budget) if processing_budget else None,
+            memory_budget=int(memory_budget) if memory_budget else None,
+            compressed_ratio=float(compressed_ratio)
+        ) if processing_budget or memory_budget else None,
+        retry=RetryPolicy(
+            retries=int(upload_retries),
+            base_delay=float(retry_base_delay),
+            max_delay=float(retry_max_delay),
+            budget=float(retry_budget)
+        ) if int(upload_retries) else None,
+        profiler=FeedProfiler(
+            output_dir=Path(profile_dir),
+            cpu="cpu" in profile,
+            memory="memory" in profile,
+            every=int(profile_every),
+            pattern=profile_pattern
+        ) if profile else None
     )
-    executor: Executor = Executor(
-        pipeline=pipeline,
+    if metrics_port:
+        REGISTRY.serve(int(metrics_port))
+    claimer: FeedClaimer = FeedClaimer(
+        directory=Path(dir),
+        checksum_extension=checksum_extension,
+        claims_dir=Path(claims_dir) if claims_dir else None,
+        node_id=node_id,
+        lease_seconds=float(claim_lease)
+    ) if claim else None
+    
+    scanner: Scanner = Scanner(
         directory=Path(dir),
         file_pattern=pattern,
-        parallelism=int(parallelism)
+        checksum_extension=checksum_extension,
+        quiet_period=float(watch_quiet_period if watch else scan_quiet_period),
+        trust_checksum_file=scan_trust_checksum_file
     )
     
     try:
-        executor.execute_parallel()
-    except ExceptionGroup as eg:    
-        msg: str = "\n\t- ".join(str(e) for e in eg.exceptions)
+        if claimer:
+            claimer.start()
+        if watch:
+            watcher: Watcher = Watcher(
+                pipeline=pipeline,
+                scanner=scanner,
+                parallelism=int(parallelism),
+                poll_interval=float(watch_poll_interval),
+                use_inotify=watch_inotify,
+                claimer=claimer
+            )
+            signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+            signal.signal(signal.SIGINT, lambda signum, frame: watcher.stop())
+        
+            watcher.run()
+            return
+    
+        executor: Executor
+        if executor_kind == "threads":
+            executor = Executor(
+                pipeline=pipeline,
+                directory=Path(dir),
+                file_pattern=pattern,
+                parallelism=int(parallelism),
+                queue_size=int(queue_size) if queue_size else None,
+                ordering=FeedOrdering(feed_ordering),
+                max_failures=int(max_failures) if max_failures else None,
+                scanner=scanner,
+                claimer=claimer,
+                controller=AdaptiveController(
+                    min_parallelism=int(parallelism_min),
+                    max_parallelism=int(parallelism_max) if parallelism_max else 4 * int(parallelism),
+                    initial_parallelism=int(parallelism),
+                    interval=float(adaptive_interval)
+                ) if adaptive_parallelism else None
+            )
+        elif executor_kind == "staged":
+            executor = StagedExecutor(
+                pipeline=pipeline,
+                directory=Path(dir),
+                file_pattern=pattern,
+                hash_parallelism=int(hash_parallelism),
+                unpack_parallelism=int(unpack_parallelism),
+                upload_parallelism=int(upload_parallelism),
+                queue_size=int(queue_size) if queue_size else None,
+                ordering=FeedOrdering(feed_ordering),
+                max_failures=int(max_failures) if max_failures else None,
+                hash_in_processes=hash_in_processes,
+                scanner=scanner,
+                claimer=claimer
+            )
+        elif executor_kind == "async":
+            executor = AsyncExecutor(
+                pipeline=pipeline,
+                directory=Path(dir),
+                file_pattern=pattern,
+                parallelism=int(parallelism),
+                upload_slots=int(async_upload_slots),
+                io_threads=int(async_io_threads),
+                ordering=FeedOrdering(feed_ordering),
+                max_failures=int(max_failures) if max_failures else None,
+                scanner=scanner,
+                claimer=claimer
+            )
+        else:
+            raise ValueError(f"Unknown executor: '{executor_kind}', expected 'threads', 'staged' or 'async'")
+    
+        try:
+            executor.execute_parallel()
+        except ExceptionGroup as eg:    
+            msg: str = "\n\t- ".join(str(e) for e in eg.exceptions)
         
-        logger.error(f"Execution failed, {len(eg.exceptions)} error(s): \n\t- {msg}")
-        sys.exit(msg)
-    except Exception as e:
-        msg: str = f"Execution failed, unexpected error: {e}"
-        logger.error(msg)
-        sys.exit(msg)
+            logger.error(f"Execution failed, {len(eg.exceptions)} error(s): \n\t- {msg}")
+            sys.exit(msg)
+        except Exception as e:
+            msg: str = f"Execution failed, unexpected error: {e}"
+            logger.error(msg)
+            sys.exit(msg)
         
-    logger.info("Execution succeed, all feeds processed successfully.")
+        logger.info("Execution succeed, all feeds processed successfully.")
+    finally:
+        if claimer:
+            claimer.stop()
+        # shuts down the block upload threads and the pooled connections
+        for destination_uploader in destinations.values():
+            if isinstance(destination_uploader, BlobUploader):
+                destination_uploader.close()
+        if metrics_textfile:
+            REGISTRY.write_textfile(Path(metrics_textfile))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import contextlib
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from . import metrics
+from loguru import logger
+
+class AdjustableSemaphore:
+    def __init__(self, limit: int):
+        self._limit: int = limit
+        self._in_use: int = 0
+        # highest in_use since the last reset: a limit that was never reached says nothing about throughput
+        self._peak: int = 0
+        self._condition: threading.Condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        with self._condition:
+            # lowering it does not interrupt anything, workers above the new limit finish their feed first
+            self._limit = limit
+            self._condition.notify_all()
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_use < self._limit)
+            self._in_use += 1
+            self._peak = max(self._peak, self._in_use)
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    def __enter__(self) -> "AdjustableSemaphore":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def reset_peak(self) -> int:
+        with self._condition:
+            peak: int = self._peak
+            self._peak = self._in_use
+            return peak
+
+class _Window:
+    def __init__(self):
+        self.start: float = time.monotonic()
+        self.feeds: int = 0
+        self.failed: int = 0
+        self.bytes: int = 0
+        self.seconds: float = 0.0
+
+    def rates(self, now: float) -> tuple[float, float, float, float]:
+        # feeds/s, MB/s, mean feed latency, error rate
+        duration: float = max(now - self.start, 1e-9)
+        return (
+            self.feeds / duration,
+            self.bytes / 1024 ** 2 / duration,
+            self.seconds / self.feeds,
+            self.failed / self.feeds
+        )
+
+class AdaptiveController:
+    def __init__(
+        self,
+        min_parallelism: int,
+        max_parallelism: int,
+        initial_parallelism: int = None,
+        interval: float = 30.0,
+        increase: int = 1,
+        decrease_factor: float = 0.5,
+        improvement: float = 0.05,
+        latency_tolerance: float = 1.5,
+        error_tolerance: float = 0.05,
+        probe_after: int = 3
+    ):
+        self._min: int = min_parallelism
+        self._max: int = max_parallelism
+        self._interval: float = interval
+        self._increase: int = increase
+        self._decrease_factor: float = decrease_factor
+        # relative throughput gain that counts as an improvement, below it the limit holds
+        self._improvement: float = improvement
+        self._latency_tolerance: float = latency_tolerance
+        self._error_tolerance: float = error_tolerance
+        # flat throughput holds the limit, after this many holds in a row it is probed upwards again
+        self._probe_after: int = probe_after
+        self._holds: int = 0
+        self.slots: AdjustableSemaphore = AdjustableSemaphore(
+            min(max(initial_parallelism or min_parallelism, min_parallelism), max_parallelism)
+        )
+        self._window: _Window = _Window()
+        self._previous: tuple[float, float, float, float] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: threading.Thread = None
+
+        if not 0 < min_parallelism <= max_parallelism:
+            raise ValueError(f"Parallelism bounds must satisfy 0 < min <= max, got: {min_parallelism}, {max_parallelism}")
+        if interval <= 0:
+            raise ValueError(f"Adjustment interval must be positive, got: {interval}")
+        if increase <= 0 or not 0 < decrease_factor < 1:
+            raise ValueError(f"Increase must be positive and decrease factor in (0, 1), got: {increase}, {decrease_factor}")
+
+    @property
+    def max_parallelism(self) -> int:
+        return self._max
+
+    def start(self) -> None:
+        metrics.PARALLELISM_LIMIT.set(self.slots.limit)
+        self._window = _Window()
+        self.slots.reset_peak()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="adaptive-parallelism", daemon=True)
+        self._thread.start()
+        logger.info(f"Adaptive parallelism started at {self.slots.limit}, bounds: [{self._min}, {self._max}], every {self._interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    @contextlib.contextmanager
+    def track(self, feed: Path) -> Iterator[None]:
+        # measured before the pipeline runs, a processed feed is gone from disk
+        try:
+            size: int = feed.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        start: float = time.monotonic()
+        ok: bool = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(time.monotonic() - start, size, ok)
+
+    def record(self, seconds: float, size: int, ok: bool) -> None:
+        with self._lock:
+            self._window.feeds += 1
+            self._window.failed += 0 if ok else 1
+            self._window.bytes += size
+            self._window.seconds += seconds
+
+    def adjust(self) -> str:
+        now: float = time.monotonic()
+        with self._lock:
+            window: _Window = self._window
+            self._window = _Window()
+        saturated: bool = self.slots.reset_peak() >= self.slots.limit
+        limit: int = self.slots.limit
+
+        if not window.feeds:
+            decision, reason = "hold", "no feed finished"
+        else:
+            current: tuple[float, float, float, float] = window.rates(now)
+            decision, reason = self._decide(current, saturated)
+            self._previous = current
+            feeds_per_s, mb_per_s, latency, error_rate = current
+            reason = f"{reason}, {feeds_per_s:.2f} feeds/s, {mb_per_s:.1f} MB/s, latency {latency:.1f}s, errors {error_rate:.0%}"
+
+        new_limit: int = limit
+        if decision == "increase":
+            new_limit = min(limit + self._increase, self._max)
+        elif decision == "decrease":
+            new_limit = max(int(limit * self._decrease_factor), self._min)
+        if new_limit == limit and decision != "hold":
+            decision, reason = "hold", f"{reason}, at the {'upper' if decision == 'increase' else 'lower'} bound"
+        self._holds = self._holds + 1 if decision == "hold" else 0
+
+        self.slots.set_limit(new_limit)
+        metrics.PARALLELISM_LIMIT.set(new_limit)
+        metrics.PARALLELISM_DECISIONS.inc(decision=decision)
+        log = logger.info if new_limit != limit else logger.debug
+        log(f"Adaptive parallelism: {decision} {limit} -> {new_limit}, {reason}")
+        return decision
+
+    def _decide(self, current: tuple[float, float, float, float], saturated: bool) -> tuple[str, str]:
+        feeds_per_s, mb_per_s, latency, error_rate = current
+        if self._previous is None:
+            return ("increase", "first window") if saturated else ("hold", "limit not reached")
+
+        previous_feeds_per_s, previous_mb_per_s, previous_latency, previous_error_rate = self._previous
+        if error_rate > self._error_tolerance and error_rate > previous_error_rate:
+            return "decrease", "error rate rising"
+        if latency > previous_latency * self._latency_tolerance:
+            return "decrease", "latency rising"
+        # both have to hold up: more feeds/s from smaller feeds is no gain if MB/s dropped
+        gained: bool = feeds_per_s > previous_feeds_per_s * (1 + self._improvement) or mb_per_s > previous_mb_per_s * (1 + self._improvement)
+        kept: bool = feeds_per_s >= previous_feeds_per_s * (1 - self._improvement) and mb_per_s >= previous_mb_per_s * (1 - self._improvement)
+        if not saturated:
+            return "hold", "limit not reached"
+        if gained and kept:
+            return "increase", "throughput improving"
+        if self._holds + 1 >= self._probe_after:
+            return "increase", "probing after a flat period"
+        return "hold", "throughput flat"
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self.adjust()
@@ -0,0 +1,125 @@
+import collections
+import struct
+import tarfile
+import threading
+import time
+from pathlib import Path
+
+from . import metrics
+from .compression import feed_compression
+from loguru import logger
+
+_ZSTD_MAGIC: bytes = b"\x28\xb5\x2f\xfd"
+
+class AdmissionControl:
+    def __init__(
+        self,
+        disk_budget: int = None,
+        memory_budget: int = None,
+        compressed_ratio: float = 4.0
+    ):
+        # bytes unpacked into the processing dir at once
+        self._disk_budget: int = disk_budget
+        # bytes of every feed in flight, staged or streamed: they all go through pipes, buffers and the page cache
+        self._memory_budget: int = memory_budget
+        # compressed feed without a recorded content size: assumed to unpack to this many times its size
+        self._compressed_ratio: float = compressed_ratio
+        self._disk_used: int = 0
+        self._memory_used: int = 0
+        self._reservations: dict[Path, tuple[int, int]] = {}
+        # first come, first served: a large feed is not starved by a stream of small ones
+        self._waiting: collections.deque[object] = collections.deque()
+        self._condition: threading.Condition = threading.Condition()
+
+        for name, budget in (("Disk", disk_budget), ("Memory", memory_budget)):
+            if budget is not None and budget <= 0:
+                raise ValueError(f"{name} budget must be positive, got: {budget}")
+        if compressed_ratio < 1:
+            raise ValueError(f"Compressed ratio cannot be below 1, got: {compressed_ratio}")
+
+    def admit(self, feed: Path, size: int, staged: bool = True) -> None:
+        disk: int = size if staged else 0
+        ticket: object = object()
+        start: float = time.monotonic()
+
+        with self._condition:
+            self._waiting.append(ticket)
+            metrics.ADMISSION_WAITING.inc()
+            try:
+                self._condition.wait_for(lambda: self._waiting[0] is ticket and self._fits(disk, size))
+            finally:
+                metrics.ADMISSION_WAITING.dec()
+                self._waiting.remove(ticket)
+                # the next in line may fit as well
+                self._condition.notify_all()
+
+            self._disk_used += disk
+            self._memory_used += size
+            self._reservations[feed] = (disk, size)
+            self._export()
+
+        waited: float = time.monotonic() - start
+        log = logger.info if waited >= 1 else logger.debug
+        log(
+            f"Feed admitted: {feed.name}, {size} bytes declared, waited {waited:.1f}s, "
+            f"in flight: {self._disk_used} bytes on disk, {self._memory_used} bytes in total"
+        )
+
+    def release(self, feed: Path) -> None:
+        with self._condition:
+            disk, size = self._reservations.pop(feed, (0, 0))
+            self._disk_used -= disk
+            self._memory_used -= size
+            self._export()
+            self._condition.notify_all()
+
+    def declared_size(self, feed: Path) -> int:
+        compression: str = feed_compression(feed)
+        if compression == "gzip":
+            return self._gzip_size(feed)
+        if compression == "zstd":
+            return self._zstd_size(feed)
+
+        size: int = 0
+        with tarfile.open(feed, "r:") as tar:
+            for member in tar:
+                if member.isfile():
+                    size += member.size
+        return size
+
+    def _fits(self, disk: int, size: int) -> bool:
+        # over budget on its own: admitted once nothing else holds that budget
+        return (
+            (self._disk_budget is None or not self._disk_used or self._disk_used + disk <= self._disk_budget)
+            and (self._memory_budget is None or not self._memory_used or self._memory_used + size <= self._memory_budget)
+        )
+
+    def _export(self) -> None:
+        metrics.ADMITTED_BYTES.set(self._disk_used, budget="disk")
+        metrics.ADMITTED_BYTES.set(self._memory_used, budget="memory")
+
+    def _gzip_size(self, feed: Path) -> int:
+        # ISIZE trailer: uncompressed size of the last member modulo 2^32
+        estimate: int = int(feed.stat().st_size * self._compressed_ratio)
+        with open(feed, "rb") as f:
+            f.seek(-4, 2)
+            isize: int = struct.unpack("<I", f.read(4))[0]
+        # may have wrapped past 4 GiB: the trailer alone cannot tell, the ratio estimate can
+        return isize if estimate < 2 ** 32 else max(isize, estimate)
+
+    def _zstd_size(self, feed: Path) -> int:
+        with open(feed, "rb") as f:
+            header: bytes = f.read(18)
+        fallback: int = int(feed.stat().st_size * self._compressed_ratio)
+        if len(header) < 6 or header[:4] != _ZSTD_MAGIC:
+            return fallback
+
+        # frame header: descriptor, optional window descriptor, optional dictionary id, optional content size
+        descriptor: int = header[4]
+        single_segment: bool = bool(descriptor & 0x20)
+        offset: int = 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 0x03]
+        size_field: int = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        if not size_field or len(header) < offset + size_field:
+            return fallback
+        content_size: int = int.from_bytes(header[offset:offset + size_field], "little")
+        return content_size + 256 if size_field == 2 else content_size
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from . import metrics
+from .claimer import FeedClaimer
+from .executor import Executor, FeedOrdering
+from .pipeline import Pipeline
+from .scanner import Scanner
+from loguru import logger
+
+class AsyncExecutor(Executor):
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        directory: Path,
+        file_pattern: str,
+        parallelism: int,
+        upload_slots: int,
+        io_threads: int = 8,
+        ordering: FeedOrdering = FeedOrdering.NONE,
+        max_failures: int = None,
+        scanner: Scanner = None,
+        claimer: FeedClaimer = None
+    ):
+        super().__init__(
+            pipeline=pipeline,
+            directory=directory,
+            file_pattern=file_pattern,
+            parallelism=parallelism,
+            ordering=ordering,
+            max_failures=max_failures,
+            scanner=scanner,
+            claimer=claimer
+        )
+        self._upload_slots: int = upload_slots
+        self._io_threads: int = io_threads
+
+        for name, value in (("Parallelism", parallelism), ("Upload slots", upload_slots), ("IO threads", io_threads)):
+            if value <= 0:
+                raise ValueError(f"{name} must be positive, got: {value}")
+
+    def execute_parallel(self) -> None:
+        logger.info(f"Async executor started, feeds in flight: {self._parallelism}, uploads in flight: {self._upload_slots}")
+        exceptions: list[Exception] = asyncio.run(self._execute())
+
+        if exceptions:
+            raise ExceptionGroup("Tasks failed", exceptions)
+
+    async def _execute(self) -> list[Exception]:
+        # hashing, extraction and sqlite calls still block, they run here instead of on the loop
+        io_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self._io_threads, thread_name_prefix="io")
+        asyncio.get_running_loop().set_default_executor(io_executor)
+
+        # concurrency is bounded by semaphores, not by thread count
+        feed_slots: asyncio.Semaphore = asyncio.Semaphore(self._parallelism)
+        upload_slots: asyncio.Semaphore = asyncio.Semaphore(self._upload_slots)
+        # waiting for disk or memory budget parks a thread: never one of the io threads the releasing feeds need
+        admission_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self._parallelism, thread_name_prefix="admission")
+        exceptions: list[Exception] = []
+        tasks: set[asyncio.Task] = set()
+
+        def on_done(task: asyncio.Task) -> None:
+            tasks.discard(task)
+            feed_slots.release()
+            if not task.cancelled() and task.exception():
+                exceptions.append(task.exception())
+
+        # the listing runs off the loop one feed at a time, the first feeds start before the directory is read to the end
+        feeds: Iterator[Path] = self._feeds()
+        while (feed := await asyncio.to_thread(next, feeds, None)) is not None:
+            await feed_slots.acquire()
+            if self._max_failures and len(exceptions) >= self._max_failures:
+                logger.error(f"Fail-fast: {len(exceptions)} feed(s) failed, skipping the remaining feeds")
+                feed_slots.release()
+                break
+
+            task: asyncio.Task = asyncio.create_task(self._process_async(feed, upload_slots, admission_executor), name=feed.name)
+            tasks.add(task)
+            task.add_done_callback(on_done)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        admission_executor.shutdown()
+        return exceptions
+
+    async def _process_async(self, feed: Path, upload_slots: asyncio.Semaphore, admission_executor: ThreadPoolExecutor) -> None:
+        start_time: float = time.time()
+
+        with metrics.FEEDS_IN_FLIGHT.track():
+            claimed: Path = await asyncio.to_thread(self._claimer.claim, feed) if self._claimer else feed
+            if not claimed:
+                return
+            try:
+                await self._run_async(claimed, start_time, upload_slots, admission_executor)
+            finally:
+                if self._claimer:
+                    await asyncio.to_thread(self._claimer.release, claimed)
+
+    async def _run_async(self, feed: Path, start_time: float, upload_slots: asyncio.Semaphore, admission_executor: ThreadPoolExecutor) -> None:
+        unpacked_dir: Path = None
+        try:
+            if not await asyncio.to_thread(self._pipeline.verify, feed):
+                return
+            await asyncio.get_running_loop().run_in_executor(admission_executor, self._pipeline.admit, feed)
+            unpacked_dir = await asyncio.to_thread(self._pipeline.prepare, feed)
+            await self._pipeline.publish_async(feed, unpacked_dir, upload_slots)
+        except Exception:
+            await asyncio.to_thread(self._pipeline.fail, feed, unpacked_dir)
+            raise
+
+        await asyncio.to_thread(self._pipeline.complete, feed, unpacked_dir, start_time)
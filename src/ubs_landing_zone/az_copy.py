@@ -1,11 +1,30 @@
+import asyncio
+import contextlib
 from pathlib import Path
+import shutil
 import subprocess
 from subprocess import CalledProcessError
 import json
+import re
+import tempfile
+import threading
+from typing import BinaryIO
 
+from . import metrics
+from .uploader import UploadError, Uploader, blob_url, redact
 from loguru import logger
 
-class AzCopy:
+class AzCopy(Uploader):
+    # MessageContent of failures another attempt cannot fix: credentials, permissions, missing container or source, bad arguments
+    _FATAL_ERRORS: re.Pattern = re.compile(
+        r"AuthenticationFailed|AuthorizationFailure|AuthorizationPermissionMismatch|InvalidAuthenticationInfo|"
+        r"ContainerNotFound|ResourceNotFound|InvalidResourceName|InvalidQueryParameterValue|AccountIsDisabled|"
+        r"not authorized|failed to parse|cannot find source|no such file|"
+        # status codes only where they are one, numbers in file names, byte counts or job ids are not
+        r"(?:RESPONSE|Status|status code)\D{0,10}\b(400|401|403|404)\b|\b(400|401|403|404) (?:Bad Request|Unauthorized|Forbidden|Not Found)\b",
+        re.IGNORECASE
+    )
+
     def __init__(
         self,
         az_copy_binary: Path,
@@ -22,6 +41,74 @@ class AzCopy:
             raise ValueError("AZCopy destination URL must be provided.")
     
     def upload(self, file: Path) -> None:
+        cmd: list[str] = self._upload_cmd(file)
+            
+        try:
+            logger.debug(f"Executing azcopy cmd: '{' '.join(cmd)}'")  
+
+            with metrics.AZCOPY_PROCESSES.track():
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    check=True,
+                    text=True
+                )
+
+            if result.stderr:
+                logger.warning(f"Upload completed with warnings: {result.stderr}")
+            
+            logger.debug(f"Upload completed successfully for {file.name}")
+        
+        except CalledProcessError as e: 
+            err_arr = self._errors(e.output)
+            
+            msg: str = f"AZCopy command failed, file: {file.name}, command: '{' '.join(cmd)}', cmd errors: {" | ".join(err_arr)}"
+            
+            raise UploadError(msg, retryable=self._retryable(err_arr)) from e
+
+        except Exception as e: 
+            msg: str = f"AZCopy command failed, file: {file.name}, command: {' '.join(cmd)}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+    async def upload_async(self, file: Path) -> None:
+        cmd: list[str] = self._upload_cmd(file)
+        
+        try:
+            logger.debug(f"Executing azcopy cmd: '{' '.join(cmd)}'")
+            
+            # no thread parked per transfer, the event loop waits on the child process
+            with metrics.AZCOPY_PROCESSES.track():
+                process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                try:
+                    stdout, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    process.kill()
+                    await process.wait()
+                    raise
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            msg: str = f"AZCopy command failed, file: {file.name}, command: {' '.join(cmd)}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+        
+        if process.returncode != 0:
+            err_arr = self._errors(stdout.decode())
+            msg: str = f"AZCopy command failed, file: {file.name}, command: '{' '.join(cmd)}', cmd errors: {" | ".join(err_arr)}"
+            raise UploadError(msg, retryable=self._retryable(err_arr))
+        
+        if stderr:
+            logger.warning(f"Upload completed with warnings: {stderr.decode()}")
+        
+        logger.debug(f"Upload completed successfully for {file.name}")
+
+    def _upload_cmd(self, file: Path) -> list[str]:
         cmd = [
             str(self._az_copy_binary),
             "copy",
@@ -40,34 +127,160 @@ class AzCopy:
         else:
             cmd.append("--output-level")
             cmd.append("essential")
-            
-        try:
-            logger.debug(f"Executing azcopy cmd: '{' '.join(cmd)}'")  
+        return cmd
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                check=True,
-                text=True
-            )
+    def upload_batch(self, files: list[Path]) -> None:
+        # one azcopy job per source dir, members of nested dirs land flat like single file uploads do
+        batches: dict[Path, list[Path]] = {}
+        names: dict[str, Path] = {}
+        for file in files:
+            if file.name in names:
+                msg: str = f"AZCopy batch cannot upload two files named {file.name}, they would overwrite each other: {names[file.name]}, {file}"
+                logger.error(msg)
+                raise ValueError(msg)
+            names[file.name] = file
+            batches.setdefault(file.parent, []).append(file)
+        for source_dir, batch in batches.items():
+            self._upload_dir(source_dir, batch)
 
+    def _upload_dir(self, source_dir: Path, files: list[Path]) -> None:
+        # one azcopy job for the whole batch: source dir filtered down to the given files
+        cmd = [
+            str(self._az_copy_binary),
+            "copy",
+            str(source_dir),
+            self._az_copy_destination_url,
+            "--recursive",
+            "--as-subdir=false",
+            "--include-path",
+            ";".join(f.name for f in files),
+            "--output-type",
+            "json",
+            "--log-level",
+            "NONE"
+        ]
+        
+        if self._dry_run:
+            cmd.append("--dry-run")
+            cmd.append("--from-to")
+            cmd.append("LocalBlob")
+        else:
+            cmd.append("--output-level")
+            cmd.append("essential")
+        
+        try:
+            logger.debug(f"Executing azcopy cmd: '{' '.join(cmd)}'")
+            
+            with metrics.AZCOPY_PROCESSES.track():
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    check=True,
+                    text=True
+                )
+            
             if result.stderr:
                 logger.warning(f"Upload completed with warnings: {result.stderr}")
             
-            logger.debug(f"Upload completed successfully for {file.name}")
+            logger.debug(f"Upload completed successfully for {len(files)} file(s) from {source_dir}")
         
-        except CalledProcessError as e: 
-            err_arr = [
-                json.loads(line)['MessageContent'] 
-                for line in e.output.splitlines() 
-                if line.strip()
+        except CalledProcessError as e:
+            err_arr = self._errors(e.output)
+            # whole names only: an error about data.csv does not blame a.csv
+            failed_files: list[str] = [
+                f.name for f in files
+                if any(re.search(rf"(^|[/\\\s'\"(]){re.escape(f.name)}($|[\s'\":,;)])", err) for err in err_arr)
             ]
             
-            msg: str = f"AZCopy command failed, file: {file.name}, command: '{' '.join(cmd)}', cmd errors: {" | ".join(err_arr)}"
+            msg: str = f"AZCopy command failed, files: {failed_files or [f.name for f in files]}, command: '{' '.join(cmd)}', cmd errors: {" | ".join(err_arr)}"
             
+            raise UploadError(msg, retryable=self._retryable(err_arr)) from e
+        
+        except Exception as e:
+            msg: str = f"AZCopy command failed, files: {[f.name for f in files]}, command: {' '.join(cmd)}"
+            logger.error(f"{msg}, error: {e}")
             raise IOError(msg) from e
 
-        except Exception as e: 
-            msg: str = f"AZCopy command failed, file: {file.name}, command: {' '.join(cmd)}"
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        url: str = blob_url(self._az_copy_destination_url, blob_name)
+        cmd = [
+            str(self._az_copy_binary),
+            "copy",
+            url,
+            "--from-to",
+            "PipeBlob",
+            "--output-type",
+            "json",
+            "--log-level",
+            "NONE",
+            "--output-level",
+            "essential"
+        ]
+        cmd_str: str = " ".join(cmd).replace(url, redact(url))
+        
+        if self._dry_run:
+            logger.debug(f"Dry run, skipping piped upload of {blob_name}, cmd: '{cmd_str}'")
+            return
+        
+        try:
+            logger.debug(f"Executing azcopy cmd: '{cmd_str}'")
+            
+            with tempfile.TemporaryFile() as stderr_file, metrics.AZCOPY_PROCESSES.track(), subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file
+            ) as process:
+                # drained while the member is written: azcopy blocks on a full stdout pipe before it has read all of stdin
+                output: list[bytes] = []
+                reader: threading.Thread = threading.Thread(target=lambda: output.append(process.stdout.read()), daemon=True)
+                reader.start()
+                try:
+                    shutil.copyfileobj(stream, process.stdin)
+                except BrokenPipeError:
+                    # azcopy exited early, its own output explains why
+                    pass
+                except Exception:
+                    # the member could not be read: closing stdin first would commit a truncated blob
+                    process.kill()
+                    raise
+                finally:
+                    with contextlib.suppress(BrokenPipeError):
+                        process.stdin.close()
+                    reader.join()
+                process.wait()
+                stdout: bytes = output[0] if output else b""
+                stderr_file.seek(0)
+                stderr: bytes = stderr_file.read()
+        
+        except Exception as e:
+            msg: str = f"AZCopy command failed, file: {blob_name}, command: {cmd_str}"
             logger.error(f"{msg}, error: {e}")
-            raise IOError(msg) from e
\ No newline at end of file
+            raise IOError(msg) from e
+            
+        if process.returncode != 0:
+            err_arr = self._errors(stdout.decode())
+            msg: str = f"AZCopy command failed, file: {blob_name}, command: '{cmd_str}', cmd errors: {" | ".join(err_arr)}"
+            raise UploadError(msg, retryable=self._retryable(err_arr))
+        
+        if stderr:
+            logger.warning(f"Upload completed with warnings: {stderr.decode()}")
+            
+        logger.debug(f"Upload completed successfully for {blob_name}")
+    
+    @classmethod
+    def _retryable(cls, errors: list[str]) -> bool:
+        # throttling, timeouts, 5xx and dropped connections, and anything unknown: the retry budget bounds the cost
+        return not any(cls._FATAL_ERRORS.search(error) for error in errors)
+
+    @staticmethod
+    def _errors(output: str) -> list[str]:
+        err_arr: list[str] = []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                err_arr.append(json.loads(line)['MessageContent'])
+            except (ValueError, KeyError, TypeError):
+                err_arr.append(line.strip())
+        return err_arr
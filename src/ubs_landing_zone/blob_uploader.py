@@ -0,0 +1,192 @@
+import base64
+import http.client
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote, urlsplit
+
+from .uploader import UploadError, Uploader, blob_url, redact
+from loguru import logger
+
+class BlobUploader(Uploader):
+    _API_VERSION: str = "2021-08-06"
+
+    def __init__(
+        self,
+        destination_url: str,
+        block_size: int = 8 * 1024 * 1024,
+        concurrency: int = 8,
+        timeout: float = 300.0,
+        dry_run: bool = False
+    ):
+        self._destination_url: str = destination_url
+        self._block_size: int = block_size
+        self._concurrency: int = concurrency
+        self._dry_run: bool = dry_run
+
+        if not self._destination_url:
+            raise ValueError("Blob destination URL must be provided.")
+        if self._block_size <= 0:
+            raise ValueError(f"Block size must be positive, got: {block_size}")
+        if self._concurrency <= 0:
+            raise ValueError(f"Block upload concurrency must be positive, got: {concurrency}")
+
+        self._pool: _ConnectionPool = _ConnectionPool(destination_url, timeout)
+        self._block_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="block"
+        )
+
+    def upload(self, file: Path) -> None:
+        try:
+            with open(file, 'rb') as f:
+                self.upload_stream(f, file.name)
+        except IOError:
+            raise
+        except Exception as e:
+            msg: str = f"Blob upload failed, file: {file.name}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        url: str = blob_url(self._destination_url, blob_name)
+
+        if self._dry_run:
+            logger.debug(f"Dry run, skipping blob upload of {blob_name} to {redact(url)}")
+            return
+
+        first_block: bytes = stream.read(self._block_size)
+        if len(first_block) < self._block_size:
+            # fits in a single request, Put Blob
+            self._request("PUT", url, first_block, {"x-ms-blob-type": "BlockBlob"}, blob_name)
+        else:
+            self._upload_blocks(url, first_block, stream, blob_name)
+
+        logger.debug(f"Upload completed successfully for {blob_name}")
+
+    def close(self) -> None:
+        self._block_executor.shutdown(wait=True)
+        self._pool.close()
+
+    def _upload_blocks(self, url: str, first_block: bytes, stream: BinaryIO, blob_name: str) -> None:
+        block_ids: list[str] = []
+        in_flight: set[Future] = set()
+        block: bytes = first_block
+
+        try:
+            while block:
+                # fixed-width ids, Azure requires all block ids of a blob to have the same length
+                block_id: str = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+                block_ids.append(block_id)
+                in_flight.add(self._block_executor.submit(
+                    self._request,
+                    "PUT",
+                    f"{url}{'&' if '?' in url else '?'}comp=block&blockid={quote(block_id)}",
+                    block,
+                    {},
+                    blob_name
+                ))
+
+                # at most `concurrency` blocks buffered per blob, memory stays bounded
+                if len(in_flight) >= self._concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+
+                block = stream.read(self._block_size)
+
+            for future in in_flight:
+                future.result()
+        except Exception:
+            for future in in_flight:
+                future.cancel()
+            raise
+
+        block_list: str = "".join(f"<Latest>{block_id}</Latest>" for block_id in block_ids)
+        body: bytes = f'<?xml version="1.0" encoding="utf-8"?><BlockList>{block_list}</BlockList>'.encode()
+        self._request("PUT", f"{url}{'&' if '?' in url else '?'}comp=blocklist", body, {"Content-Type": "application/xml"}, blob_name)
+        logger.debug(f"Committed {len(block_ids)} block(s) for {blob_name}")
+
+    def _request(self, method: str, url: str, body: bytes, headers: dict[str, str], blob_name: str) -> None:
+        target = urlsplit(url)
+        path: str = f"{target.path}?{target.query}" if target.query else target.path
+        headers = {
+            "x-ms-version": self._API_VERSION,
+            "Content-Length": str(len(body)),
+            **headers
+        }
+
+        for attempt in range(2):
+            # an idle keep-alive connection may have been dropped by the server, retry once on a fresh one
+            connection: http.client.HTTPConnection = self._pool.get() if attempt == 0 else self._pool.new()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response: http.client.HTTPResponse = connection.getresponse()
+                response_body: bytes = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                connection.close()
+                if attempt == 0:
+                    continue
+                msg: str = f"Blob upload failed, file: {blob_name}, url: {redact(url)}"
+                logger.error(f"{msg}, error: {e}")
+                raise UploadError(msg, retryable=True) from e
+            except Exception as e:
+                connection.close()
+                msg: str = f"Blob upload failed, file: {blob_name}, url: {redact(url)}"
+                logger.error(f"{msg}, error: {e}")
+                # socket errors and timeouts are OSErrors
+                raise UploadError(msg, retryable=isinstance(e, OSError)) from e
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._pool.put(connection)
+
+        if response.status >= 300:
+            error_code: str = response.getheader("x-ms-error-code", "")
+            msg: str = f"Blob upload failed, file: {blob_name}, url: {redact(url)}, status: {response.status} {response.reason}, error: {error_code or response_body[:200]!r}"
+            raise UploadError(msg, retryable=response.status in (408, 429) or response.status >= 500)
+
+# keep-alive connections to the destination host, reused across files and feeds
+class _ConnectionPool:
+    def __init__(self, url: str, timeout: float):
+        target = urlsplit(url)
+        self._scheme: str = target.scheme
+        self._netloc: str = target.netloc
+        self._timeout: float = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock: threading.Lock = threading.Lock()
+        self._created: int = 0
+
+        if self._scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported destination URL scheme: '{self._scheme}'")
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    def get(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.new()
+
+    def new(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self._created += 1
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._netloc, timeout=self._timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self._timeout)
+
+    def put(self, connection: http.client.HTTPConnection) -> None:
+        self._idle.put(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
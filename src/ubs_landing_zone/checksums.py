@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from . import metrics
+from loguru import logger
+
+_BSD_CHECKSUM: re.Pattern = re.compile(r"^[\w-]+ \((?P<name>.+)\) = (?P<digest>[0-9a-fA-F]+)$")
+
+def normalize_algorithm(name: str) -> str:
+    # 'SHA-256', 'sha_256', 'BLAKE2b' -> the hashlib name; OpenSSL picks SHA-NI / ARMv8 crypto for sha1 and sha256 on its own
+    available: dict[str, str] = {algorithm.replace("_", "").replace("-", "").lower(): algorithm for algorithm in hashlib.algorithms_available}
+    available["blake2"] = "blake2b"
+    algorithm: str = available.get(name.replace("_", "").replace("-", "").lower().strip(), "")
+    # shake digests have no fixed length, a sidecar cannot be compared against them
+    if not algorithm or algorithm.startswith("shake"):
+        raise ValueError(f"Unsupported checksum algorithm: {name}, available: {sorted(a for a in hashlib.algorithms_guaranteed if not a.startswith('shake'))}")
+    return algorithm
+
+def parse_checksum(text: str) -> tuple[str, str | None]:
+    # bare digest, md5sum / sha256sum output ('<digest>  <name>', '<digest> *<name>' in binary mode)
+    # or BSD style ('MD5 (<name>) = <digest>'); the first line only
+    line: str = text.strip().splitlines()[0].strip() if text.strip() else ""
+    if match := _BSD_CHECKSUM.match(line):
+        return match["digest"].lower(), match["name"]
+    digest, _, name = line.partition(" ")
+    return digest.lower(), name.strip().removeprefix("*") or None
+
+class ChecksumCache:
+    _PURGE_EVERY: int = 1000
+    # file timestamps are coarse (a clock tick, up to 2s on some network filesystems): a feed modified this recently
+    # is not cached, a rewrite within the same tick could keep its size and mtime
+    _RACY_NS: int = 2 * 10 ** 9
+
+    def __init__(self, path: Path, max_entries: int = 10000):
+        self._path: Path = path
+        self._max_entries: int = max_entries
+        self._lock: threading.Lock = threading.Lock()
+        self._puts_since_purge: int = 0
+
+        if max_entries <= 0:
+            raise ValueError(f"Checksum cache size must be positive, got: {max_entries}")
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # the file identity is the key: any rewrite of the feed changes the size, the mtime or the inode;
+            # a rename keeps all of them, a claimed or failed feed moved back still hits
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS checksums ("
+                "device INTEGER NOT NULL, "
+                "inode INTEGER NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, "
+                "algorithm TEXT NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "used_at REAL NOT NULL, "
+                "PRIMARY KEY (device, inode, size, mtime_ns, algorithm)"
+                ") WITHOUT ROWID"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS checksums_used ON checksums (used_at)")
+        except Exception as e:
+            msg: str = f"Checksum cache cannot be opened: {path}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+        self._purge()
+
+    def get(self, stat: os.stat_result, algorithm: str) -> str | None:
+        key: tuple = self._key(stat, algorithm)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest FROM checksums WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? AND algorithm = ?",
+                key
+            ).fetchone()
+            if row:
+                # least recently used go first
+                self._connection.execute(
+                    "UPDATE checksums SET used_at = ? WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? AND algorithm = ?",
+                    (time.time(), *key)
+                )
+        metrics.CHECKSUM_CACHE.inc(result="hit" if row else "miss")
+        return row[0] if row else None
+
+    def put(self, file: Path, stat: os.stat_result, algorithm: str, digest: str) -> None:
+        # stat taken before hashing: a feed still being written to is not cached under either version
+        try:
+            current: os.stat_result = file.stat()
+            unchanged: bool = self._key(current, algorithm) == self._key(stat, algorithm)
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            logger.warning(f"Feed changed while it was hashed, digest not cached: {file.name}")
+            return
+        if time.time_ns() - stat.st_mtime_ns < self._RACY_NS:
+            logger.debug(f"Feed changed too recently to tell apart from a later one, digest not cached: {file.name}")
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checksums (device, inode, size, mtime_ns, algorithm, digest, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*self._key(stat, algorithm), digest, time.time())
+            )
+            self._puts_since_purge += 1
+
+        # eviction is amortised, not paid on every put, the cache overshoots by 1% at most
+        if self._puts_since_purge >= min(self._PURGE_EVERY, max(self._max_entries // 100, 1)):
+            self._purge()
+
+    def forget(self, stat: os.stat_result) -> None:
+        # the feed is being deleted, its inode is free for reuse: a file copied onto it with the same size and
+        # a preserved mtime (cp -p, rsync -t, tar) must not inherit the digest
+        with self._lock:
+            self._connection.execute("DELETE FROM checksums WHERE device = ? AND inode = ?", (stat.st_dev, stat.st_ino))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _key(stat: os.stat_result, algorithm: str) -> tuple[int, int, int, int, str]:
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, algorithm
+
+    def _purge(self) -> None:
+        with self._lock:
+            self._puts_since_purge = 0
+            self._connection.execute(
+                "DELETE FROM checksums WHERE (device, inode, size, mtime_ns, algorithm) IN ("
+                "SELECT device, inode, size, mtime_ns, algorithm FROM checksums ORDER BY used_at DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self._max_entries,)
+            )
+            size: int = self._connection.execute("SELECT COUNT(*) FROM checksums").fetchone()[0]
+        logger.debug(f"Checksum cache purged, {size} digest(s) kept")
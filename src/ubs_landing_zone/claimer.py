@@ -0,0 +1,151 @@
+import os
+import shutil
+import socket
+import threading
+import time
+from pathlib import Path
+
+from . import metrics
+from .compression import checksum_file
+from loguru import logger
+
+class FeedClaimer:
+    _LEASE: str = ".lease"
+
+    def __init__(
+        self,
+        directory: Path,
+        checksum_extension: str,
+        claims_dir: Path = None,
+        node_id: str = None,
+        lease_seconds: float = 60.0
+    ):
+        self._directory: Path = directory
+        self._checksum_extension: str = checksum_extension
+        # has to live on the same file system as the landing dir, a claim is a rename
+        self._claims_dir: Path = claims_dir or directory / ".claims"
+        self._node_id: str = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._lease_seconds: float = lease_seconds
+        self._node_dir: Path = self._claims_dir / self._node_id
+        self._stop_event: threading.Event = threading.Event()
+        self._heartbeat: threading.Thread = None
+
+        if lease_seconds <= 0:
+            raise ValueError(f"Lease must be positive, got: {lease_seconds}")
+        if os.sep in self._node_id or self._node_id.startswith("."):
+            raise ValueError(f"Invalid node id: '{self._node_id}'")
+
+    def start(self) -> None:
+        self._node_dir.mkdir(parents=True, exist_ok=True)
+        # same node id as a previous, crashed run: its claims go back to the landing dir first
+        self._release_all(self._node_dir)
+        (self._node_dir / self._LEASE).touch()
+        self.reclaim_expired()
+
+        self._stop_event.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name="claim-heartbeat", daemon=True)
+        self._heartbeat.start()
+        logger.info(f"Claiming feeds as node: {self._node_id}, claims dir: {self._claims_dir}, lease: {self._lease_seconds}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+        # anything still claimed was not started, the next node picks it up
+        if self._node_dir.exists():
+            self._release_all(self._node_dir)
+            shutil.rmtree(self._node_dir, ignore_errors=True)
+
+    def claim(self, feed: Path) -> Path | None:
+        claimed: Path = self._node_dir / feed.name
+        try:
+            # atomic on a local file system and on NFS / SMB: exactly one node wins the rename
+            os.rename(feed, claimed)
+        except FileNotFoundError:
+            logger.debug(f"Feed claimed by another node: {feed.name}")
+            metrics.FEED_CLAIMS.inc(result="lost")
+            return None
+
+        sidecar: Path = checksum_file(feed, self._checksum_extension)
+        try:
+            os.rename(sidecar, self._node_dir / sidecar.name)
+        except FileNotFoundError:
+            pass
+        logger.debug(f"Feed claimed: {feed.name}, node: {self._node_id}")
+        metrics.FEED_CLAIMS.inc(result="claimed")
+        return claimed
+
+    def release(self, claimed: Path) -> None:
+        # a feed left in the claim dir after processing (preserved source feeds, skipped duplicates, not started)
+        if claimed.parent != self._node_dir or not claimed.exists():
+            return
+        try:
+            self._move_back(claimed)
+        except OSError as e:
+            logger.error(f"Cannot return feed to the landing dir: {claimed.name}, error: {e}")
+            return
+        metrics.FEED_CLAIMS.inc(result="released")
+
+    def reclaim_expired(self) -> int:
+        reclaimed: int = 0
+        now: float = time.time()
+        for node_dir in self._claims_dir.iterdir():
+            if node_dir == self._node_dir or not node_dir.is_dir():
+                continue
+            try:
+                last_beat: float = (node_dir / self._LEASE).stat().st_mtime
+            except FileNotFoundError:
+                last_beat = node_dir.stat().st_mtime
+            if now - last_beat < self._lease_seconds:
+                continue
+
+            # one reclaimer wins this rename, the others find the dir gone
+            reclaim_dir: Path = self._claims_dir / f".reclaim.{self._node_id}.{node_dir.name}"
+            try:
+                os.rename(node_dir, reclaim_dir)
+            except FileNotFoundError:
+                continue
+            count: int = self._release_all(reclaim_dir)
+            shutil.rmtree(reclaim_dir, ignore_errors=True)
+            logger.warning(f"Lease of node: {node_dir.name} expired {now - last_beat:.0f}s ago, {count} feed(s) returned to {self._directory}")
+            metrics.FEED_CLAIMS.inc(count, result="reclaimed")
+            reclaimed += count
+        return reclaimed
+
+    def _beat(self) -> None:
+        lease: Path = self._node_dir / self._LEASE
+        while not self._stop_event.wait(self._lease_seconds / 3):
+            try:
+                os.utime(lease)
+            except FileNotFoundError:
+                # reclaimed while alive (e.g. a long pause or partition), feeds in flight may be processed twice
+                logger.error(f"Lease lost, node: {self._node_id}, claims dir was reclaimed by another node")
+                self._node_dir.mkdir(parents=True, exist_ok=True)
+                lease.touch()
+            except OSError as e:
+                logger.error(f"Cannot renew lease, node: {self._node_id}, error: {e}")
+            try:
+                self.reclaim_expired()
+            except OSError as e:
+                logger.error(f"Cannot reclaim expired claims, error: {e}")
+
+    def _release_all(self, node_dir: Path) -> int:
+        feeds: list[Path] = [
+            path for path in node_dir.iterdir()
+            if path.name != self._LEASE and not path.name.endswith(self._checksum_extension)
+        ]
+        for feed in feeds:
+            self._move_back(feed)
+        # sidecars without their feed
+        for path in node_dir.iterdir():
+            if path.name != self._LEASE:
+                os.rename(path, self._directory / path.name)
+        return len(feeds)
+
+    def _move_back(self, claimed: Path) -> None:
+        # the sidecar first: a feed back in the landing dir without its checksum would be uploaded unverified
+        sidecar: Path = checksum_file(claimed, self._checksum_extension)
+        if sidecar.exists():
+            os.rename(sidecar, self._directory / sidecar.name)
+        os.rename(claimed, self._directory / claimed.name)
+        logger.debug(f"Feed returned to the landing dir: {claimed.name}")
@@ -0,0 +1,145 @@
+import gzip
+import io
+import shutil
+import subprocess
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# longest first, 'x.tar.gz' is a gzip feed named 'x', not a '.gz' file named 'x.tar'
+_SUFFIXES: dict[str, str] = {
+    ".tar.gz": "gzip",
+    ".tar.zst": "zstd",
+    ".tgz": "gzip",
+    ".tzst": "zstd",
+    ".tar": None,
+}
+
+def feed_compression(feed: Path) -> str | None:
+    name: str = feed.name.lower()
+    return next((kind for suffix, kind in _SUFFIXES.items() if name.endswith(suffix)), None)
+
+def feed_stem(name: str) -> str:
+    lower: str = name.lower()
+    suffix: str = next((suffix for suffix in _SUFFIXES if lower.endswith(suffix)), None)
+    if suffix:
+        return name[:-len(suffix)]
+    return Path(name).stem
+
+def checksum_file(feed: Path, checksum_extension: str) -> Path:
+    # 'x.tar' and 'x.tar.gz' both come with 'x.md5'
+    return feed.with_name(f"{feed_stem(feed.name)}{checksum_extension}")
+
+class Decompressor:
+    _CHUNK: int = 1024 * 1024
+
+    def __init__(self, threads: int = 4):
+        self._threads: int = threads
+
+        if threads < 0:
+            raise ValueError(f"Decompress threads cannot be negative, got: {threads}")
+
+    @contextmanager
+    def open(self, feed: Path, source: BinaryIO) -> Iterator[BinaryIO]:
+        kind: str = feed_compression(feed)
+        if kind is None:
+            yield source
+            return
+
+        command: list[str] = self._command(kind)
+        if command:
+            with self._subprocess(feed, source, command) as stream:
+                yield stream
+            return
+
+        logger.debug(f"Decompressing {kind} in-process, feed: {feed.name}")
+        if kind == "gzip":
+            with gzip.GzipFile(fileobj=source) as stream:
+                yield stream
+        elif zstandard is not None:
+            with zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=False) as stream:
+                yield stream
+        else:
+            msg: str = f"Cannot decompress zstd feed: {feed.name}, neither the zstd binary nor the zstandard package is available"
+            logger.error(msg)
+            raise IOError(msg)
+
+    def _command(self, kind: str) -> list[str] | None:
+        # 0 threads: in-process decoders only
+        if not self._threads:
+            return None
+        if kind == "gzip":
+            if pigz := shutil.which("pigz"):
+                return [pigz, "-d", "-c", "-p", str(self._threads)]
+            if gzip_binary := shutil.which("gzip"):
+                return [gzip_binary, "-d", "-c"]
+        elif zstd := shutil.which("zstd"):
+            return [zstd, "-d", "-c", "-q"]
+        return None
+
+    @contextmanager
+    def _subprocess(self, feed: Path, source: BinaryIO, command: list[str]) -> Iterator[BinaryIO]:
+        # the decoder runs in its own process, next to (not in front of) the tar extraction
+        try:
+            source.fileno()
+            stdin: int | BinaryIO = source
+        except (AttributeError, io.UnsupportedOperation):
+            stdin = subprocess.PIPE
+
+        logger.debug(f"Decompressing with {Path(command[0]).name}, feed: {feed.name}")
+        process: subprocess.Popen = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        pump_errors: list[Exception] = []
+        pump: threading.Thread = None
+        if stdin is subprocess.PIPE:
+            # the source is not a plain file (e.g. it hashes what it reads), bytes have to go through us
+            pump = threading.Thread(target=self._pump, args=(source, process.stdin, pump_errors), name=f"decompress-{feed.name}", daemon=True)
+            pump.start()
+
+        try:
+            yield process.stdout
+            # tar stops at its end-of-archive marker, the decoder still has to reach the end to verify the trailer
+            while process.stdout.read(self._CHUNK):
+                pass
+            process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            if pump:
+                pump.join()
+            process.stdout.close()
+            stderr: str = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+
+        if pump_errors:
+            msg: str = f"Cannot read feed: {feed.name} for decompression"
+            logger.error(f"{msg}, error: {pump_errors[0]}")
+            raise IOError(msg) from pump_errors[0]
+        if process.returncode != 0:
+            msg: str = f"Decompression failed, feed: {feed.name}, exit code: {process.returncode}, stderr: {stderr}"
+            logger.error(msg)
+            raise IOError(msg)
+
+    def _pump(self, source: BinaryIO, sink: BinaryIO, errors: list[Exception]) -> None:
+        try:
+            while chunk := source.read(self._CHUNK):
+                sink.write(chunk)
+        except BrokenPipeError:
+            # decoder gone, its exit code tells why
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                sink.close()
+            except OSError:
+                pass
@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+
+from loguru import logger
+
+class DuplicatePolicy(str, Enum):
+    LOG = "log"
+    DELETE = "delete"
+    MOVE = "move"
+
+class DigestIndex:
+    _PURGE_EVERY: int = 1000
+
+    def __init__(self, path: Path, ttl: float = None, max_entries: int = None):
+        self._path: Path = path
+        self._ttl: float = ttl
+        self._max_entries: int = max_entries
+        self._lock: threading.Lock = threading.Lock()
+        self._adds_since_purge: int = 0
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # primary key lookup, cost stays flat with millions of digests
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS ingested_feeds ("
+                "digest TEXT PRIMARY KEY, "
+                "ingested_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ingested_feeds_age ON ingested_feeds (ingested_at)")
+            self._size: int = self._connection.execute("SELECT COUNT(*) FROM ingested_feeds").fetchone()[0]
+        except Exception as e:
+            msg: str = f"Digest index cannot be opened: {path}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+        self._purge()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def contains(self, digest: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT ingested_at FROM ingested_feeds WHERE digest = ?",
+                (digest,)
+            ).fetchone()
+        return row is not None and (self._ttl is None or row[0] >= time.time() - self._ttl)
+
+    def add(self, digest: str) -> None:
+        with self._lock:
+            known: bool = self._connection.execute(
+                "SELECT 1 FROM ingested_feeds WHERE digest = ?",
+                (digest,)
+            ).fetchone() is not None
+            self._connection.execute(
+                "INSERT OR REPLACE INTO ingested_feeds (digest, ingested_at) VALUES (?, ?)",
+                (digest, time.time())
+            )
+            if not known:
+                self._size += 1
+            self._adds_since_purge += 1
+
+        # eviction is amortised, not paid on every add
+        if self._adds_since_purge >= self._PURGE_EVERY or (self._max_entries and self._size > self._max_entries * 1.01):
+            self._purge()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _purge(self) -> None:
+        with self._lock:
+            self._adds_since_purge = 0
+            if self._ttl is not None:
+                self._connection.execute("DELETE FROM ingested_feeds WHERE ingested_at < ?", (time.time() - self._ttl,))
+            if self._max_entries is not None:
+                self._connection.execute(
+                    "DELETE FROM ingested_feeds WHERE digest IN ("
+                    "SELECT digest FROM ingested_feeds ORDER BY ingested_at DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self._max_entries,)
+                )
+            self._size = self._connection.execute("SELECT COUNT(*) FROM ingested_feeds").fetchone()[0]
+        logger.debug(f"Digest index purged, {self._size} digest(s) kept")
@@ -1,61 +1,169 @@
+import contextlib
 import os
 import re
+import threading
 
+from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+from . import metrics
+from .adaptive import AdaptiveController
+from .claimer import FeedClaimer
 from .pipeline import Pipeline
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from .scanner import Scanner
+from concurrent.futures import Future, ThreadPoolExecutor
 from loguru import logger
 
+class FeedOrdering(str, Enum):
+    NONE = "none"
+    LARGEST_FIRST = "largest_first"
+    SMALLEST_FIRST = "smallest_first"
+    OLDEST_FIRST = "oldest_first"
+
 class Executor:
     def __init__(
         self, 
         pipeline: Pipeline,
         directory: Path,
         file_pattern: str,
-        parallelism: int
+        parallelism: int,
+        queue_size: int = None,
+        ordering: FeedOrdering = FeedOrdering.NONE,
+        max_failures: int = None,
+        scanner: Scanner = None,
+        claimer: FeedClaimer = None,
+        controller: AdaptiveController = None
     ):
         self._pipeline: Pipeline = pipeline
         self._directory: Path = directory
         self._file_pattern: str = file_pattern
         self._parallelism: int = parallelism
+        self._queue_size: int = parallelism if queue_size is None else queue_size
+        self._ordering: FeedOrdering = FeedOrdering(ordering)
+        self._max_failures: int = max_failures
+        self._scanner: Scanner = scanner
+        self._claimer: FeedClaimer = claimer
+        # adaptive: the pool is sized for the upper bound, the controller's semaphore sets how many feeds run
+        self._controller: AdaptiveController = controller
+        self._workers: int = controller.max_parallelism if controller else parallelism
+        
+        if self._queue_size < 0:
+            raise ValueError(f"Queue size cannot be negative, got: {queue_size}")
     
     def execute_parallel(self) -> None:
         logger.info("Executor started")
         
-        with ThreadPoolExecutor(max_workers=self._parallelism, thread_name_prefix="executor") as executor:
-            futures =  [
-                executor.submit(self._process, f) 
-                for f in self._files()
-            ]
+        # backpressure: at most parallelism + queue_size feeds submitted and not yet finished
+        slots: threading.Semaphore = threading.Semaphore(self._workers + self._queue_size)
+        # re-entrant: cancelling a queued future runs its done callback in this same thread
+        lock: threading.RLock = threading.RLock()
+        pending: set[Future] = set()
+        exceptions: list[Exception] = []
+        fail_fast: threading.Event = threading.Event()
+        
+        def on_done(future: Future) -> None:
+            with lock:
+                pending.discard(future)
+            slots.release()
             
-            exceptions: list[Exception] = []
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    exceptions.append(e)
-
-            if exceptions:
-                raise ExceptionGroup("Tasks failed", exceptions)
+            if future.cancelled():
+                metrics.QUEUE_DEPTH.dec(stage="feeds")
+                return
+            if not future.exception():
+                return
+            with lock:
+                exceptions.append(future.exception())
+                if self._max_failures and len(exceptions) >= self._max_failures and not fail_fast.is_set():
+                    fail_fast.set()
+                    logger.error(f"Fail-fast: {len(exceptions)} feed(s) failed, cancelling {len(pending)} queued feed(s)")
+                    for f in list(pending):
+                        f.cancel()
+        
+        if self._controller:
+            self._controller.start()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="executor") as executor:
+                for feed in self._feeds():
+                    slots.acquire()
+                    if fail_fast.is_set():
+                        slots.release()
+                        break
+                    
+                    metrics.QUEUE_DEPTH.inc(stage="feeds")
+                    future: Future = executor.submit(self._process, feed)
+                    with lock:
+                        pending.add(future)
+                    future.add_done_callback(on_done)
+        finally:
+            if self._controller:
+                self._controller.stop()
+            
+        if exceptions:
+            raise ExceptionGroup("Tasks failed", exceptions)
+    
+    def _feeds(self) -> Iterator[Path]:
+        if self._ordering == FeedOrdering.NONE:
+            # the first feed is submitted while the directory is still being read
+            yield from self._files()
+            return
+        
+        feeds: list[Path] = list(self._files())
+        keys: dict[Path, float] = {feed: self._sort_key(feed) for feed in feeds}
+        yield from sorted(feeds, key=keys.__getitem__, reverse=self._ordering == FeedOrdering.LARGEST_FIRST)
+    
+    def _sort_key(self, feed: Path) -> float:
+        try:
+            stat: os.stat_result = feed.stat()
+        except FileNotFoundError:
+            # vanished since listing, the pipeline reports it
+            return 0
+        return stat.st_mtime if self._ordering == FeedOrdering.OLDEST_FIRST else stat.st_size
             
 
-    def _files(self) -> list[Path]:
+    def _files(self) -> Iterator[Path]:
+        if self._scanner:
+            yield from self._scanner.scan()
+            return
+        
         list_dir: list[str] = os.listdir(self._directory)
-        feeds: list[Path] = [
-            Path(self._directory / f) 
-            for f in list_dir
-            if re.match(self._file_pattern, f.lower())
-        ]
-        if len(feeds) > len(list_dir) / 2:
-            logger.warning(f"UBS_LANDING_ZONE_FEED_PATTERN env var too inclusive, or missing checksum files. Found {len(feeds)} feeds, in {len(list_dir)} all files in directory. ")
+        feeds: int = 0
+        for f in list_dir:
+            if re.match(self._file_pattern, f.lower()):
+                feeds += 1
+                yield Path(self._directory / f)
+        
+        if feeds > len(list_dir) / 2:
+            logger.warning(f"UBS_LANDING_ZONE_FEED_PATTERN env var too inclusive, or missing checksum files. Found {feeds} feeds, in {len(list_dir)} all files in directory. ")
         
         if not feeds:
-            logger.warning(f"0 mathing feeds in dir:{self._directory} with pattern:'{self._file_pattern}'")
+            logger.warning(f"0 matching feeds in dir:{self._directory} with pattern:'{self._file_pattern}'")
         else:
-            logger.debug(f"{len(feeds)} Matching feeds found in dir:{self._directory}, feeds: {list(map(lambda x: x.name, feeds))}")
-        return feeds
+            logger.debug(f"{feeds} Matching feeds found in dir:{self._directory}")
     
     def _process(self, feed: Path):
-        return self._pipeline.run(feed)
\ No newline at end of file
+        with self._controller.slots if self._controller else contextlib.nullcontext():
+            metrics.QUEUE_DEPTH.dec(stage="feeds")
+            with metrics.FEEDS_IN_FLIGHT.track(), self._claimed(feed) as claimed:
+                if claimed:
+                    return self._run(claimed)
+
+    def _run(self, feed: Path):
+        if self._controller is None:
+            return self._pipeline.run(feed)
+        with self._controller.track(feed):
+            return self._pipeline.run(feed)
+
+    @contextlib.contextmanager
+    def _claimed(self, feed: Path) -> Iterator[Path | None]:
+        # claimed when a worker picks the feed up, not when it is queued, so queued feeds stay up for grabs
+        if self._claimer is None:
+            yield feed
+            return
+        claimed: Path = self._claimer.claim(feed)
+        try:
+            yield claimed
+        finally:
+            if claimed:
+                self._claimer.release(claimed)
\ No newline at end of file
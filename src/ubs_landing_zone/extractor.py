@@ -0,0 +1,103 @@
+import os
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loguru import logger
+
+class Extractor:
+    _CHUNK: int = 64 * 1024 * 1024
+
+    def __init__(self, threads: int = 4):
+        self._threads: int = threads
+
+        if threads <= 0:
+            raise ValueError(f"Extract threads must be positive, got: {threads}")
+
+    def extract(self, feed: Path, target_dir: Path, members: list[tarfile.TarInfo] = None) -> None:
+        # members: the header index when the caller has read it already
+        members = self._plain_members(feed, members)
+        if members is None:
+            with tarfile.open(feed, "r") as tar:
+                tar.extractall(target_dir, filter="data")
+            return
+
+        # same safety rules as extractall(filter='data'), applied before a single byte is written
+        filtered: list[tarfile.TarInfo] = [tarfile.data_filter(member, str(target_dir)) for member in members]
+        directories: list[tarfile.TarInfo] = [member for member in filtered if member.isdir()]
+        files: list[tarfile.TarInfo] = [member for member in filtered if member.isreg()]
+
+        for member in directories:
+            (target_dir / member.name).mkdir(parents=True, exist_ok=True)
+        for parent in {(target_dir / member.name).parent for member in files}:
+            parent.mkdir(parents=True, exist_ok=True)
+
+        source: int = os.open(feed, os.O_RDONLY)
+        try:
+            if self._threads == 1 or len(files) < 2:
+                for member in files:
+                    self._copy_member(source, member, target_dir)
+            else:
+                with ThreadPoolExecutor(max_workers=min(self._threads, len(files)), thread_name_prefix="extract") as pool:
+                    # list() re-raises the first failure
+                    list(pool.map(lambda member: self._copy_member(source, member, target_dir), files))
+        finally:
+            os.close(source)
+
+        # like tarfile: directory attributes last, deepest first, so writing files into them does not reset mtime
+        for member in sorted(directories, key=lambda member: member.name, reverse=True):
+            self._set_attributes(target_dir / member.name, member)
+
+    def _plain_members(self, feed: Path, members: list[tarfile.TarInfo] = None) -> list[tarfile.TarInfo] | None:
+        # fast path only for what it can reproduce exactly: uncompressed, regular files and directories, unique names
+        if members is None:
+            try:
+                with tarfile.open(feed, "r:") as tar:
+                    members = tar.getmembers()
+            except tarfile.ReadError:
+                logger.debug(f"Not a plain tar, extracting with tarfile: {feed.name}")
+                return None
+
+        names: set[str] = set()
+        for member in members:
+            if not (member.isreg() or member.isdir()) or member.issparse() or member.name in names:
+                logger.debug(f"Unusual member: {member.name}, extracting with tarfile: {feed.name}")
+                return None
+            names.add(member.name)
+        return members
+
+    def _copy_member(self, source: int, member: tarfile.TarInfo, target_dir: Path) -> None:
+        target: Path = target_dir / member.name
+        destination: int = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            offset: int = member.offset_data
+            remaining: int = member.size
+            while remaining:
+                copied: int = self._copy_range(source, destination, offset, min(remaining, self._CHUNK))
+                if not copied:
+                    raise tarfile.ReadError(f"Unexpected end of data, member: {member.name}")
+                offset += copied
+                remaining -= copied
+        finally:
+            os.close(destination)
+        self._set_attributes(target, member)
+
+    @staticmethod
+    def _copy_range(source: int, destination: int, offset: int, count: int) -> int:
+        # in kernel copy, no Python buffers; copy_file_range may even reflink on btrfs / xfs
+        try:
+            return os.copy_file_range(source, destination, count, offset)
+        except (AttributeError, OSError):
+            pass
+        try:
+            return os.sendfile(destination, source, offset, count)
+        except (AttributeError, OSError):
+            return os.write(destination, os.pread(source, count, offset))
+
+    @staticmethod
+    def _set_attributes(path: Path, member: tarfile.TarInfo) -> None:
+        # owner is never restored, the data filter clears it
+        if member.mode is not None:
+            os.chmod(path, member.mode)
+        if member.mtime is not None:
+            os.utime(path, (member.mtime, member.mtime))
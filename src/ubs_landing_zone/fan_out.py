@@ -0,0 +1,166 @@
+import asyncio
+import contextlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from . import metrics
+from .uploader import UploadError, Uploader
+from loguru import logger
+
+class FanOutPolicy(Enum):
+    # any destination failing fails the feed, the retry uploads it everywhere again
+    ALL = "all"
+    # only the first destination is required, a failing secondary is dropped for the rest of the feed
+    PRIMARY = "primary"
+
+class FanOutUploader(Uploader):
+    def __init__(
+        self,
+        destinations: dict[str, Uploader],
+        policy: FanOutPolicy = FanOutPolicy.ALL,
+        stream_buffer_size: int = 1024 * 1024
+    ):
+        # destination name (used in logs and metric labels) to its uploader, the first one is the primary
+        self._destinations: dict[str, Uploader] = destinations
+        self._policy: FanOutPolicy = FanOutPolicy(policy)
+        self._stream_buffer_size: int = stream_buffer_size
+
+        if not destinations:
+            raise ValueError("At least one destination must be provided.")
+        if stream_buffer_size <= 0:
+            raise ValueError(f"Stream buffer size must be positive, got: {stream_buffer_size}")
+
+    def for_feed(self, feed: Path) -> "FeedFanOut":
+        return FeedFanOut(self._destinations, self._policy, self._stream_buffer_size, feed)
+
+    def upload(self, file: Path) -> None:
+        self.for_feed(None).upload(file)
+
+    async def upload_async(self, file: Path) -> None:
+        await self.for_feed(None).upload_async(file)
+
+    def upload_batch(self, files: list[Path]) -> None:
+        self.for_feed(None).upload_batch(files)
+
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        self.for_feed(None).upload_stream(stream, blob_name)
+
+class FeedFanOut(Uploader):
+    def __init__(
+        self,
+        destinations: dict[str, Uploader],
+        policy: FanOutPolicy,
+        stream_buffer_size: int,
+        feed: Path = None
+    ):
+        self._destinations: dict[str, Uploader] = destinations
+        self._policy: FanOutPolicy = policy
+        self._stream_buffer_size: int = stream_buffer_size
+        self._feed_name: str = feed.name if feed else "-"
+        self._primary: str = next(iter(destinations))
+        # secondaries that missed a file of this feed: never sent its control file
+        self._dropped: set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    def upload(self, file: Path) -> None:
+        self._fan_out(lambda uploader: uploader.upload(file), file.name)
+
+    def upload_batch(self, files: list[Path]) -> None:
+        self._fan_out(lambda uploader: uploader.upload_batch(files), str([file.name for file in files]))
+
+    async def upload_async(self, file: Path) -> None:
+        destinations: list[str] = self._active()
+        results: list = await asyncio.gather(
+            *(self._destinations[destination].upload_async(file) for destination in destinations),
+            return_exceptions=True
+        )
+        self._settle(
+            {destination: result if isinstance(result, BaseException) else None for destination, result in zip(destinations, results)},
+            file.name
+        )
+
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        destinations: list[str] = self._active()
+        if len(destinations) == 1:
+            self._fan_out(lambda uploader: uploader.upload_stream(stream, blob_name), blob_name)
+            return
+
+        # the member is read once, every chunk is teed into one pipe per destination
+        readers: dict[str, BinaryIO] = {}
+        writers: dict[str, BinaryIO] = {}
+        for destination in destinations:
+            read_fd, write_fd = os.pipe()
+            readers[destination] = os.fdopen(read_fd, "rb")
+            writers[destination] = os.fdopen(write_fd, "wb")
+
+        with ThreadPoolExecutor(max_workers=len(destinations), thread_name_prefix="fan-out") as pool:
+            futures = {
+                destination: pool.submit(self._consume, self._destinations[destination], readers[destination], blob_name)
+                for destination in destinations
+            }
+            try:
+                while writers and (chunk := stream.read(self._stream_buffer_size)):
+                    for destination, writer in list(writers.items()):
+                        try:
+                            writer.write(chunk)
+                        except OSError:
+                            # the destination stopped reading, its upload result tells why
+                            del writers[destination]
+                            self._close(writer)
+            finally:
+                for writer in writers.values():
+                    self._close(writer)
+
+        self._settle({destination: future.exception() for destination, future in futures.items()}, blob_name)
+
+    def _fan_out(self, upload: Callable[[Uploader], None], item: str) -> None:
+        destinations: list[str] = self._active()
+        with ThreadPoolExecutor(max_workers=len(destinations), thread_name_prefix="fan-out") as pool:
+            futures = {destination: pool.submit(upload, self._destinations[destination]) for destination in destinations}
+        self._settle({destination: future.exception() for destination, future in futures.items()}, item)
+
+    def _active(self) -> list[str]:
+        with self._lock:
+            return [destination for destination in self._destinations if destination not in self._dropped]
+
+    def _settle(self, errors: dict[str, BaseException | None], item: str) -> None:
+        failed: dict[str, BaseException] = {}
+        for destination, error in errors.items():
+            metrics.DESTINATION_UPLOADS.inc(destination=destination, result="failed" if error else "ok")
+            if error:
+                failed[destination] = error
+        if not failed:
+            return
+
+        if self._policy == FanOutPolicy.ALL or self._primary in failed:
+            msg: str = f"Upload failed for {item} to {len(failed)} of {len(errors)} destination(s): " + " | ".join(
+                f"{destination}: {error}" for destination, error in failed.items()
+            )
+            # worth another attempt only if every destination failed transiently
+            retryable: bool = all(getattr(error, "retryable", False) for error in failed.values())
+            raise UploadError(msg, retryable=retryable) from next(iter(failed.values()))
+
+        with self._lock:
+            # uploads still in flight to a dropped destination may fail as well, it is dropped once
+            dropped: dict[str, BaseException] = {d: e for d, e in failed.items() if d not in self._dropped}
+            self._dropped.update(dropped)
+        for destination, error in dropped.items():
+            logger.error(
+                f"Upload failed for {item} to secondary destination: {destination}, "
+                f"dropped for the rest of feed: {self._feed_name}, its control file is not sent there, error: {error}"
+            )
+            metrics.DESTINATION_FEEDS_DROPPED.inc(destination=destination)
+
+    @staticmethod
+    def _consume(uploader: Uploader, reader: BinaryIO, blob_name: str) -> None:
+        with reader:
+            uploader.upload_stream(reader, blob_name)
+
+    @staticmethod
+    def _close(writer: BinaryIO) -> None:
+        with contextlib.suppress(OSError):
+            writer.close()
@@ -0,0 +1,52 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+class UploadJournal:
+    def __init__(self, path: Path):
+        self._path: Path = path
+        self._lock: threading.Lock = threading.Lock()
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # autocommit: every recorded member is durable as soon as record() returns
+            self._connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS uploaded_members ("
+                "feed_digest TEXT NOT NULL, "
+                "member TEXT NOT NULL, "
+                "uploaded_at REAL NOT NULL, "
+                "PRIMARY KEY (feed_digest, member)"
+                ") WITHOUT ROWID"
+            )
+        except Exception as e:
+            msg: str = f"Upload journal cannot be opened: {path}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+    def uploaded(self, feed_digest: str) -> set[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT member FROM uploaded_members WHERE feed_digest = ?",
+                (feed_digest,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, feed_digest: str, member: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO uploaded_members (feed_digest, member, uploaded_at) VALUES (?, ?, ?)",
+                (feed_digest, member, time.time())
+            )
+
+    def forget(self, feed_digest: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM uploaded_members WHERE feed_digest = ?", (feed_digest,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,205 @@
+import bisect
+import contextlib
+import functools
+import inspect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+from loguru import logger
+
+# Prometheus text exposition, no client library needed: a lock and a dict per metric keep the hot path cheap
+class _Metric:
+    type: str = None
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.labels: tuple[str, ...] = labels
+        self._lock: threading.Lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _series(self, key: tuple, extra: str = None) -> str:
+        pairs: list[str] = [f'{label}="{value}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return f"{{{','.join(pairs)}}}" if pairs else ""
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values: dict[tuple, object] = dict(self._values)
+        lines: list[str] = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(values.items()):
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: tuple, value: float) -> list[str]:
+        return [f"{self.name}{self._series(key)} {value:g}"]
+
+class Counter(_Metric):
+    type: str = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key: tuple = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(Counter):
+    type: str = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key: tuple = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextlib.contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(_Metric):
+    type: str = "histogram"
+    DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key: tuple = self._key(labels)
+        index: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # per bucket counts, [+Inf], sum
+            counts: list[float] = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, **labels: str) -> int:
+        counts: list[float] = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key: tuple, value: list[float]) -> list[str]:
+        lines: list[str] = []
+        cumulative: int = 0
+        for bound, count in zip((*self.buckets, "+Inf"), value[:-1]):
+            cumulative += count
+            le: str = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{self._series(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._series(key)} {value[-1]:g}")
+        lines.append(f"{self.name}_count{self._series(key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        # node_exporter may read the file at any time, never let it see a half written one
+        tmp: Path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(self.render())
+            tmp.replace(path)
+            logger.debug(f"Metrics written to: {path}")
+        except Exception as e:
+            msg: str = f"Metrics textfile cannot be written: {path}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        registry: Registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body: bytes = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        logger.info(f"Metrics served on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+REGISTRY: Registry = Registry()
+
+STAGE_SECONDS: Histogram = REGISTRY.histogram("ubs_landing_zone_stage_seconds", "Time spent per pipeline stage", ("stage",))
+FEED_SECONDS: Histogram = REGISTRY.histogram("ubs_landing_zone_feed_seconds", "End to end processing time of a successful feed")
+FEEDS: Counter = REGISTRY.counter("ubs_landing_zone_feeds_total", "Feeds processed by result", ("result",))
+FILES_UPLOADED: Counter = REGISTRY.counter("ubs_landing_zone_uploaded_files_total", "Files uploaded")
+BYTES_UPLOADED: Counter = REGISTRY.counter("ubs_landing_zone_uploaded_bytes_total", "Bytes uploaded")
+QUEUE_DEPTH: Gauge = REGISTRY.gauge("ubs_landing_zone_queue_depth", "Feeds waiting for a worker", ("stage",))
+FEEDS_IN_FLIGHT: Gauge = REGISTRY.gauge("ubs_landing_zone_feeds_in_flight", "Feeds being processed")
+AZCOPY_PROCESSES: Gauge = REGISTRY.gauge("ubs_landing_zone_azcopy_processes", "Running azcopy processes")
+DESTINATION_UPLOADS: Counter = REGISTRY.counter("ubs_landing_zone_destination_uploads_total", "Uploads per destination by result", ("destination", "result"))
+DESTINATION_FEEDS_DROPPED: Counter = REGISTRY.counter("ubs_landing_zone_destination_feeds_dropped_total", "Feeds not delivered to a secondary destination", ("destination",))
+PARALLELISM_LIMIT: Gauge = REGISTRY.gauge("ubs_landing_zone_parallelism_limit", "Feeds allowed in flight by the adaptive controller")
+PARALLELISM_DECISIONS: Counter = REGISTRY.counter("ubs_landing_zone_parallelism_decisions_total", "Adaptive parallelism decisions", ("decision",))
+ADMITTED_BYTES: Gauge = REGISTRY.gauge("ubs_landing_zone_admitted_bytes", "Declared bytes of the feeds admitted by budget", ("budget",))
+ADMISSION_WAITING: Gauge = REGISTRY.gauge("ubs_landing_zone_admission_waiting", "Feeds waiting for disk or memory budget")
+UPLOAD_RETRIES: Counter = REGISTRY.counter("ubs_landing_zone_upload_retries_total", "File upload retries by outcome", ("outcome",))
+UPLOAD_RETRY_SECONDS: Counter = REGISTRY.counter("ubs_landing_zone_upload_retry_seconds_total", "Seconds spent backing off before upload retries")
+CHECKSUM_CACHE: Counter = REGISTRY.counter("ubs_landing_zone_checksum_cache_total", "Feed digest lookups in the checksum cache by result", ("result",))
+FEED_CLAIMS: Counter = REGISTRY.counter("ubs_landing_zone_feed_claims_total", "Feed claims on the shared landing dir by result", ("result",))
+
+def timed(stage: str) -> Callable:
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with STAGE_SECONDS.time(stage=stage):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
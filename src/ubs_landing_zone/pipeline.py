@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import os
 import shutil
 import tarfile
@@ -7,123 +9,508 @@ import hashlib
 import time
 import tempfile
 import subprocess
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import Awaitable, Callable, Iterator, TypeVar
 
-from .az_copy import AzCopy
+from . import metrics
+from .admission import AdmissionControl
+from .checksums import ChecksumCache, normalize_algorithm, parse_checksum
+from .compression import Decompressor, checksum_file, feed_compression, feed_stem
+from .digest_index import DigestIndex, DuplicatePolicy
+from .extractor import Extractor
+from .fan_out import FanOutUploader
+from .journal import UploadJournal
+from .profiling import FeedProfiler
+from .retry import RetryPolicy
+from .uploader import Uploader
+from .validator import FeedIndex, FeedValidator, check_blob_names
 from loguru import logger
 
+T = TypeVar("T")
+
 class Pipeline:
     def __init__(
         self, 
-        az_copy: AzCopy,
+        uploader: Uploader,
         checksum_extension: str, 
         algorithm: str, 
         failed_dir: Path,
         processing_dir: Path,
-        preserve_source_feeds: bool = False
+        preserve_source_feeds: bool = False,
+        checksum_buffer_size: int = 1024 * 1024,
+        single_pass: bool = False,
+        streaming_upload: bool = False,
+        batch_upload: bool = False,
+        upload_concurrency: int = 1,
+        journal: UploadJournal = None,
+        digest_index: DigestIndex = None,
+        duplicate_policy: DuplicatePolicy = DuplicatePolicy.LOG,
+        duplicates_dir: Path = None,
+        profiler: FeedProfiler = None,
+        extractor: Extractor = None,
+        decompressor: Decompressor = None,
+        validator: FeedValidator = None,
+        admission: AdmissionControl = None,
+        retry: RetryPolicy = None,
+        checksum_cache: ChecksumCache = None
     ):
-        self._az_copy: AzCopy = az_copy
+        self._uploader: Uploader = uploader
         self._checksum_extension: str = checksum_extension
-        self._algorithm: str = algorithm
+        self._algorithm: str = normalize_algorithm(algorithm)
         self._failed_dir: Path = failed_dir
         self._processing_dir: Path = processing_dir
         self._preserve_source_feeds: bool = preserve_source_feeds
+        self._checksum_buffer_size: int = checksum_buffer_size
+        self._single_pass: bool = single_pass
+        self._streaming_upload: bool = streaming_upload
+        self._batch_upload: bool = batch_upload
+        self._upload_concurrency: int = upload_concurrency
+        self._journal: UploadJournal = journal
+        self._digest_index: DigestIndex = digest_index
+        self._duplicate_policy: DuplicatePolicy = DuplicatePolicy(duplicate_policy)
+        self._duplicates_dir: Path = duplicates_dir
+        self._profiler: FeedProfiler = profiler
+        self._extractor: Extractor = extractor
+        self._decompressor: Decompressor = decompressor or Decompressor()
+        self._validator: FeedValidator = validator
+        self._admission: AdmissionControl = admission
+        self._retry: RetryPolicy = retry
+        self._checksum_cache: ChecksumCache = checksum_cache
+        # member index per feed in flight, read once up front and reused by every later stage
+        self._indexes: dict[Path, FeedIndex] = {}
+        self._indexes_lock: threading.Lock = threading.Lock()
+        
+        if self._checksum_buffer_size <= 0:
+            raise ValueError(f"Checksum buffer size must be positive, got: {checksum_buffer_size}")
+        if self._upload_concurrency <= 0:
+            raise ValueError(f"Upload concurrency must be positive, got: {upload_concurrency}")
+        if self._duplicate_policy == DuplicatePolicy.MOVE and not self._duplicates_dir:
+            raise ValueError("Duplicates directory must be provided for the 'move' duplicate policy.")
 
     def run(self, feed: Path) -> None:
+        if self._profiler is None:
+            self._run(feed)
+            return
+        with self._profiler.profile(feed):
+            self._run(feed)
+
+    def _run(self, feed: Path) -> None:
         start_time = time.time()
         unpacked_dir: Path = None
         
         try:
-            logger.debug(f"Processing feed: {feed.name}")
-            self._verify_checksum(feed)
-            unpacked_dir = self._unpack(feed)
+            if not self.verify(feed):
+                return
+            self.admit(feed)
+            unpacked_dir = self.prepare(feed)
+            self.publish(feed, unpacked_dir)
+        except Exception:
+            self.fail(feed, unpacked_dir)
+            raise
+        
+        self.complete(feed, unpacked_dir, start_time)
+
+    # the stages below are also driven one by one by the StagedExecutor, each from its own worker pool
+    def verify(self, feed: Path, digest_executor: Executor = None) -> bool:
+        logger.debug(f"Processing feed: {feed.name}")
+        feed_digest: str = self._feed_digest(feed)
+        if self._digest_index and feed_digest and self._digest_index.contains(feed_digest):
+            self._handle_duplicate(feed, feed_digest)
+            metrics.FEEDS.inc(result="duplicate")
+            return False
+        
+        # fail fast on the headers alone, before the feed is hashed or extracted
+        self._index(feed)
+        # single pass verifies while unpacking, a plain tar streamed from the archive is never unpacked
+        if not self._single_pass or (self._streaming_upload and not feed_compression(feed)):
+            self._verify_checksum(feed, digest_executor)
+        return True
+
+    @metrics.timed("admit")
+    def admit(self, feed: Path) -> None:
+        if self._admission is None:
+            return
+        index: FeedIndex = self._index(feed)
+        try:
+            size: int = index.size if index else self._admission.declared_size(feed)
+        except (tarfile.TarError, OSError) as e:
+            # the unpack stage reports a corrupted archive
+            logger.warning(f"Cannot read the declared size of feed: {feed.name}, admitted as empty, error: {e}")
+            size = 0
+        # streamed straight from the archive: nothing is staged in the processing dir
+        self._admission.admit(feed, size, staged=not self._streaming_upload or bool(feed_compression(feed)))
+
+    def release(self, feed: Path) -> None:
+        # everything held for a feed in flight, whether it completed, failed or was cancelled before its next stage
+        self._forget_index(feed)
+        if self._admission:
+            self._admission.release(feed)
+
+    def prepare(self, feed: Path) -> Path | None:
+        if self._streaming_upload and not feed_compression(feed):
+            return None
+        
+        if self._single_pass:
+            unpacked_dir: Path = self._verify_and_unpack(feed)
+        else:
+            unpacked_dir: Path = self._unpack(feed)
+        
+        try:
             self._verify_feed_content(unpacked_dir, feed)
+        except Exception:
+            self._delete_path(unpacked_dir)
+            raise
+        return unpacked_dir
+
+    def publish(self, feed: Path, unpacked_dir: Path | None) -> None:
+        feed_digest: str = self._feed_digest(feed)
+        uploader: Uploader = self._feed_uploader(feed)
+        
+        if unpacked_dir is None:
+            self._upload_from_archive(feed, feed_digest, uploader)
+        else:
             ordered_feed_content: list[Path] = self._order_feed_content(unpacked_dir, feed)
-            self._upload(ordered_feed_content, feed)
-                
-        except Exception:            
-            if not self._preserve_source_feeds: 
-                logger.debug(f"Moving feed and checksum to failed directory, feed: {feed.name}, failed_dir: {self._failed_dir}")
+            self._upload(ordered_feed_content, feed, feed_digest, uploader)
 
-                if feed and feed.exists():
-                    self._failed_dir.mkdir(parents=True, exist_ok=True)
-                    feed.rename(self._failed_dir / feed.name)
-            
-                md5_file = feed.with_suffix(self._checksum_extension)
-                if md5_file and md5_file.exists():
-                    md5_file.rename(self._failed_dir / md5_file.name)
-                
-            if unpacked_dir and unpacked_dir.exists():
-                self._delete_path(unpacked_dir)
+    async def publish_async(self, feed: Path, unpacked_dir: Path | None, upload_slots: asyncio.Semaphore = None) -> None:
+        if unpacked_dir is None or self._batch_upload:
+            # archive streaming and batch jobs are single blocking calls per feed
+            await asyncio.to_thread(self.publish, feed, unpacked_dir)
+            return
+        
+        feed_digest: str = await asyncio.to_thread(self._feed_digest, feed)
+        ordered_feed_content: list[Path] = await asyncio.to_thread(self._order_feed_content, unpacked_dir, feed)
+        await self._upload_async(ordered_feed_content, feed, feed_digest, upload_slots, self._feed_uploader(feed))
+
+    @metrics.timed("upload")
+    async def _upload_async(
+        self, 
+        ordered_feed_content: list[Path], 
+        feed: Path, 
+        feed_digest: str = None, 
+        upload_slots: asyncio.Semaphore = None,
+        uploader: Uploader = None
+    ) -> None:
+        uploader = uploader or self._uploader
+        if feed_digest and self._journal:
+            uploaded: set[str] = await asyncio.to_thread(self._journal.uploaded, feed_digest)
+            if uploaded:
+                logger.info(f"Resuming feed: {feed.name}, skipping {len(uploaded)} file(s) already uploaded")
+                ordered_feed_content = [file for file in ordered_feed_content if file.name not in uploaded]
+        
+        feed_slots: asyncio.Semaphore = asyncio.Semaphore(self._upload_concurrency)
+        tasks: list[asyncio.Task] = [
+            asyncio.create_task(self._upload_file_async(file, feed, uploader, feed_digest, feed_slots, upload_slots))
+            for file in ordered_feed_content[:-1]
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            # the caller deletes the unpacked dir next, no cancelled upload may still be reading from it
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.error(f"Data file upload failed in feed: {feed.name}, control file not sent")
             raise
         
+        # barrier: every data file has to be uploaded before the control file is sent
+        for file in ordered_feed_content[-1:]:
+            await self._upload_file_async(file, feed, uploader, feed_digest, feed_slots, upload_slots)
+
+    async def _upload_file_async(
+        self, 
+        file: Path, 
+        feed: Path, 
+        uploader: Uploader,
+        feed_digest: str, 
+        feed_slots: asyncio.Semaphore, 
+        upload_slots: asyncio.Semaphore = None
+    ) -> None:
+        async with feed_slots, upload_slots or contextlib.nullcontext():
+            try:
+                await self._retried_async(lambda: uploader.upload_async(file.absolute()), file.name)
+                logger.debug(f"Upload succeeded for {file} from feed {feed.name}")
+                self._count_uploaded([file])
+            except Exception as e:
+                msg: str = f"Upload failed for {file}, in feed: {feed}, underlying error: {e}"
+                logger.error(msg)
+                raise IOError(msg) from e
+        
+        if feed_digest and self._journal:
+            await asyncio.to_thread(self._journal.record, feed_digest, file.name)
+
+    def fail(self, feed: Path, unpacked_dir: Path | None) -> None:
+        metrics.FEEDS.inc(result="failed")
+        self.release(feed)
+        if not self._preserve_source_feeds: 
+            logger.debug(f"Moving feed and checksum to failed directory, feed: {feed.name}, failed_dir: {self._failed_dir}")
+
+            if feed and feed.exists():
+                self._failed_dir.mkdir(parents=True, exist_ok=True)
+                feed.rename(self._failed_dir / feed.name)
+        
+            md5_file = checksum_file(feed, self._checksum_extension)
+            if md5_file and md5_file.exists():
+                md5_file.rename(self._failed_dir / md5_file.name)
+            
+        if unpacked_dir and unpacked_dir.exists():
+            self._delete_path(unpacked_dir)
+
+    def complete(self, feed: Path, unpacked_dir: Path | None, start_time: float) -> None:
+        self.release(feed)
+        feed_digest: str = self._feed_digest(feed)
+        if feed_digest and self._digest_index:
+            self._digest_index.add(feed_digest)
+        if feed_digest and self._journal:
+            self._journal.forget(feed_digest)
+        
         processing_time = time.time() - start_time
+        metrics.FEEDS.inc(result="ok")
+        metrics.FEED_SECONDS.observe(processing_time)
         logger.info(f"Successfully proceeded feed: {feed.name} in {processing_time:.1f}s, deleting local copy")
         
         try:
             logger.debug(f"Deleting started...")
             
             if not self._preserve_source_feeds:
+                self._forget_checksum(feed)
                 self._delete_path(feed)
-                self._delete_path(feed.with_suffix(self._checksum_extension))
+                self._delete_path(checksum_file(feed, self._checksum_extension))
             
-            self._delete_path(unpacked_dir)
+            if unpacked_dir:
+                self._delete_path(unpacked_dir)
         
         except Exception as e:
             msg: str = f"Error deleting local files for feed: {feed.name}"
             logger.error(f"{msg}, error: {e}")
             raise IOError(msg) from e
 
-    def _verify_checksum(self, feed: Path) -> None:
+    def _feed_uploader(self, feed: Path) -> Uploader:
+        # a fan-out keeps track, per feed, of the secondary destinations it had to drop
+        if isinstance(self._uploader, FanOutUploader):
+            return self._uploader.for_feed(feed)
+        return self._uploader
+
+    def _index(self, feed: Path) -> FeedIndex | None:
+        with self._indexes_lock:
+            index: FeedIndex = self._indexes.get(feed)
+        # compressed feeds have no cheap header pass, their members are validated while streaming
+        if index is not None or self._validator is None or feed_compression(feed):
+            return index
+        
+        index = self._validator.validate(feed)
+        with self._indexes_lock:
+            self._indexes[feed] = index
+        return index
+
+    def _forget_index(self, feed: Path) -> None:
+        with self._indexes_lock:
+            self._indexes.pop(feed, None)
+
+    def _validated_members(self, feed: Path, tar: tarfile.TarFile) -> Iterator[tarfile.TarInfo]:
+        # stream mode: each header is checked before its member is extracted
+        index: FeedIndex = FeedIndex(feed)
+        for member in tar:
+            self._validator.add(index, member)
+            yield member
+        self._validator.finish(index)
+        with self._indexes_lock:
+            self._indexes[feed] = index
+
+    def _stream_members(self, feed: Path, tar: tarfile.TarFile) -> Iterator[tarfile.TarInfo] | None:
+        if self._validator is None or self._index(feed) is not None:
+            return None
+        return self._validated_members(feed, tar)
+
+    def _new_unpack_dir(self, feed: Path, suffix: str = "") -> Path:
+        # unique even for feeds unpacked in the same microsecond
+        self._processing_dir.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=f"{feed_stem(feed.name)}.{datetime.now().isoformat()}.", suffix=suffix, dir=self._processing_dir))
+
+    def _feed_digest(self, feed: Path) -> str | None:
+        # the sidecar digest identifies the feed content, whatever the tar is called on this delivery
+        sidecar: Path = checksum_file(feed, self._checksum_extension)
+        if not (self._journal or self._digest_index) or not sidecar.exists():
+            return None
+        return f"{self._algorithm}:{parse_checksum(sidecar.read_text())[0]}"
+
+    def _handle_duplicate(self, feed: Path, feed_digest: str) -> None:
+        sidecar: Path = checksum_file(feed, self._checksum_extension)
+        logger.warning(f"Duplicate feed: {feed.name}, digest {feed_digest} already ingested, policy: {self._duplicate_policy.value}")
+        
+        if self._preserve_source_feeds or self._duplicate_policy == DuplicatePolicy.LOG:
+            return
+        
+        if self._duplicate_policy == DuplicatePolicy.MOVE:
+            self._duplicates_dir.mkdir(parents=True, exist_ok=True)
+            for path in (feed, sidecar):
+                if path.exists():
+                    path.rename(self._duplicates_dir / path.name)
+            logger.debug(f"Duplicate feed moved to: {self._duplicates_dir}, feed: {feed.name}")
+        else:
+            self._forget_checksum(feed)
+            self._delete_path(feed)
+            self._delete_path(sidecar)
+
+    @metrics.timed("verify_checksum")
+    def _verify_checksum(self, feed: Path, digest_executor: Executor = None) -> None:
         logger.debug(f"Verifying checksum, feed: {feed.name}")
-        expected_checksum_file: Path = feed.with_suffix(self._checksum_extension)
-        expected_checksum: str
+        expected_checksum: str = self._read_expected_checksum(feed)
+        
+        if expected_checksum is None:
+            return
+
+        # a retried feed keeps its inode, size and mtime: no need to hash it again
+        stat: os.stat_result = feed.stat() if self._checksum_cache else None
+        calculated_checksum: str = self._checksum_cache.get(stat, self._algorithm) if self._checksum_cache else None
+        if calculated_checksum:
+            logger.debug(f"Checksum taken from the cache, feed: {feed.name}")
+        else:
+            if digest_executor is None:
+                calculated_checksum = file_digest(feed, self._algorithm, self._checksum_buffer_size)
+            else:
+                # e.g. a process pool, hashing is CPU bound and holds the GIL between reads
+                calculated_checksum = digest_executor.submit(file_digest, feed, self._algorithm, self._checksum_buffer_size).result()
+            if self._checksum_cache:
+                self._checksum_cache.put(feed, stat, self._algorithm, calculated_checksum)
+                
+        self._compare_checksum(feed, expected_checksum, calculated_checksum)
+        
+    def _read_expected_checksum(self, feed: Path) -> str | None:
+        expected_checksum_file: Path = checksum_file(feed, self._checksum_extension)
         
         if not expected_checksum_file.exists():
             msg: str = f"Checksum file does not exist for feed, skipping feed. Feed: {feed.name}, expected: {expected_checksum_file}"
             logger.warning(msg)
-            return
+            return None
         
         try:
             with open(expected_checksum_file, 'r') as f:
-                expected_checksum = f.read().strip()
+                expected_checksum, name = parse_checksum(f.read())
         except Exception as e:
             msg: str =  f"Checksum file cannot be open: {expected_checksum_file}"
             logger.error(f"{msg}, error: {e}")
             raise IOError(msg) from e
+        
+        if name and Path(name).name != feed.name:
+            logger.warning(f"Checksum file names another file: {name}, checked against feed: {feed.name}")
+        return expected_checksum
 
+    @staticmethod
+    def _compare_checksum(feed: Path, expected_checksum: str, calculated_checksum: str) -> None:
+        if calculated_checksum != expected_checksum:
+            msg = f"Checksum doesn't match, feed: {feed}, expected: '{expected_checksum}', calculated: '{calculated_checksum.strip()}'"
+            logger.error(msg)
+            raise ValueError(msg) 
+            
+        logger.debug(f"Checksum match for feed: {feed}")
+        
+    @metrics.timed("verify_and_unpack")
+    def _verify_and_unpack(self, feed: Path) -> Path:
+        logger.debug(f"Verifying checksum and unpacking feed in a single pass: {feed.name}")
+        expected_checksum: str = self._read_expected_checksum(feed)
+        stat: os.stat_result = feed.stat() if self._checksum_cache else None
+        if expected_checksum is not None and self._checksum_cache and self._checksum_cache.get(stat, self._algorithm) == expected_checksum:
+            # verified before, e.g. a retried feed: nothing left to hash
+            logger.debug(f"Checksum taken from the cache, feed: {feed.name}")
+            return self._unpack(feed)
+        
+        staging_dir: Path = None
         h = hashlib.new(self._algorithm)
+        extract_error: Exception = None
+        
         with open(feed, 'rb') as f:
-            h.update(f.read())
-            if h.hexdigest() != expected_checksum:
-                msg = f"Checksum doesn't match, feed: {feed}, expected: '{expected_checksum}', calculated: '{h.hexdigest().strip()}'"
-                logger.error(msg)
-                raise ValueError(msg) 
+            reader: _HashingReader = _HashingReader(f, h)
+            try:
+                with (
+                    self._decompressor.open(feed, reader) as stream,
+                    tarfile.open(fileobj=stream, mode="r|", bufsize=self._checksum_buffer_size) as tar
+                ):
+                    staging_dir = self._new_unpack_dir(feed, suffix=".staging")
+                    logger.debug(f"Extracting {feed.name} to staging dir {staging_dir}")
+                    tar.extractall(staging_dir, members=self._stream_members(feed, tar), filter='data')
+            except Exception as e:
+                extract_error = e
             
-        logger.debug(f"Checksum match for feed: {feed}")
+            # tar reader stops at the end-of-archive marker, the digest has to cover the whole file
+            while reader.read(self._checksum_buffer_size):
+                pass
+            
+        if self._checksum_cache:
+            self._checksum_cache.put(feed, stat, self._algorithm, h.hexdigest())
+        try:
+            if expected_checksum is not None:
+                self._compare_checksum(feed, expected_checksum, h.hexdigest())
+            
+            if isinstance(extract_error, ValueError):
+                # structural validation of a streamed member, not a damaged archive
+                raise extract_error
+            if extract_error:
+                msg: str = f"Corrupted archive (feed), cannot extract {feed.name} to processing dir: {self._processing_dir}"
+                logger.error(f"{msg}, error: {extract_error}")
+                raise IOError(msg) from extract_error
+        except Exception:
+            if staging_dir and staging_dir.exists():
+                self._delete_path(staging_dir)
+            raise
+        
+        # commit: only a verified feed becomes visible under the final unpacked dir
+        temp_dir: Path = staging_dir.with_name(staging_dir.name.removesuffix(".staging"))
+        staging_dir.rename(temp_dir)
+        return temp_dir
         
+    @metrics.timed("unpack")
     def _unpack(self, feed: Path) -> Path:
         logger.debug(f"Unpacking feed: {feed.name}")
 
-        temp_dir: Path = (self._processing_dir / datetime.now().isoformat())
+        temp_dir: Path = None
         
         try: 
+            if feed_compression(feed):
+                # streamed through the decoder, compressed archives have no random access
+                with (
+                    open(feed, 'rb') as f,
+                    self._decompressor.open(feed, f) as stream,
+                    tarfile.open(fileobj=stream, mode="r|", bufsize=self._checksum_buffer_size) as tar
+                ):
+                    temp_dir = self._new_unpack_dir(feed)
+                    logger.debug(f"Extracting {feed.name} to {temp_dir}")
+                    tar.extractall(temp_dir, members=self._stream_members(feed, tar), filter='data')
+                return temp_dir
+            
+            index: FeedIndex = self._index(feed)
             with tarfile.open(feed, "r") as tar:
                 
-                temp_dir.mkdir(parents=True, exist_ok=True)
+                temp_dir = self._new_unpack_dir(feed)
                 logger.debug(f"Extracting {feed.name} to {temp_dir}")
-                tar.extractall(temp_dir, filter='data')
+                if self._extractor:
+                    self._extractor.extract(feed, temp_dir, index.members if index else None)
+                else:
+                    tar.extractall(temp_dir, members=index.members if index else None, filter='data')
 
-                return Path(temp_dir)
+                return temp_dir
+        except ValueError:
+            # structural validation of a streamed member, not a damaged archive
+            if temp_dir:
+                self._delete_path(temp_dir)
+            raise
         except Exception as e:
-            msg: str = f"Corrupted archive (feed), cannot extract {feed.name} to processing dir: {temp_dir}"
+            if temp_dir:
+                self._delete_path(temp_dir)
+            msg: str = f"Corrupted archive (feed), cannot extract {feed.name} to processing dir: {temp_dir or self._processing_dir}"
             logger.error(f"{msg}, error: {e}")
             raise IOError(msg) from e
     
+    @metrics.timed("verify_feed_content")
     def _verify_feed_content(self, unpacked_dir: Path, feed: Path) -> None:
         control_file_ext: str = ".control"
         logger.debug(f"Verifying feed content, feed: {feed}, unpacked in: {unpacked_dir}")
+        if self._index(feed) is not None:
+            # checked on the headers already
+            return
         
-        matching_file: str = next((f for f in os.listdir(unpacked_dir) if f.endswith(control_file_ext)), None)
+        matching_file: str = next((f for f in os.listdir(unpacked_dir) if f.endswith(control_file_ext) and not f.startswith('._')), None)
 
         if matching_file:
             logger.debug(f"Control file '{matching_file}' found if feed: {feed}, unpacked to: {unpacked_dir}.")
@@ -133,17 +520,22 @@ class Pipeline:
         logger.error(msg)
         raise ValueError(msg)
     
+    @metrics.timed("order_feed_content")
     def _order_feed_content(self, unpacked_dir: Path, feed: Path) -> list[Path]:
         logger.debug(f"Ordering feed content, feed: {feed}, unpacked in: {unpacked_dir}")
-        file_list: list[str] = os.listdir(unpacked_dir)
-        for i, e in enumerate(file_list):
+        index: FeedIndex = self._index(feed)
+        if index is not None:
+            return [unpacked_dir / name for _, name in index.files]
+        
+        # AppleDouble files go first, './._x.control' must not be taken for the control file
+        filtered_list: list[str] = list(filter(lambda x: not os.path.basename(x).startswith('._'), self._list_files(unpacked_dir)))
+        check_blob_names(feed, filtered_list)
+        for i, e in enumerate(filtered_list):
             if e.endswith(".control"):
-                tmp = file_list[-1]
-                file_list[-1] = file_list[i]
-                file_list[i] = tmp
+                tmp = filtered_list[-1]
+                filtered_list[-1] = filtered_list[i]
+                filtered_list[i] = tmp
                 break
-
-        filtered_list = list(filter(lambda x: not x.startswith('._'), file_list))
         
         if not filtered_list or not filtered_list[-1].endswith(".control"):
             msg: str = f"Last file is not a *.control file in {unpacked_dir} for feed {feed}."
@@ -152,17 +544,181 @@ class Pipeline:
         
         return [unpacked_dir / f for f in filtered_list]
 
-    def _upload(self, ordered_feed_content: list[Path], feed: Path) -> None:
+    def _list_files(self, directory: Path) -> list[str]:
+        # relative paths of every file, nested dirs included
+        files: list[str] = []
+        for name in os.listdir(directory):
+            if os.path.isdir(directory / name):
+                files.extend(os.path.join(name, f) for f in self._list_files(directory / name))
+            else:
+                files.append(name)
+        return files
+
+    @metrics.timed("upload")
+    def _upload(self, ordered_feed_content: list[Path], feed: Path, feed_digest: str = None, uploader: Uploader = None) -> None:
+        uploader = uploader or self._uploader
+        if feed_digest and self._journal:
+            uploaded: set[str] = self._journal.uploaded(feed_digest)
+            if uploaded:
+                logger.info(f"Resuming feed: {feed.name}, skipping {len(uploaded)} file(s) already uploaded")
+                ordered_feed_content = [file for file in ordered_feed_content if file.name not in uploaded]
+        
+        if self._batch_upload:
+            self._upload_batch(ordered_feed_content, feed, uploader, feed_digest)
+            return
+        
+        if self._upload_concurrency > 1:
+            self._upload_concurrently(ordered_feed_content, feed, uploader, feed_digest)
+            return
+        
         for file in ordered_feed_content:
+            self._upload_file(file, feed, uploader, feed_digest)
+
+    def _upload_file(self, file: Path, feed: Path, uploader: Uploader, feed_digest: str = None) -> None:
+        try:
+            self._retried(lambda: uploader.upload(file.absolute()), file.name)
+            logger.debug(f"Upload succeeded for {file} from feed {feed.name}")
+            self._count_uploaded([file])
+            if feed_digest and self._journal:
+                self._journal.record(feed_digest, file.name)
+        except Exception as e:
+            msg: str = f"Upload failed for {file}, in feed: {feed}, underlying error: {e}"
+            logger.error(msg)
+            raise IOError(msg) from e
+
+    def _upload_concurrently(self, ordered_feed_content: list[Path], feed: Path, uploader: Uploader, feed_digest: str = None) -> None:
+        data_files: list[Path] = ordered_feed_content[:-1]
+        control_files: list[Path] = ordered_feed_content[-1:]
+        
+        if data_files:
+            with ThreadPoolExecutor(
+                max_workers=min(self._upload_concurrency, len(data_files)), 
+                thread_name_prefix=f"upload-{feed.stem}"
+            ) as upload_executor:
+                futures = [upload_executor.submit(self._upload_file, file, feed, uploader, feed_digest) for file in data_files]
+                
+                # barrier: every data file has to be uploaded before the control file is sent
+                errors: list[Exception] = []
+                for future in as_completed(futures):
+                    if not future.cancelled() and future.exception():
+                        errors.append(future.exception())
+                        for f in futures:
+                            f.cancel()
+                
+                if errors:
+                    logger.error(f"{len(errors)} data file upload(s) failed in feed: {feed.name}, control file not sent")
+                    raise errors[0]
+        
+        for file in control_files:
+            self._upload_file(file, feed, uploader, feed_digest)
+
+    def _upload_batch(self, ordered_feed_content: list[Path], feed: Path, uploader: Uploader, feed_digest: str = None) -> None:
+        # two azcopy jobs per feed: every data file at once, then the control file on its own
+        for batch in (ordered_feed_content[:-1], ordered_feed_content[-1:]):
+            if not batch:
+                continue
             try:
-                self._az_copy.upload(file.absolute())
-                logger.debug(f"Upload succeeded for {file} from feed {feed.name}")
+                self._retried(lambda: uploader.upload_batch([file.absolute() for file in batch]), f"batch of {len(batch)} file(s) from {feed.name}")
+                logger.debug(f"Upload succeeded for {[file.name for file in batch]} from feed {feed.name}")
+                self._count_uploaded(batch)
+                if feed_digest and self._journal:
+                    for file in batch:
+                        self._journal.record(feed_digest, file.name)
             except Exception as e:
-                msg: str = f"Upload failed for {file}, in feed: {feed}, underlying error: {e}"
+                msg: str = f"Upload failed for {[file.name for file in batch]}, in feed: {feed}, underlying error: {e}"
                 logger.error(msg)
                 raise IOError(msg) from e
 
+    @metrics.timed("upload")
+    def _upload_from_archive(self, feed: Path, feed_digest: str = None, uploader: Uploader = None) -> None:
+        uploader = uploader or self._uploader
+        logger.debug(f"Uploading feed content straight from the archive, feed: {feed.name}")
+        index: FeedIndex = self._index(feed)
+        
+        try:
+            tar: tarfile.TarFile = tarfile.open(feed, "r")
+            # with an index every header has been read already
+            members: list[tarfile.TarInfo] = None if index else tar.getmembers()
+        except Exception as e:
+            msg: str = f"Corrupted archive (feed), cannot read members of {feed.name}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+        
+        with tar:
+            ordered_members: list[tuple[tarfile.TarInfo, str]] = (
+                [(member, os.path.basename(name)) for member, name in index.files] if index else self._order_archive_members(members, feed)
+            )
+            if feed_digest and self._journal:
+                uploaded: set[str] = self._journal.uploaded(feed_digest)
+                if uploaded:
+                    logger.info(f"Resuming feed: {feed.name}, skipping {len(uploaded)} file(s) already uploaded")
+                    ordered_members = [(member, blob_name) for member, blob_name in ordered_members if blob_name not in uploaded]
+                    
+            for member, blob_name in ordered_members:
+                try:
+                    # every attempt reads the member from its start again
+                    self._retried(lambda: self._upload_member(tar, member, blob_name, uploader), blob_name)
+                    logger.debug(f"Upload succeeded for {blob_name} from feed {feed.name}")
+                    metrics.FILES_UPLOADED.inc()
+                    metrics.BYTES_UPLOADED.inc(member.size)
+                    if feed_digest and self._journal:
+                        self._journal.record(feed_digest, blob_name)
+                except Exception as e:
+                    msg: str = f"Upload failed for {blob_name}, in feed: {feed}, underlying error: {e}"
+                    logger.error(msg)
+                    raise IOError(msg) from e
+    
+    def _order_archive_members(self, members: list[tarfile.TarInfo], feed: Path) -> list[tuple[tarfile.TarInfo, str]]:
+        logger.debug(f"Ordering archive members, feed: {feed}")
+        files: list[tuple[tarfile.TarInfo, str]] = []
+        
+        for member in members:
+            try:
+                # same safety rules as extractall(filter='data'), without writing anything to disk
+                member = tarfile.data_filter(member, str(self._processing_dir))
+            except tarfile.FilterError as e:
+                msg: str = f"Unsafe member '{member.name}' in {feed}: {e}"
+                logger.error(msg)
+                raise ValueError(msg) from e
+            
+            # flat, like the files of an unpacked feed
+            blob_name: str = os.path.basename(os.path.normpath(member.name))
+            if member.isfile() and not blob_name.startswith('._'):
+                files.append((member, blob_name))
+        check_blob_names(feed, [os.path.normpath(member.name) for member, _ in files])
+        
+        control_files = [f for f in files if f[1].endswith(".control")]
+        if not control_files:
+            msg: str = f"No control file: '.control' in {feed}"
+            logger.error(msg)
+            raise ValueError(msg)
+        
+        control_file = control_files[0]
+        return [f for f in files if f is not control_file] + [control_file]
+
     @staticmethod
+    def _upload_member(tar: tarfile.TarFile, member: tarfile.TarInfo, blob_name: str, uploader: Uploader) -> None:
+        with tar.extractfile(member) as stream:
+            uploader.upload_stream(stream, blob_name)
+
+    def _retried(self, operation: Callable[[], T], item: str) -> T:
+        return self._retry.call(operation, item) if self._retry else operation()
+
+    async def _retried_async(self, operation: Callable[[], Awaitable[T]], item: str) -> T:
+        return await (self._retry.call_async(operation, item) if self._retry else operation())
+
+    @staticmethod
+    def _count_uploaded(files: list[Path]) -> None:
+        metrics.FILES_UPLOADED.inc(len(files))
+        metrics.BYTES_UPLOADED.inc(sum(file.stat().st_size for file in files if file.exists()))
+
+    def _forget_checksum(self, feed: Path) -> None:
+        # failed and duplicate-moved feeds keep their entry, a rename keeps the inode and a retry still hits
+        if self._checksum_cache and feed.exists():
+            self._checksum_cache.forget(feed.stat())
+
+    @staticmethod
+    @metrics.timed("delete")
     def _delete_path(path: Path) -> None:
         if path and path.exists():
             logger.debug(f"Deleting path {path} ...")
@@ -178,3 +734,24 @@ class Pipeline:
 
         else:
             logger.warning(f"Path {path} does not exist, cannot delete.")
+
+
+# module level, so it can be pickled into a process pool
+def file_digest(path: Path, algorithm: str, buffer_size: int) -> str:
+    # hash in fixed-size chunks, so memory per worker doesn't grow with the feed size
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        while chunk := f.read(buffer_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+# tee between the feed file, the hasher and the tar reader: every byte read is hashed exactly once
+class _HashingReader:
+    def __init__(self, f, h):
+        self._f = f
+        self._h = h
+
+    def read(self, size: int = -1) -> bytes:
+        data: bytes = self._f.read(size)
+        self._h.update(data)
+        return data
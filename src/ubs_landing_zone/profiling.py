@@ -0,0 +1,132 @@
+import contextlib
+import cProfile
+import itertools
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Iterator
+
+from loguru import logger
+
+class FeedProfiler:
+    def __init__(
+        self,
+        output_dir: Path,
+        cpu: bool = True,
+        memory: bool = False,
+        every: int = 1,
+        pattern: str = None,
+        sample_interval: float = 0.005,
+        top: int = 25
+    ):
+        self._output_dir: Path = output_dir
+        self._cpu: bool = cpu
+        self._memory: bool = memory
+        self._every: int = every
+        self._pattern: re.Pattern = re.compile(pattern) if pattern else None
+        self._sample_interval: float = sample_interval
+        self._top: int = top
+
+        self._counter: itertools.count = itertools.count()
+        # cProfile (sys.monitoring) and tracemalloc are process wide, one profiled feed at a time
+        self._active: threading.Lock = threading.Lock()
+
+        if every <= 0:
+            raise ValueError(f"Profiling sample rate must be positive, got: {every}")
+        if not (cpu or memory):
+            raise ValueError("Profiling needs cpu and/or memory enabled")
+
+    def selected(self, feed: Path) -> bool:
+        if self._pattern and not self._pattern.search(feed.name):
+            return False
+        return next(self._counter) % self._every == 0
+
+    @contextlib.contextmanager
+    def profile(self, feed: Path) -> Iterator[None]:
+        if not self.selected(feed):
+            yield
+            return
+        if not self._active.acquire(blocking=False):
+            logger.debug(f"Profiler busy with another feed, not profiling: {feed.name}")
+            yield
+            return
+
+        prefix: Path = self._output_dir / f"{feed.name}.{datetime.now().strftime('%Y-%m-%d_%H-%M-%S_%f')}"
+        profile: cProfile.Profile = cProfile.Profile() if self._cpu else None
+        sampler: _StackSampler = _StackSampler(threading.get_ident(), self._sample_interval) if self._cpu else None
+        try:
+            if self._memory:
+                tracemalloc.start(16)
+            if profile:
+                sampler.start()
+                profile.enable()
+            yield
+        finally:
+            try:
+                if profile:
+                    profile.disable()
+                    sampler.stop()
+                self._write(feed, prefix, profile, sampler)
+            finally:
+                if self._memory:
+                    tracemalloc.stop()
+                self._active.release()
+
+    def _write(self, feed: Path, prefix: Path, profile: cProfile.Profile, sampler: "_StackSampler") -> None:
+        try:
+            self._output_dir.mkdir(parents=True, exist_ok=True)
+            if profile:
+                profile.dump_stats(f"{prefix}.prof")
+                Path(f"{prefix}.collapsed").write_text(sampler.collapsed())
+            if self._memory:
+                snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                lines: list[str] = [
+                    f"feed: {feed.name}, traced memory at end: {current / 1024 ** 2:.1f} MB, peak: {peak / 1024 ** 2:.1f} MB",
+                    f"top {self._top} allocation sites still alive at the end of the feed (process wide):",
+                    *(str(stat) for stat in snapshot.statistics("lineno")[:self._top])
+                ]
+                Path(f"{prefix}.allocations.txt").write_text("\n".join(lines) + "\n")
+            logger.info(f"Profile written for feed: {feed.name}, to: {prefix}.*")
+        except Exception as e:
+            # a broken profile must never fail the feed
+            logger.error(f"Profile cannot be written for feed: {feed.name}, to: {prefix}, error: {e}")
+
+# samples the stack of one thread, collapsed "outer;inner count" lines are what flamegraph.pl and speedscope read
+class _StackSampler:
+    def __init__(self, thread_id: int, interval: float):
+        self._thread_id: int = thread_id
+        self._interval: float = interval
+        self._stacks: Counter = Counter()
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            frame: FrameType = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stacks[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame: FrameType) -> str:
+        names: list[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
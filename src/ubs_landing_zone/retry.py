@@ -0,0 +1,95 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from . import metrics
+from loguru import logger
+
+T = TypeVar("T")
+
+class RetryPolicy:
+    def __init__(
+        self,
+        retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        budget: float = 100.0,
+        budget_ratio: float = 0.1
+    ):
+        # attempts after the first one, per file
+        self._retries: int = retries
+        self._base_delay: float = base_delay
+        self._max_delay: float = max_delay
+        # retries for the whole run: every retry spends a token, every successful upload earns a fraction of one back,
+        # so an outage of the destination fails feeds fast instead of multiplying the load on it
+        self._budget: float = budget
+        self._budget_ratio: float = budget_ratio
+        self._tokens: float = budget
+        self._lock: threading.Lock = threading.Lock()
+
+        if retries < 0:
+            raise ValueError(f"Retries cannot be negative, got: {retries}")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError(f"Retry delays must satisfy 0 <= base <= max, got: {base_delay}, {max_delay}")
+        if budget < 0 or budget_ratio < 0:
+            raise ValueError(f"Retry budget and ratio cannot be negative, got: {budget}, {budget_ratio}")
+
+    def call(self, operation: Callable[[], T], item: str) -> T:
+        attempt: int = 0
+        while True:
+            try:
+                result: T = operation()
+            except Exception as e:
+                attempt += 1
+                delay: float = self._next_delay(e, attempt, item)
+                time.sleep(delay)
+                continue
+            self._succeeded(attempt, item)
+            return result
+
+    async def call_async(self, operation: Callable[[], Awaitable[T]], item: str) -> T:
+        attempt: int = 0
+        while True:
+            try:
+                result: T = await operation()
+            except Exception as e:
+                attempt += 1
+                delay: float = self._next_delay(e, attempt, item)
+                await asyncio.sleep(delay)
+                continue
+            self._succeeded(attempt, item)
+            return result
+
+    def delay(self, attempt: int) -> float:
+        # full jitter: uploads that failed together do not come back in lockstep
+        return random.uniform(0, min(self._max_delay, self._base_delay * 2 ** (attempt - 1)))
+
+    def _next_delay(self, error: Exception, attempt: int, item: str) -> float:
+        # re-raises the error when it is not worth another attempt
+        if not getattr(error, "retryable", False):
+            raise error
+        if attempt > self._retries:
+            metrics.UPLOAD_RETRIES.inc(outcome="exhausted")
+            logger.error(f"Upload retries exhausted for {item} after {attempt} attempt(s)")
+            raise error
+        with self._lock:
+            if self._tokens < 1:
+                metrics.UPLOAD_RETRIES.inc(outcome="budget_exhausted")
+                logger.error(f"Upload retry budget exhausted, not retrying {item}, error: {error}")
+                raise error
+            self._tokens -= 1
+
+        delay: float = self.delay(attempt)
+        metrics.UPLOAD_RETRIES.inc(outcome="retried")
+        metrics.UPLOAD_RETRY_SECONDS.inc(delay)
+        logger.warning(f"Upload failed for {item}, retry {attempt} of {self._retries} in {delay:.1f}s, error: {error}")
+        return delay
+
+    def _succeeded(self, attempts: int, item: str) -> None:
+        with self._lock:
+            self._tokens = min(self._budget, self._tokens + self._budget_ratio)
+        if attempts:
+            metrics.UPLOAD_RETRIES.inc(outcome="recovered")
+            logger.info(f"Upload recovered for {item} after {attempts} retry(ies)")
@@ -0,0 +1,95 @@
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterator
+
+from .compression import checksum_file
+from loguru import logger
+
+class Scanner:
+    def __init__(
+        self,
+        directory: Path,
+        file_pattern: str,
+        checksum_extension: str,
+        quiet_period: float = 0.0,
+        trust_checksum_file: bool = False
+    ):
+        self._directory: Path = directory
+        self._file_pattern: re.Pattern = re.compile(file_pattern)
+        self._checksum_extension: str = checksum_extension
+        self._quiet_period: float = quiet_period
+        self._trust_checksum_file: bool = trust_checksum_file
+
+        if quiet_period < 0:
+            raise ValueError(f"Quiet period cannot be negative, got: {quiet_period}")
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def quiet_period(self) -> float:
+        return self._quiet_period
+
+    def scan(self) -> Iterator[Path]:
+        # streamed: a feed is handed out as soon as its entry is read, no list of the whole directory is built
+        ready: int = 0
+        deferred: int = 0
+        deferred_names: list[str] = []
+        now: float = time.time()
+        for entry in self.feeds():
+            if self.ready(entry, now):
+                ready += 1
+                yield Path(entry.path)
+            else:
+                deferred += 1
+                if len(deferred_names) < 10:
+                    deferred_names.append(entry.name)
+
+        if deferred:
+            logger.info(f"{deferred} feed(s) still being written, left for the next run: {deferred_names}{' ...' if deferred > 10 else ''}")
+        if not ready:
+            logger.warning(f"0 matching feeds ready in dir:{self._directory} with pattern:'{self._file_pattern.pattern}'")
+        else:
+            logger.debug(f"{ready} Matching feeds ready in dir:{self._directory}")
+
+    def feeds(self) -> Iterator[os.DirEntry]:
+        feeds: int = 0
+        entries: int = 0
+
+        # one streaming pass, nothing but matching names is kept, no Path or stat per entry
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                entries += 1
+                if self.matches(entry.name):
+                    feeds += 1
+                    yield entry
+
+        if feeds > entries / 2:
+            logger.warning(f"UBS_LANDING_ZONE_FEED_PATTERN env var too inclusive, or missing checksum files. Found {feeds} feeds, in {entries} all files in directory. ")
+
+    def matches(self, name: str) -> bool:
+        return not name.endswith(self._checksum_extension) and bool(self._file_pattern.match(name.lower()))
+
+    def ready(self, feed: os.DirEntry | Path, now: float = None) -> bool:
+        # the one rule for "this feed is complete", for a run's scan and for watch mode alike
+        if not self._quiet_period and not self._trust_checksum_file:
+            return True
+
+        try:
+            checksum_stat: os.stat_result = os.stat(checksum_file(Path(feed), self._checksum_extension))
+        except FileNotFoundError:
+            # the checksum file is not there yet, the feed is still being delivered
+            return False
+        if self._trust_checksum_file:
+            # upstream writes the sidecar last, its presence marks the tar as complete
+            return True
+
+        try:
+            last_change: float = max(feed.stat().st_mtime, checksum_stat.st_mtime)
+        except FileNotFoundError:
+            # gone since listing, picked up or cleaned by someone else
+            return False
+        return (now or time.time()) - last_change >= self._quiet_period
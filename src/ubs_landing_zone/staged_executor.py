@@ -0,0 +1,186 @@
+import multiprocessing
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from . import metrics
+from .claimer import FeedClaimer
+from .executor import Executor, FeedOrdering
+from .pipeline import Pipeline
+from .scanner import Scanner
+from loguru import logger
+
+_DONE = object()
+
+class StagedExecutor(Executor):
+    _NEXT_STAGE: dict[str, str] = {"hash": "unpack", "unpack": "upload"}
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        directory: Path,
+        file_pattern: str,
+        hash_parallelism: int,
+        unpack_parallelism: int,
+        upload_parallelism: int,
+        queue_size: int = None,
+        ordering: FeedOrdering = FeedOrdering.NONE,
+        max_failures: int = None,
+        hash_in_processes: bool = False,
+        scanner: Scanner = None,
+        claimer: FeedClaimer = None
+    ):
+        super().__init__(
+            pipeline=pipeline,
+            directory=directory,
+            file_pattern=file_pattern,
+            parallelism=upload_parallelism,
+            queue_size=queue_size,
+            ordering=ordering,
+            max_failures=max_failures,
+            scanner=scanner,
+            claimer=claimer
+        )
+        self._hash_parallelism: int = hash_parallelism
+        self._unpack_parallelism: int = unpack_parallelism
+        self._upload_parallelism: int = upload_parallelism
+        self._hash_in_processes: bool = hash_in_processes
+
+        for name, value in (("Hash", hash_parallelism), ("Unpack", unpack_parallelism), ("Upload", upload_parallelism)):
+            if value <= 0:
+                raise ValueError(f"{name} parallelism must be positive, got: {value}")
+
+        self._lock: threading.Lock = threading.Lock()
+        self._exceptions: list[Exception] = []
+        self._fail_fast: threading.Event = threading.Event()
+
+    def execute_parallel(self) -> None:
+        logger.info(
+            f"Staged executor started, hash: {self._hash_parallelism}{' processes' if self._hash_in_processes else ''}, "
+            f"unpack: {self._unpack_parallelism}, upload: {self._upload_parallelism}"
+        )
+        self._exceptions = []
+        self._fail_fast.clear()
+
+        # bounded queues between the stages, a slow stage blocks the one before it instead of piling up feeds on disk
+        to_hash: queue.Queue = queue.Queue(maxsize=max(1, self._queue_size))
+        to_unpack: queue.Queue = queue.Queue(maxsize=max(1, self._queue_size))
+        to_upload: queue.Queue = queue.Queue(maxsize=max(1, self._queue_size))
+
+        # forkserver: forking a process that already runs the stage threads can deadlock the children
+        digest_executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=self._hash_parallelism,
+            mp_context=multiprocessing.get_context("forkserver")
+        ) if self._hash_in_processes else None
+        try:
+            stages: list[tuple[list[threading.Thread], queue.Queue]] = [
+                (self._start("hash", self._hash_parallelism, to_hash, to_unpack, lambda item: self._hash(item, digest_executor)), to_unpack),
+                (self._start("unpack", self._unpack_parallelism, to_unpack, to_upload, self._unpack), to_upload),
+                (self._start("upload", self._upload_parallelism, to_upload, None, self._publish), None),
+            ]
+
+            for feed in self._feeds():
+                if self._fail_fast.is_set():
+                    break
+                # claimed right before it enters the bounded queue, the rest stays up for grabs by other nodes
+                claimed: Path = self._claimer.claim(feed) if self._claimer else feed
+                if not claimed:
+                    continue
+                metrics.FEEDS_IN_FLIGHT.inc()
+                metrics.QUEUE_DEPTH.inc(stage="hash")
+                to_hash.put((claimed, time.time(), None))
+
+            # drain stage by stage: a stage is told to stop once everything before it has finished
+            self._stop(stages[0][0], to_hash)
+            for (workers, outbox), (next_workers, _) in zip(stages, stages[1:]):
+                for worker in workers:
+                    worker.join()
+                self._stop(next_workers, outbox)
+            for worker in stages[-1][0]:
+                worker.join()
+        finally:
+            if digest_executor:
+                digest_executor.shutdown()
+
+        if self._exceptions:
+            raise ExceptionGroup("Tasks failed", self._exceptions)
+
+    def _start(self, name: str, count: int, inbox: queue.Queue, outbox: queue.Queue, stage: Callable) -> list[threading.Thread]:
+        workers: list[threading.Thread] = [
+            threading.Thread(target=self._work, args=(name, inbox, outbox, stage), name=f"{name}_{i}", daemon=True)
+            for i in range(count)
+        ]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    @staticmethod
+    def _stop(workers: list[threading.Thread], inbox: queue.Queue) -> None:
+        for _ in workers:
+            inbox.put(_DONE)
+
+    def _work(self, name: str, inbox: queue.Queue, outbox: queue.Queue, stage: Callable) -> None:
+        while (item := inbox.get()) is not _DONE:
+            metrics.QUEUE_DEPTH.dec(stage=name)
+            feed, start_time, unpacked_dir = item
+            result: tuple = None
+            
+            if self._fail_fast.is_set():
+                # feeds already in flight stay in the landing dir for the next run
+                self._pipeline.release(feed)
+                self._cleanup(unpacked_dir)
+            else:
+                try:
+                    result = stage(item)
+                except Exception as e:
+                    self._failed(feed, unpacked_dir, e)
+            
+            if result is None or outbox is None:
+                metrics.FEEDS_IN_FLIGHT.dec()
+                if self._claimer:
+                    self._claimer.release(feed)
+            else:
+                metrics.QUEUE_DEPTH.inc(stage=self._NEXT_STAGE[name])
+                outbox.put(result)
+
+    def _hash(self, item: tuple, digest_executor: ProcessPoolExecutor) -> tuple:
+        feed, _, _ = item
+        return item if self._pipeline.verify(feed, digest_executor) else None
+
+    def _unpack(self, item: tuple) -> tuple:
+        feed, start_time, _ = item
+        # waits here for processing dir capacity, feeds behind it stay hashed in the queue
+        self._pipeline.admit(feed)
+        return feed, start_time, self._pipeline.prepare(feed)
+
+    def _publish(self, item: tuple) -> None:
+        feed, start_time, unpacked_dir = item
+        self._pipeline.publish(feed, unpacked_dir)
+        try:
+            self._pipeline.complete(feed, unpacked_dir, start_time)
+        except Exception as e:
+            # uploaded already, the feed must not end up in the failed dir
+            self._record(e)
+
+    def _failed(self, feed: Path, unpacked_dir: Path, exception: Exception) -> None:
+        try:
+            self._pipeline.fail(feed, unpacked_dir)
+        except Exception as e:
+            logger.error(f"Cannot move failed feed: {feed.name}, error: {e}")
+        self._record(exception)
+
+    def _record(self, exception: Exception) -> None:
+        with self._lock:
+            self._exceptions.append(exception)
+            if self._max_failures and len(self._exceptions) >= self._max_failures and not self._fail_fast.is_set():
+                self._fail_fast.set()
+                logger.error(f"Fail-fast: {len(self._exceptions)} feed(s) failed, skipping the remaining feeds")
+
+    @staticmethod
+    def _cleanup(unpacked_dir: Path) -> None:
+        if unpacked_dir:
+            shutil.rmtree(unpacked_dir, ignore_errors=True)
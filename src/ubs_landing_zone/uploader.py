@@ -0,0 +1,37 @@
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote, urlsplit, urlunsplit
+
+class UploadError(IOError):
+    def __init__(self, msg: str, retryable: bool = False):
+        super().__init__(msg)
+        # transient (throttling, timeouts, 5xx): another attempt may succeed, anything else fails the feed right away
+        self.retryable: bool = retryable
+
+class Uploader(ABC):
+    @abstractmethod
+    def upload(self, file: Path) -> None:
+        ...
+
+    @abstractmethod
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        ...
+
+    async def upload_async(self, file: Path) -> None:
+        # backends without a native async path keep a worker thread busy for the transfer
+        await asyncio.to_thread(self.upload, file)
+
+    def upload_batch(self, files: list[Path]) -> None:
+        for file in files:
+            self.upload(file)
+
+def blob_url(destination_url: str, blob_name: str) -> str:
+    url = urlsplit(destination_url)
+    path: str = f"{url.path.rstrip('/')}/{quote(blob_name)}"
+    return urlunsplit((url.scheme, url.netloc, path, url.query, url.fragment))
+
+def redact(url: str) -> str:
+    # SAS token lives in the query string, keep it out of the logs
+    return url.split("?", 1)[0] + "?<SAS>" if "?" in url else url
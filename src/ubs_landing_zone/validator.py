@@ -0,0 +1,114 @@
+import os
+import re
+import tarfile
+from pathlib import Path
+
+from . import metrics
+from loguru import logger
+
+def check_blob_names(feed: Path, names: list[str]) -> None:
+    # every upload mode lands a file flat under its base name, two of them must not end up on the same blob
+    seen: dict[str, str] = {}
+    for name in names:
+        blob_name: str = os.path.basename(name)
+        if blob_name in seen:
+            msg: str = f"Duplicate file name '{blob_name}' in {feed}: '{seen[blob_name]}' and '{name}' would be uploaded to the same blob"
+            logger.error(msg)
+            raise ValueError(msg)
+        seen[blob_name] = name
+
+class FeedIndex:
+    def __init__(self, feed: Path):
+        self.feed: Path = feed
+        # every member as read from the headers, in archive order
+        self.members: list[tarfile.TarInfo] = []
+        # regular files to publish with their normalised names, the control file last once finished
+        self.files: list[tuple[tarfile.TarInfo, str]] = []
+        self.size: int = 0
+
+class FeedValidator:
+    def __init__(
+        self,
+        control_extension: str = ".control",
+        ignored_names: str = r"^\._",
+        forbidden_names: str = None,
+        max_members: int = None,
+        max_member_size: int = None,
+        max_size: int = None
+    ):
+        self._control_extension: str = control_extension
+        # macOS AppleDouble files: shipped by accident, never published
+        self._ignored_names: re.Pattern = re.compile(ignored_names) if ignored_names else None
+        self._forbidden_names: re.Pattern = re.compile(forbidden_names) if forbidden_names else None
+        self._max_members: int = max_members
+        self._max_member_size: int = max_member_size
+        self._max_size: int = max_size
+
+        for name, limit in (("members", max_members), ("member size", max_member_size), ("feed size", max_size)):
+            if limit is not None and limit <= 0:
+                raise ValueError(f"Max {name} must be positive, got: {limit}")
+
+    @metrics.timed("validate")
+    def validate(self, feed: Path) -> FeedIndex:
+        # uncompressed tar: headers only, tarfile seeks over the member data
+        logger.debug(f"Validating feed structure from the tar headers: {feed.name}")
+        index: FeedIndex = FeedIndex(feed)
+        try:
+            with tarfile.open(feed, "r:") as tar:
+                for member in tar:
+                    self.add(index, member)
+        except (tarfile.TarError, OSError) as e:
+            msg: str = f"Corrupted archive (feed), cannot read members of {feed.name}"
+            logger.error(f"{msg}, error: {e}")
+            raise IOError(msg) from e
+
+        self.finish(index)
+        return index
+
+    def add(self, index: FeedIndex, member: tarfile.TarInfo) -> None:
+        feed: Path = index.feed
+        try:
+            # same safety rules as extractall(filter='data'), without writing anything to disk
+            tarfile.data_filter(member, str(feed.parent))
+        except tarfile.FilterError as e:
+            msg: str = f"Unsafe member '{member.name}' in {feed}: {e}"
+            logger.error(msg)
+            raise ValueError(msg) from e
+
+        index.members.append(member)
+        name: str = os.path.normpath(member.name)
+        base_name: str = os.path.basename(name)
+        if self._forbidden_names and self._forbidden_names.search(base_name):
+            msg: str = f"Forbidden member '{member.name}' in {feed}"
+            logger.error(msg)
+            raise ValueError(msg)
+        if not member.isfile() or (self._ignored_names and self._ignored_names.search(base_name)):
+            return
+
+        index.files.append((member, name))
+        index.size += member.size
+        if self._max_members is not None and len(index.files) > self._max_members:
+            msg: str = f"Too many files in {feed}, more than {self._max_members}"
+            logger.error(msg)
+            raise ValueError(msg)
+        if self._max_member_size is not None and member.size > self._max_member_size:
+            msg: str = f"Member '{member.name}' in {feed} too large: {member.size} bytes, limit: {self._max_member_size}"
+            logger.error(msg)
+            raise ValueError(msg)
+        if self._max_size is not None and index.size > self._max_size:
+            msg: str = f"Feed content too large: {feed}, more than {self._max_size} bytes"
+            logger.error(msg)
+            raise ValueError(msg)
+
+    def finish(self, index: FeedIndex) -> None:
+        control: tuple[tarfile.TarInfo, str] = next(
+            (f for f in index.files if f[1].endswith(self._control_extension)), None
+        )
+        if control is None:
+            msg: str = f"No control file: '{self._control_extension}' in {index.feed}"
+            logger.error(msg)
+            raise ValueError(msg)
+        check_blob_names(index.feed, [name for _, name in index.files])
+
+        index.files = [f for f in index.files if f is not control] + [control]
+        logger.debug(f"Feed structure valid: {index.feed.name}, {len(index.files)} file(s), {index.size} bytes")
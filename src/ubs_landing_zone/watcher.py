@@ -0,0 +1,210 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from . import metrics
+from .claimer import FeedClaimer
+from .pipeline import Pipeline
+from .scanner import Scanner
+from loguru import logger
+
+class Watcher:
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        scanner: Scanner,
+        parallelism: int,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+        claimer: FeedClaimer = None
+    ):
+        self._pipeline: Pipeline = pipeline
+        # listing and readiness: the same rule as a one-shot run, quiet period and trusted checksum file included
+        self._scanner: Scanner = scanner
+        self._directory: Path = scanner.directory
+        self._parallelism: int = parallelism
+        self._poll_interval: float = poll_interval
+        self._use_inotify: bool = use_inotify
+        self._claimer: FeedClaimer = claimer
+
+        self._stop_event: threading.Event = threading.Event()
+        self._lock: threading.Lock = threading.Lock()
+        # feeds seen but not ready yet, re-checked on every tick
+        self._waiting: set[str] = set()
+        self._in_flight: set[str] = set()
+        # signatures of feeds already processed, so a preserved source feed is not picked up again
+        self._processed: dict[str, tuple] = {}
+
+    def run(self) -> None:
+        logger.info(f"Watcher started, dir: {self._directory}, quiet period: {self._scanner.quiet_period}s")
+        inotify: _Inotify = self._open_inotify()
+
+        with ThreadPoolExecutor(max_workers=self._parallelism, thread_name_prefix="executor") as executor:
+            try:
+                self._scan()
+                while not self._stop_event.is_set():
+                    quiet_period: float = self._scanner.quiet_period
+                    timeout: float = min(self._poll_interval, quiet_period) if self._waiting and quiet_period else self._poll_interval
+                    if inotify:
+                        names: list[str] = inotify.read(timeout)
+                        if names is None:
+                            logger.warning("inotify event queue overflow, rescanning directory")
+                            self._scan()
+                        else:
+                            for name in names:
+                                self._track(name)
+                    else:
+                        self._stop_event.wait(timeout)
+                        self._scan()
+
+                    for feed in self._ready():
+                        self._dispatch(executor, feed)
+            finally:
+                if inotify:
+                    inotify.close()
+                logger.info(f"Watcher stopping, draining {len(self._in_flight)} in-flight feed(s)")
+                # queued but not started feeds stay in the landing dir for the next start
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        logger.info("Watcher stopped")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _open_inotify(self) -> "_Inotify":
+        if not self._use_inotify:
+            logger.info(f"Polling {self._directory} every {self._poll_interval}s")
+            return None
+        try:
+            inotify: _Inotify = _Inotify(self._directory)
+            logger.info(f"Watching {self._directory} with inotify")
+            return inotify
+        except Exception as e:
+            logger.warning(f"inotify not available, falling back to polling every {self._poll_interval}s, error: {e}")
+            return None
+
+    def _scan(self) -> None:
+        for entry in self._scanner.feeds():
+            self._track(entry.name)
+
+    def _track(self, name: str) -> None:
+        if not self._scanner.matches(name):
+            # sidecar and other files: waiting feeds are re-checked on every tick anyway
+            return
+        with self._lock:
+            if name not in self._in_flight:
+                self._waiting.add(name)
+
+    def _ready(self) -> list[Path]:
+        ready: list[Path] = []
+        now: float = time.time()
+
+        for name in list(self._waiting):
+            feed: Path = self._directory / name
+            signature: tuple = self._signature(feed)
+
+            if signature is None:
+                # gone: processed by another node or cleaned up
+                self._waiting.discard(name)
+                self._processed.pop(name, None)
+            elif self._processed.get(name) == signature:
+                self._waiting.discard(name)
+            elif self._scanner.ready(feed, now):
+                self._waiting.discard(name)
+                ready.append(feed)
+
+        return ready
+
+    @staticmethod
+    def _signature(feed: Path) -> tuple:
+        try:
+            stat: os.stat_result = feed.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _dispatch(self, executor: ThreadPoolExecutor, feed: Path) -> None:
+        signature: tuple = self._signature(feed)
+        with self._lock:
+            self._in_flight.add(feed.name)
+        logger.debug(f"Dispatching feed: {feed.name}")
+
+        metrics.QUEUE_DEPTH.inc(stage="feeds")
+        future: Future = executor.submit(self._process, feed)
+        future.add_done_callback(lambda f: self._done(feed, signature, f))
+
+    def _done(self, feed: Path, signature: tuple, future: Future) -> None:
+        with self._lock:
+            self._in_flight.discard(feed.name)
+            if feed.exists():
+                self._processed[feed.name] = signature
+
+        if future.cancelled():
+            metrics.QUEUE_DEPTH.dec(stage="feeds")
+            return
+        if future.exception():
+            logger.error(f"Feed failed: {feed.name}, error: {future.exception()}")
+
+    def _process(self, feed: Path) -> None:
+        metrics.QUEUE_DEPTH.dec(stage="feeds")
+        with metrics.FEEDS_IN_FLIGHT.track():
+            claimed: Path = self._claimer.claim(feed) if self._claimer else feed
+            if not claimed:
+                return
+            try:
+                self._pipeline.run(claimed)
+            finally:
+                if self._claimer:
+                    self._claimer.release(claimed)
+
+# minimal inotify binding over libc, Linux only
+class _Inotify:
+    _IN_MODIFY: int = 0x00000002
+    _IN_CLOSE_WRITE: int = 0x00000008
+    _IN_MOVED_TO: int = 0x00000080
+    _IN_CREATE: int = 0x00000100
+    _IN_Q_OVERFLOW: int = 0x00004000
+    _EVENT_HEADER: struct.Struct = struct.Struct("iIII")
+
+    def __init__(self, directory: Path):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno: int = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+
+        mask: int = self._IN_MODIFY | self._IN_CLOSE_WRITE | self._IN_MOVED_TO | self._IN_CREATE
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno: int = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}: {os.strerror(errno)}")
+
+    def read(self, timeout: float) -> list[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        names: list[str] = []
+        while True:
+            try:
+                data: bytes = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+
+            offset: int = 0
+            while offset < len(data):
+                _, mask, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+                offset += self._EVENT_HEADER.size
+                if mask & self._IN_Q_OVERFLOW:
+                    return None
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+
+    def close(self) -> None:
+        os.close(self._fd)
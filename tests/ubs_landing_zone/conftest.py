@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+import io
+import tarfile
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+@pytest.fixture
+def make_feed() -> Callable[..., Path]:
+    def make(feeds_dir: Path, name: str, valid_checksum: bool = True) -> Path:
+        content_dir: Path = feeds_dir / f"{name}_content"
+        content_dir.mkdir()
+        (content_dir / "sample.csv").write_text(f"col1,col2\n{name},val2")
+        (content_dir / "feed.control").touch()
+
+        feed: Path = feeds_dir / f"{name}.tar"
+        with tarfile.open(feed, "w") as tar:
+            for f in sorted(content_dir.iterdir()):
+                tar.add(f, arcname=f.name)
+        feed.with_suffix(".md5").write_text(hashlib.md5(feed.read_bytes()).hexdigest() if valid_checksum else "foo")
+        return feed
+    return make
+
+@pytest.fixture
+def make_tar() -> Callable[..., Path]:
+    def make(path: Path, members: dict[str, bytes], compress: bool = False, symlink: str = None) -> Path:
+        buffer: io.BytesIO = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, content in members.items():
+                info: tarfile.TarInfo = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mode = 0o640
+                info.mtime = 1_700_000_000
+                tar.addfile(info, io.BytesIO(content))
+            if symlink:
+                info = tarfile.TarInfo(symlink)
+                info.type = tarfile.SYMTYPE
+                info.linkname = "data/a.csv"
+                tar.addfile(info)
+        data: bytes = gzip.compress(buffer.getvalue()) if compress else buffer.getvalue()
+        path.write_bytes(data)
+        path.with_name(f"{path.name.split('.')[0]}.md5").write_text(hashlib.md5(data).hexdigest())
+        return path
+    return make
+
+@pytest.fixture
+def tar_bytes() -> Callable[[str], bytes]:
+    def make(name: str) -> bytes:
+        buffer: io.BytesIO = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for member, content in {"sample.csv": f"col1,col2\n{name},val2".encode(), "feed.control": b""}.items():
+                info: tarfile.TarInfo = tarfile.TarInfo(member)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        return buffer.getvalue()
+    return make
+
+@pytest.fixture
+def fake_az_copy() -> Callable[[Path, str], Path]:
+    def make(tmp_path: Path, script: str) -> Path:
+        binary: Path = tmp_path / "azcopy"
+        binary.write_text(f"#!/bin/sh\n{script}\n")
+        binary.chmod(0o755)
+        return binary
+    return make
@@ -0,0 +1,120 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone import metrics
+from src.ubs_landing_zone.adaptive import AdaptiveController, AdjustableSemaphore
+from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.pipeline import Pipeline
+
+def finish_window(controller: AdaptiveController, feeds: int, seconds: float, size: int = 1024 ** 2, failed: int = 0, saturated: bool = True) -> str:
+    # feeds finished over a 10s window, each taking the given time
+    for i in range(feeds):
+        controller.record(seconds, size, i >= failed)
+    controller._window.start = time.monotonic() - 10
+    if saturated:
+        for _ in range(controller.slots.limit):
+            controller.slots.acquire()
+        for _ in range(controller.slots.limit):
+            controller.slots.release()
+    return controller.adjust()
+
+class TestAdjustableSemaphore:
+    def test_set_limit(self):
+        semaphore: AdjustableSemaphore = AdjustableSemaphore(1)
+        acquired: threading.Event = threading.Event()
+        semaphore.acquire()
+        waiter: threading.Thread = threading.Thread(target=lambda: (semaphore.acquire(), acquired.set()))
+        waiter.start()
+
+        assert not acquired.wait(0.05)
+        semaphore.set_limit(2)
+        assert acquired.wait(1)
+        waiter.join()
+
+        semaphore.set_limit(1)
+        semaphore.release()
+        assert semaphore.reset_peak() == 2
+        # still one in use, at the lowered limit
+        assert semaphore.reset_peak() == 1
+
+class TestAdaptiveController:
+    def test_increase_while_improving(self):
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=2)
+        decisions: float = metrics.PARALLELISM_DECISIONS.value(decision="increase")
+
+        assert finish_window(controller, 10, 2.0) == "increase"
+        assert finish_window(controller, 15, 2.0) == "increase"
+
+        assert controller.slots.limit == 4
+        assert metrics.PARALLELISM_LIMIT.value() == 4
+        assert metrics.PARALLELISM_DECISIONS.value(decision="increase") == decisions + 2
+
+    def test_hold_when_flat_then_probe(self):
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=2, probe_after=3)
+        finish_window(controller, 10, 2.0)
+
+        assert [finish_window(controller, 10, 2.0) for _ in range(3)] == ["hold", "hold", "increase"]
+        assert controller.slots.limit == 4
+
+    def test_more_feeds_less_bytes_is_no_gain(self):
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=2)
+        finish_window(controller, 10, 2.0, size=10 * 1024 ** 2)
+
+        assert finish_window(controller, 20, 2.0, size=1024 ** 2) == "hold"
+
+    def test_decrease_on_latency(self):
+        controller: AdaptiveController = AdaptiveController(2, 16, initial_parallelism=8)
+        finish_window(controller, 10, 2.0)
+
+        assert finish_window(controller, 10, 4.0) == "decrease"
+        assert controller.slots.limit == 4
+        assert finish_window(controller, 10, 8.0) == "decrease"
+        assert finish_window(controller, 10, 16.0) == "hold"
+        assert controller.slots.limit == 2
+
+    def test_decrease_on_errors(self):
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=4)
+        finish_window(controller, 10, 2.0)
+
+        assert finish_window(controller, 10, 2.0, failed=3) == "decrease"
+        assert controller.slots.limit == 2
+
+    def test_hold_when_limit_not_reached(self):
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=4)
+
+        assert finish_window(controller, 10, 2.0, saturated=False) == "hold"
+        assert finish_window(controller, 20, 2.0, saturated=False) == "hold"
+        assert finish_window(controller, 0, 2.0) == "hold"
+        assert controller.slots.limit == 4
+
+    @pytest.mark.parametrize("kwargs", [{"min_parallelism": 0}, {"max_parallelism": 0}, {"interval": 0}, {"decrease_factor": 1}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            AdaptiveController(**{"min_parallelism": 1, "max_parallelism": 4, **kwargs})
+
+    def test_executor_bounded_by_controller(self, tmp_path):
+        for i in range(12):
+            (tmp_path / f"feed{i}.tar").write_bytes(b"foo")
+        controller: AdaptiveController = AdaptiveController(1, 8, initial_parallelism=2, interval=60)
+        running: list[int] = [0]
+        peak: list[int] = [0]
+        lock: threading.Lock = threading.Lock()
+        def run(feed: Path):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+        pipeline: Pipeline = Mock(Pipeline)
+        pipeline.run = run
+
+        Executor(pipeline, tmp_path, r"feed\d+\.tar", parallelism=2, controller=controller).execute_parallel()
+
+        assert peak[0] == 2
+        assert controller._window.feeds == 12
+        assert controller._window.bytes == 12 * 3
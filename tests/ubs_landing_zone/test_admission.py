@@ -0,0 +1,165 @@
+import hashlib
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.admission import AdmissionControl
+from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.pipeline import Pipeline
+
+needs_zstd = pytest.mark.skipif(not shutil.which("zstd"), reason="zstd binary not installed")
+
+members: dict[str, bytes] = {"sample.csv": b"col1,col2\nval1,val2" * 100, "data/sample.xml": b"<root/>", "feed.control": b""}
+
+def admit_in_thread(admission: AdmissionControl, feed: Path, size: int, admitted: list[str], staged: bool = True) -> threading.Thread:
+    thread: threading.Thread = threading.Thread(target=lambda: (admission.admit(feed, size, staged), admitted.append(feed.name)))
+    thread.start()
+    # queued before the next one
+    while not admission._waiting and feed.name not in admitted:
+        time.sleep(0.001)
+    return thread
+
+class TestAdmissionControl:
+    def test_declared_size_plain(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+
+        assert AdmissionControl().declared_size(feed) == sum(len(content) for content in members.values())
+
+    def test_declared_size_gzip(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar.gz", members, compress=True)
+
+        assert AdmissionControl().declared_size(feed) == len(make_tar(tmp_path / "plain.tar", members).read_bytes())
+
+    @needs_zstd
+    @pytest.mark.parametrize("from_file", [True, False])
+    def test_declared_size_zstd(self, tmp_path, from_file, tar_bytes):
+        data: bytes = tar_bytes("feed")
+        plain: Path = tmp_path / "feed.tar"
+        plain.write_bytes(data)
+        feed: Path = tmp_path / "feed.tar.zst"
+        if from_file:
+            subprocess.run(["zstd", "-q", str(plain), "-o", str(feed)], check=True)
+        else:
+            # streamed through stdin: no content size in the frame header
+            feed.write_bytes(subprocess.run(["zstd", "-q", "-c"], input=data, capture_output=True, check=True).stdout)
+
+        expected: int = len(data) if from_file else int(feed.stat().st_size * 4)
+        assert AdmissionControl().declared_size(feed) == expected
+
+    def test_waits_for_capacity(self, tmp_path):
+        admission: AdmissionControl = AdmissionControl(disk_budget=100)
+        admitted: list[str] = []
+        admission.admit(tmp_path / "feed_0.tar", 60)
+
+        waiting: threading.Thread = admit_in_thread(admission, tmp_path / "feed_1.tar", 50, admitted)
+        time.sleep(0.05)
+        assert admitted == []
+
+        admission.release(tmp_path / "feed_0.tar")
+        waiting.join(timeout=1)
+        assert admitted == ["feed_1.tar"]
+        assert admission._disk_used == 50
+
+    def test_over_budget_feed_runs_alone(self, tmp_path):
+        admission: AdmissionControl = AdmissionControl(disk_budget=100, memory_budget=1000)
+        admitted: list[str] = []
+
+        admission.admit(tmp_path / "huge.tar", 500)
+        small: threading.Thread = admit_in_thread(admission, tmp_path / "small.tar", 1, admitted)
+        time.sleep(0.05)
+        assert admitted == []
+
+        admission.release(tmp_path / "huge.tar")
+        small.join(timeout=1)
+        assert admitted == ["small.tar"]
+
+    def test_first_come_first_served(self, tmp_path):
+        admission: AdmissionControl = AdmissionControl(disk_budget=100)
+        admitted: list[str] = []
+        admission.admit(tmp_path / "feed_0.tar", 50)
+
+        large: threading.Thread = admit_in_thread(admission, tmp_path / "large.tar", 80, admitted)
+        time.sleep(0.05)
+        # would fit, but the large feed is first in line
+        small: threading.Thread = threading.Thread(target=lambda: (admission.admit(tmp_path / "small.tar", 10), admitted.append("small.tar")))
+        small.start()
+        time.sleep(0.05)
+        assert admitted == []
+
+        admission.release(tmp_path / "feed_0.tar")
+        large.join(timeout=1)
+        small.join(timeout=1)
+        assert admitted == ["large.tar", "small.tar"]
+
+    def test_streamed_feed_uses_memory_budget_only(self, tmp_path):
+        admission: AdmissionControl = AdmissionControl(disk_budget=100, memory_budget=1000)
+        admission.admit(tmp_path / "feed_0.tar", 90)
+
+        admission.admit(tmp_path / "feed_1.tar", 500, staged=False)
+
+        assert (admission._disk_used, admission._memory_used) == (90, 590)
+
+    @pytest.mark.parametrize("kwargs", [{"disk_budget": 0}, {"memory_budget": -1}, {"compressed_ratio": 0.5}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            AdmissionControl(**kwargs)
+
+class TestPipelineAdmission:
+    def _pipeline(self, tmp_path: Path, admission: AdmissionControl, uploader=None) -> Pipeline:
+        return Pipeline(
+            uploader=uploader or Mock(),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            admission=admission
+        )
+
+    def test_processing_dir_within_budget(self, tmp_path, make_feed):
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        for i in range(8):
+            make_feed(feeds_dir, f"feed_{i}")
+        feed_size: int = AdmissionControl().declared_size(feeds_dir / "feed_0.tar")
+        admission: AdmissionControl = AdmissionControl(disk_budget=2 * feed_size)
+        peak: list[int] = [0]
+        admit = admission.admit
+        def recording_admit(feed: Path, size: int, staged: bool = True):
+            admit(feed, size, staged)
+            peak[0] = max(peak[0], admission._disk_used)
+        admission.admit = recording_admit
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: time.sleep(0.01)
+
+        Executor(self._pipeline(tmp_path, admission, uploader), feeds_dir, r"feed_\d\.tar$", parallelism=8).execute_parallel()
+
+        assert feed_size < peak[0] <= 2 * feed_size
+        assert uploader.upload.call_count == 16
+        assert admission._disk_used == 0 and not admission._reservations
+
+    def test_released_on_failure(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"not a tar archive")
+        feed.with_suffix(".md5").write_text(hashlib.md5(b"not a tar archive").hexdigest())
+        admission: AdmissionControl = AdmissionControl(disk_budget=100)
+
+        with pytest.raises(IOError) as exc_info:
+            self._pipeline(tmp_path, admission).run(feed)
+
+        assert "Corrupted archive" in str(exc_info.value)
+        assert not admission._reservations
+
+    def test_corrupted_tar_admitted_as_empty(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"not a tar archive")
+        admission: AdmissionControl = AdmissionControl(disk_budget=100)
+        pipeline: Pipeline = self._pipeline(tmp_path, admission)
+
+        pipeline.admit(feed)
+
+        assert admission._reservations == {feed: (0, 0)}
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from src.ubs_landing_zone.async_executor import AsyncExecutor
+from src.ubs_landing_zone.az_copy import AzCopy
+from src.ubs_landing_zone.pipeline import Pipeline
+
+destination_url: str = "https://example.com/bucket?sv=2020-04-08&sig=dummySignature"
+
+class TestAsyncExecutor:
+    @pytest.fixture
+    def feeds_dir(self, tmp_path: Path) -> Path:
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        return feeds_dir
+
+    @pytest.fixture
+    def uploads(self, tmp_path: Path) -> Path:
+        return tmp_path / "uploads.log"
+
+    def _executor(self, binary: Path, feeds_dir: Path, tmp_path: Path, upload_slots: int, upload_concurrency: int = 4) -> AsyncExecutor:
+        pipeline = Pipeline(
+            uploader=AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            upload_concurrency=upload_concurrency
+        )
+        return AsyncExecutor(
+            pipeline=pipeline,
+            directory=feeds_dir,
+            file_pattern=r"feed_\d+\.tar$",
+            parallelism=4,
+            upload_slots=upload_slots,
+            io_threads=2
+        )
+
+    def test_all_feeds_uploaded_control_last(self, feeds_dir, tmp_path, uploads, fake_az_copy, make_feed):
+        feeds: list[Path] = [make_feed(feeds_dir, f"feed_{i}") for i in range(6)]
+        binary: Path = fake_az_copy(tmp_path, f'echo "$(basename $(dirname "$2")) $(basename "$2")" >> {uploads}')
+
+        self._executor(binary, feeds_dir, tmp_path, upload_slots=8).execute_parallel()
+
+        lines: list[str] = uploads.read_text().splitlines()
+        assert len(lines) == 12
+        for unpacked_dir in {line.split()[0] for line in lines}:
+            per_feed: list[str] = [line.split()[1] for line in lines if line.startswith(f"{unpacked_dir} ")]
+            assert per_feed == ["sample.csv", "feed.control"]
+        assert not any(feed.exists() for feed in feeds)
+
+    def test_uploads_bounded_by_slots(self, feeds_dir, tmp_path, uploads, fake_az_copy, make_feed):
+        for i in range(6):
+            make_feed(feeds_dir, f"feed_{i}")
+        running: Path = tmp_path / "running"
+        running.mkdir()
+        binary: Path = fake_az_copy(tmp_path, f'touch {running}/$$\nls {running} | wc -l >> {uploads}\nsleep 0.1\nrm {running}/$$')
+
+        self._executor(binary, feeds_dir, tmp_path, upload_slots=2).execute_parallel()
+
+        in_flight: list[int] = [int(line) for line in uploads.read_text().split()]
+        assert len(in_flight) == 12
+        assert max(in_flight) <= 2
+
+    def test_failed_upload_moves_feed(self, feeds_dir, tmp_path, uploads, fake_az_copy, make_feed):
+        make_feed(feeds_dir, "feed_0")
+        binary: Path = fake_az_copy(
+            tmp_path,
+            f'echo "$2" >> {uploads}\necho \'{{"MessageType":"Error","MessageContent":"403 Forbidden"}}\'\nexit 1'
+        )
+
+        with pytest.raises(ExceptionGroup) as exc_info:
+            self._executor(binary, feeds_dir, tmp_path, upload_slots=2).execute_parallel()
+
+        assert "403 Forbidden" in str(exc_info.value.exceptions[0])
+        assert "control" not in uploads.read_text()
+        assert sorted(f.name for f in (tmp_path / "failed").iterdir()) == ["feed_0.md5", "feed_0.tar"]
+        assert not any((tmp_path / "processing").iterdir())
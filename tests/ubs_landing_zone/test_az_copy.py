@@ -0,0 +1,165 @@
+import asyncio
+import os
+import io
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.az_copy import AzCopy
+from src.ubs_landing_zone.uploader import UploadError
+
+destination_url: str = "https://example.com/bucket?sv=2020-04-08&sig=dummySignature"
+
+class TestAzCopy:
+    def test_upload_stream_successful(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f'echo "$2" > {output}.url\ncat > {output}')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        az_copy.upload_stream(io.BytesIO(b"col1,col2\nval1,val2"), "sample.csv")
+
+        assert output.read_bytes() == b"col1,col2\nval1,val2"
+        assert output.with_suffix(".url").read_text().strip() == "https://example.com/bucket/sample.csv?sv=2020-04-08&sig=dummySignature"
+
+    def test_upload_stream_failed(self, tmp_path, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, 'echo \'{"MessageType":"Error","MessageContent":"403 Forbidden"}\'\nexit 1')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(IOError) as exc_info:
+            az_copy.upload_stream(io.BytesIO(b"x" * 1024 * 1024), "sample.csv")
+
+        assert "AZCopy command failed, file: sample.csv" in str(exc_info.value)
+        assert "403 Forbidden" in str(exc_info.value)
+        assert "dummySignature" not in str(exc_info.value)
+
+    def test_upload_stream_chatty_azcopy(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        # more than a pipe buffer on stdout and stderr before stdin is read
+        binary: Path = fake_az_copy(tmp_path, f"head -c 300000 /dev/zero\nhead -c 300000 /dev/zero >&2\ncat > {output}")
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+        content: bytes = b"x" * 1024 * 1024
+        uploading: threading.Thread = threading.Thread(target=az_copy.upload_stream, args=(io.BytesIO(content), "sample.csv"), daemon=True)
+
+        uploading.start()
+        uploading.join(timeout=10)
+
+        assert not uploading.is_alive()
+        assert output.read_bytes() == content
+
+    def test_upload_stream_unreadable_member(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f"cat > {output}\necho done >> {output}")
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+        stream = Mock()
+        stream.read.side_effect = [b"x" * 1024, OSError("FOO-ERROR")]
+
+        with pytest.raises(IOError):
+            az_copy.upload_stream(stream, "sample.csv")
+
+        # killed before it saw the end of its input, maybe before it even opened its output
+        assert not output.exists() or b"done" not in output.read_bytes()
+
+    def test_upload_stream_dry_run(self, tmp_path, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, "exit 1")
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url, dry_run=True)
+
+        az_copy.upload_stream(io.BytesIO(b"foo"), "sample.csv")
+
+    def test_upload_batch_successful(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f'echo "$@" > {output}')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+        feed_dir: Path = tmp_path / "feed"
+        feed_dir.mkdir()
+
+        az_copy.upload_batch([feed_dir / "sample.csv", feed_dir / "sample.xml"])
+
+        args: str = output.read_text()
+        assert f"copy {feed_dir} {destination_url}" in args
+        assert "--include-path sample.csv;sample.xml" in args
+
+    def test_upload_batch_failed_maps_errors_to_files(self, tmp_path, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, 'echo \'{"MessageType":"Error","MessageContent":"failed to upload sample.xml: 503"}\'\nexit 1')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(IOError) as exc_info:
+            az_copy.upload_batch([tmp_path / "sample.csv", tmp_path / "sample.xml"])
+
+        assert "AZCopy command failed, files: ['sample.xml']" in str(exc_info.value)
+
+    def test_upload_batch_failed_matches_whole_names(self, tmp_path, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, 'echo \'{"MessageType":"Error","MessageContent":"failed to upload /feed/data.csv: 503"}\'\nexit 1')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(IOError) as exc_info:
+            az_copy.upload_batch([tmp_path / "a.csv", tmp_path / "data.csv", tmp_path / "data.csv.bak"])
+
+        assert "AZCopy command failed, files: ['data.csv']" in str(exc_info.value)
+
+    def test_upload_batch_multiple_dirs(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f'echo "$@" >> {output}')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        az_copy.upload_batch([tmp_path / "sample.csv", tmp_path / "data" / "sample.xml", tmp_path / "data" / "sample.json"])
+
+        jobs: list[str] = output.read_text().splitlines()
+        assert len(jobs) == 2
+        assert f"copy {tmp_path} {destination_url}" in jobs[0] and "--include-path sample.csv " in jobs[0]
+        assert f"copy {tmp_path / 'data'} {destination_url}" in jobs[1] and "--include-path sample.xml;sample.json " in jobs[1]
+
+    def test_upload_batch_same_name_in_two_dirs(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f'echo "$@" >> {output}')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(ValueError) as exc_info:
+            az_copy.upload_batch([tmp_path / "sample.csv", tmp_path / "data" / "sample.csv"])
+
+        assert "two files named sample.csv" in str(exc_info.value)
+        assert not output.exists()
+
+    def test_upload_async_successful(self, tmp_path, fake_az_copy):
+        output: Path = tmp_path / "out"
+        binary: Path = fake_az_copy(tmp_path, f'echo "$@" > {output}')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        asyncio.run(az_copy.upload_async(tmp_path / "sample.csv"))
+
+        assert f"copy {tmp_path / 'sample.csv'} {destination_url}" in output.read_text()
+
+    def test_upload_async_failed(self, tmp_path, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, 'echo \'{"MessageType":"Error","MessageContent":"403 Forbidden"}\'\nexit 1')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(IOError) as exc_info:
+            asyncio.run(az_copy.upload_async(tmp_path / "sample.csv"))
+
+        assert "AZCopy command failed, file: sample.csv" in str(exc_info.value)
+        assert "403 Forbidden" in str(exc_info.value)
+
+    @pytest.mark.parametrize(
+        "content, retryable",
+        [
+            ("503 Service Unavailable", True),
+            ("ServerBusy: the server is busy", True),
+            ("dial tcp: i/o timeout", True),
+            ("failed to upload report_404.csv, 401 bytes sent after 403 ms: 503 Server Busy", True),
+            ("RESPONSE Status: 403 Server failed to authenticate the request", False),
+            ("404 Not Found", False),
+            ("403 This request is not authorized to perform this operation", False),
+            ("AuthenticationFailed", False),
+            ("ContainerNotFound: the specified container does not exist", False),
+            ("failed to parse destination", False)
+        ]
+    )
+    def test_failure_classified(self, tmp_path, content, retryable, fake_az_copy):
+        binary: Path = fake_az_copy(tmp_path, f'echo \'{{"MessageType":"Error","MessageContent":"{content}"}}\'\nexit 1')
+        az_copy = AzCopy(az_copy_binary=binary, az_copy_destination_url=destination_url)
+
+        with pytest.raises(UploadError) as exc_info:
+            az_copy.upload(tmp_path / "sample.csv")
+
+        assert exc_info.value.retryable is retryable
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+from src.ubs_landing_zone.blob_uploader import BlobUploader
+
+class FakeBlobStorage(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeBlobHandler)
+        self.blobs: dict[str, bytes] = {}
+        self.blocks: dict[tuple[str, str], bytes] = {}
+        self.connections: set[int] = set()
+        self.fail_with: int = None
+        self.lock: threading.Lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/container?sv=2020-04-08&sig=dummySignature"
+
+class FakeBlobHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        storage: FakeBlobStorage = self.server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        blob: str = unquote(url.path)
+        body: bytes = self.rfile.read(int(self.headers["Content-Length"]))
+
+        with storage.lock:
+            storage.connections.add(self.client_address[1])
+            if storage.fail_with:
+                self._respond(storage.fail_with, "ServerBusy")
+                return
+            if query.get("comp") == ["block"]:
+                storage.blocks[(blob, query["blockid"][0])] = body
+            elif query.get("comp") == ["blocklist"]:
+                block_ids: list[str] = re.findall(r"<Latest>(.*?)</Latest>", body.decode())
+                storage.blobs[blob] = b"".join(storage.blocks.pop((blob, block_id)) for block_id in block_ids)
+            else:
+                assert self.headers["x-ms-blob-type"] == "BlockBlob"
+                storage.blobs[blob] = body
+        self._respond(201)
+
+    def _respond(self, status: int, error_code: str = None):
+        self.send_response(status)
+        if error_code:
+            self.send_header("x-ms-error-code", error_code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def storage():
+    server = FakeBlobStorage()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class TestBlobUploader:
+    def test_upload_single_put_blob(self, storage, tmp_path):
+        file: Path = tmp_path / "sample.csv"
+        file.write_text("col1,col2\nval1,val2")
+        uploader = BlobUploader(destination_url=storage.url, block_size=1024)
+
+        uploader.upload(file)
+        uploader.close()
+
+        assert storage.blobs == {"/container/sample.csv": b"col1,col2\nval1,val2"}
+
+    def test_upload_parallel_blocks(self, storage, tmp_path):
+        content: bytes = os.urandom(10 * 1024 + 17)
+        file: Path = tmp_path / "big.xml"
+        file.write_bytes(content)
+        uploader = BlobUploader(destination_url=storage.url, block_size=1024, concurrency=4)
+
+        uploader.upload(file)
+        uploader.close()
+
+        assert storage.blobs["/container/big.xml"] == content
+        assert not storage.blocks
+
+    def test_connections_reused_across_files(self, storage, tmp_path):
+        uploader = BlobUploader(destination_url=storage.url, block_size=1024, concurrency=1)
+
+        for i in range(20):
+            file: Path = tmp_path / f"file_{i}.csv"
+            file.write_text(f"{i}")
+            uploader.upload(file)
+        uploader.close()
+
+        assert len(storage.blobs) == 20
+        assert len(storage.connections) == 1
+        assert uploader._pool.created == 1
+
+    def test_upload_failed(self, storage, tmp_path):
+        storage.fail_with = 503
+        file: Path = tmp_path / "sample.csv"
+        file.write_text("col1,col2\nval1,val2")
+        uploader = BlobUploader(destination_url=storage.url, block_size=4)
+
+        with pytest.raises(IOError) as exc_info:
+            uploader.upload(file)
+        uploader.close()
+
+        assert "Blob upload failed, file: sample.csv" in str(exc_info.value)
+        assert "503" in str(exc_info.value) and "ServerBusy" in str(exc_info.value)
+        assert "dummySignature" not in str(exc_info.value)
+
+    def test_dry_run(self, storage, tmp_path):
+        file: Path = tmp_path / "sample.csv"
+        file.write_text("col1,col2\nval1,val2")
+        uploader = BlobUploader(destination_url=storage.url, dry_run=True)
+
+        uploader.upload(file)
+        uploader.close()
+
+        assert not storage.blobs
@@ -0,0 +1,209 @@
+import hashlib
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone import pipeline as pipeline_module
+from src.ubs_landing_zone.checksums import ChecksumCache, normalize_algorithm, parse_checksum
+from src.ubs_landing_zone.pipeline import Pipeline
+
+@pytest.fixture
+def no_racy_window(monkeypatch):
+    # files in a test are cached right after they are written
+    monkeypatch.setattr(ChecksumCache, "_RACY_NS", 0)
+
+class TestChecksumHelpers:
+    @pytest.mark.parametrize(
+        "name, expected",
+        [("MD5", "md5"), ("SHA-256", "sha256"), ("sha_256", "sha256"), ("BLAKE2b", "blake2b"), ("blake2", "blake2b"), ("SHA3-256", "sha3_256")]
+    )
+    def test_normalize_algorithm(self, name, expected):
+        assert normalize_algorithm(name) == expected
+
+    @pytest.mark.parametrize("name", ["foo", "shake_128"])
+    def test_normalize_algorithm_unsupported(self, name):
+        with pytest.raises(ValueError):
+            normalize_algorithm(name)
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("d41d8cd98f00b204e9800998ecf8427e\n", ("d41d8cd98f00b204e9800998ecf8427e", None)),
+            ("D41D8CD98F00B204E9800998ECF8427E", ("d41d8cd98f00b204e9800998ecf8427e", None)),
+            ("d41d8cd98f00b204e9800998ecf8427e  feed.tar\n", ("d41d8cd98f00b204e9800998ecf8427e", "feed.tar")),
+            ("d41d8cd98f00b204e9800998ecf8427e *my feed.tar", ("d41d8cd98f00b204e9800998ecf8427e", "my feed.tar")),
+            ("MD5 (feed.tar) = d41d8cd98f00b204e9800998ecf8427e", ("d41d8cd98f00b204e9800998ecf8427e", "feed.tar")),
+            ("", ("", None))
+        ]
+    )
+    def test_parse_checksum(self, text, expected):
+        assert parse_checksum(text) == expected
+
+@pytest.mark.usefixtures("no_racy_window")
+class TestChecksumCache:
+    def test_get_put(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+        stat: os.stat_result = feed.stat()
+
+        assert cache.get(stat, "md5") is None
+        cache.put(feed, stat, "md5", "digest")
+
+        assert cache.get(feed.stat(), "md5") == "digest"
+        assert cache.get(feed.stat(), "sha256") is None
+
+    def test_invalidated_on_change(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+        cache.put(feed, feed.stat(), "md5", "digest")
+
+        # same size, new mtime
+        mtime_ns: int = feed.stat().st_mtime_ns
+        feed.write_bytes(b"bar")
+        os.utime(feed, ns=(mtime_ns + 1, mtime_ns + 1))
+
+        assert cache.get(feed.stat(), "md5") is None
+
+    def test_hit_after_rename(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+        cache.put(feed, feed.stat(), "md5", "digest")
+
+        # claimed, failed, then moved back by hand
+        (tmp_path / ".claims").mkdir()
+        claimed: Path = feed.rename(tmp_path / ".claims" / feed.name)
+        failed: Path = claimed.rename(tmp_path / f"failed_{feed.name}")
+        retried: Path = failed.rename(feed)
+
+        assert cache.get(retried.stat(), "md5") == "digest"
+
+    def test_forget(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+        stat: os.stat_result = feed.stat()
+        cache.put(feed, stat, "md5", "digest")
+        cache.put(feed, stat, "sha256", "digest")
+
+        cache.forget(stat)
+
+        assert cache.get(stat, "md5") is None
+        assert cache.get(stat, "sha256") is None
+
+    def test_not_cached_when_changed_while_hashed(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+        stat: os.stat_result = feed.stat()
+
+        feed.write_bytes(b"foobar")
+        cache.put(feed, stat, "md5", "digest")
+
+        assert cache.get(stat, "md5") is None
+
+    def test_recently_changed_not_cached(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ChecksumCache, "_RACY_NS", 2 * 10 ** 9)
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite")
+
+        cache.put(feed, feed.stat(), "md5", "digest")
+
+        assert cache.get(feed.stat(), "md5") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache: ChecksumCache = ChecksumCache(tmp_path / "cache.sqlite", max_entries=2)
+        stats: list[os.stat_result] = []
+        for i in range(3):
+            feed: Path = tmp_path / f"feed_{i}.tar"
+            feed.write_bytes(b"foo")
+            stats.append(feed.stat())
+            cache.put(feed, stats[-1], "md5", f"digest_{i}")
+            if i == 1:
+                # feed_0 used again, feed_1 is now the least recently used
+                cache.get(stats[0], "md5")
+
+        assert [cache.get(stat, "md5") for stat in stats] == ["digest_0", None, "digest_2"]
+
+    def test_survives_reopen(self, tmp_path):
+        feed: Path = tmp_path / "feed.tar"
+        feed.write_bytes(b"foo")
+        ChecksumCache(tmp_path / "cache.sqlite").put(feed, feed.stat(), "md5", "digest")
+
+        assert ChecksumCache(tmp_path / "cache.sqlite").get(feed.stat(), "md5") == "digest"
+
+@pytest.mark.usefixtures("no_racy_window")
+class TestPipelineChecksumCache:
+    def _pipeline(self, tmp_path: Path, preserve_source_feeds: bool = True, **kwargs) -> Pipeline:
+        return Pipeline(
+            uploader=Mock(),
+            checksum_extension=".md5",
+            algorithm="MD5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            preserve_source_feeds=preserve_source_feeds,
+            checksum_cache=ChecksumCache(tmp_path / "cache.sqlite"),
+            **kwargs
+        )
+
+    @pytest.mark.parametrize("single_pass", [False, True])
+    def test_retried_feed_not_hashed_again(self, tmp_path, monkeypatch, single_pass, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        pipeline: Pipeline = self._pipeline(tmp_path, single_pass=single_pass)
+        pipeline.run(feed)
+        hashed = Mock(side_effect=pipeline_module.file_digest)
+        monkeypatch.setattr(pipeline_module, "file_digest", hashed)
+        monkeypatch.setattr(pipeline_module.hashlib, "new", Mock(side_effect=AssertionError("hashed again")))
+
+        pipeline.run(feed)
+
+        hashed.assert_not_called()
+        assert pipeline._uploader.upload.call_count == 4
+
+    def test_forgotten_when_feed_deleted(self, tmp_path, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        stat: os.stat_result = feed.stat()
+        pipeline: Pipeline = self._pipeline(tmp_path, preserve_source_feeds=False)
+
+        pipeline.run(feed)
+
+        assert not feed.exists()
+        assert pipeline._checksum_cache.get(stat, "md5") is None
+
+    def test_failed_feed_moved_back_not_hashed_again(self, tmp_path, monkeypatch, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        pipeline: Pipeline = self._pipeline(tmp_path, preserve_source_feeds=False)
+        pipeline._uploader.upload.side_effect = IOError("FOO-ERROR")
+        with pytest.raises(IOError):
+            pipeline.run(feed)
+
+        for name in (feed.name, feed.with_suffix(".md5").name):
+            (tmp_path / "failed" / name).rename(tmp_path / name)
+        pipeline._uploader.upload.side_effect = None
+        hashed = Mock(side_effect=pipeline_module.file_digest)
+        monkeypatch.setattr(pipeline_module, "file_digest", hashed)
+
+        pipeline.run(feed)
+
+        hashed.assert_not_called()
+
+    def test_cached_digest_still_compared(self, tmp_path, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        pipeline: Pipeline = self._pipeline(tmp_path)
+        pipeline.run(feed)
+
+        feed.with_suffix(".md5").write_text("0" * 32)
+        with pytest.raises(ValueError):
+            pipeline.run(feed)
+
+    def test_md5sum_format(self, tmp_path, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        digest: str = hashlib.md5(feed.read_bytes()).hexdigest()
+        feed.with_suffix(".md5").write_text(f"{digest.upper()}  {feed.name}\n")
+
+        self._pipeline(tmp_path).run(feed)
@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import BinaryIO
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.claimer import FeedClaimer
+from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.uploader import Uploader
+
+FEED_PATTERN: str = r"feed_\d+\.tar$"
+
+class RecordingUploader(Uploader):
+    def __init__(self, record: Path, node_id: str):
+        self._record: Path = record
+        self._node_id: str = node_id
+
+    def upload(self, file: Path) -> None:
+        with open(file, "rb") as f:
+            self.upload_stream(f, file.name)
+
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        if blob_name == "sample.csv":
+            feed_name: str = stream.read().decode().splitlines()[1].split(",")[0]
+            # one short O_APPEND write per line, safe across processes
+            with open(self._record, "a") as f:
+                f.write(f"{self._node_id} {feed_name}\n")
+        time.sleep(0.01)
+
+def run_node(landing_dir: Path, work_dir: Path, record: Path, node_id: str) -> None:
+    claimer: FeedClaimer = FeedClaimer(landing_dir, ".md5", node_id=node_id, lease_seconds=30)
+    executor: Executor = Executor(
+        pipeline=Pipeline(
+            uploader=RecordingUploader(record, node_id),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=work_dir / "failed",
+            processing_dir=work_dir / "processing"
+        ),
+        directory=landing_dir,
+        file_pattern=FEED_PATTERN,
+        parallelism=2,
+        claimer=claimer
+    )
+    claimer.start()
+    try:
+        executor.execute_parallel()
+    finally:
+        claimer.stop()
+
+class TestFeedClaimer:
+    @pytest.fixture
+    def feeds_dir(self, tmp_path: Path) -> Path:
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        return feeds_dir
+
+    def test_claim(self, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        claimer: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_a")
+        other: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_b")
+        claimer.start()
+        other.start()
+
+        claimed: Path = claimer.claim(feed)
+
+        assert claimed == feeds_dir / ".claims" / "node_a" / "feed_0.tar"
+        assert claimed.with_suffix(".md5").exists()
+        assert not feed.exists() and not feed.with_suffix(".md5").exists()
+        assert other.claim(feed) is None
+
+        claimer.stop()
+        other.stop()
+
+    def test_release(self, feeds_dir, monkeypatch, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        claimer: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_a")
+        claimer.start()
+        claimed: Path = claimer.claim(feed)
+        renames: list[str] = []
+        rename = os.rename
+        def recording_rename(src, dst):
+            renames.append(Path(src).name)
+            rename(src, dst)
+        monkeypatch.setattr(os, "rename", recording_rename)
+
+        claimer.release(claimed)
+
+        # a feed never shows up in the landing dir without its checksum file
+        assert renames == ["feed_0.md5", "feed_0.tar"]
+        assert feed.exists() and feed.with_suffix(".md5").exists()
+        claimer.stop()
+
+    def test_reclaim_expired(self, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        crashed: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_a", lease_seconds=10)
+        crashed.start()
+        crashed.claim(feed)
+        crashed._stop_event.set()
+        lease: Path = feeds_dir / ".claims" / "node_a" / ".lease"
+        survivor: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_b", lease_seconds=10)
+        survivor.start()
+
+        assert survivor.reclaim_expired() == 0
+        assert not feed.exists()
+
+        os.utime(lease, (time.time() - 11, time.time() - 11))
+
+        assert survivor.reclaim_expired() == 1
+        assert feed.exists() and feed.with_suffix(".md5").exists()
+        assert [p.name for p in (feeds_dir / ".claims").iterdir()] == ["node_b"]
+        survivor.stop()
+
+    def test_start_returns_own_leftovers(self, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        (feeds_dir / ".claims" / "node_a").mkdir(parents=True)
+        os.rename(feed, feeds_dir / ".claims" / "node_a" / feed.name)
+        os.rename(feed.with_suffix(".md5"), feeds_dir / ".claims" / "node_a" / "feed_0.md5")
+        claimer: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_a")
+
+        claimer.start()
+
+        assert feed.exists() and feed.with_suffix(".md5").exists()
+        claimer.stop()
+        assert not (feeds_dir / ".claims" / "node_a").exists()
+
+    def test_executor_releases_unprocessed_feed(self, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        claimer: FeedClaimer = FeedClaimer(feeds_dir, ".md5", node_id="node_a")
+        pipeline: Pipeline = Mock(Pipeline)
+        seen: list[Path] = []
+        pipeline.run = lambda claimed: seen.append(claimed)
+        claimer.start()
+
+        Executor(pipeline, feeds_dir, FEED_PATTERN, parallelism=1, claimer=claimer).execute_parallel()
+
+        assert seen == [feeds_dir / ".claims" / "node_a" / "feed_0.tar"]
+        # left in place by the pipeline (e.g. preserved source feeds): back in the landing dir
+        assert feed.exists() and feed.with_suffix(".md5").exists()
+        claimer.stop()
+
+    @pytest.mark.parametrize("kwargs", [{"lease_seconds": 0}, {"node_id": ".reclaim"}, {"node_id": "a/b"}])
+    def test_invalid(self, feeds_dir, kwargs):
+        with pytest.raises(ValueError):
+            FeedClaimer(feeds_dir, ".md5", **kwargs)
+
+    def test_nodes_process_each_feed_once(self, tmp_path, feeds_dir, make_feed):
+        feed_names: list[str] = [f"feed_{i}" for i in range(30)]
+        for name in feed_names:
+            make_feed(feeds_dir, name)
+        record: Path = tmp_path / "uploaded.txt"
+        record.touch()
+        context = multiprocessing.get_context("spawn")
+        nodes = [
+            context.Process(target=run_node, args=(feeds_dir, tmp_path / f"node_{i}", record, f"node_{i}"))
+            for i in range(3)
+        ]
+
+        for node in nodes:
+            node.start()
+        for node in nodes:
+            node.join(timeout=120)
+
+        assert [node.exitcode for node in nodes] == [0, 0, 0]
+        uploaded: list[str] = [line.split()[1] for line in record.read_text().splitlines()]
+        assert sorted(uploaded) == sorted(feed_names)
+        assert not list(feeds_dir.glob("feed_*.tar"))
+        assert not any((feeds_dir / ".claims").iterdir())
@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone import compression
+from src.ubs_landing_zone.compression import Decompressor, checksum_file, feed_compression, feed_stem
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.scanner import Scanner
+
+needs_zstd = pytest.mark.skipif(not shutil.which("zstd"), reason="zstd binary not installed")
+
+@pytest.fixture
+def make_compressed_feed(tar_bytes) -> Callable[[Path, str, str], Path]:
+    def make(feeds_dir: Path, name: str, suffix: str) -> Path:
+        data: bytes = tar_bytes(name)
+        if suffix.endswith("gz"):
+            data = gzip.compress(data)
+        elif suffix.endswith("zst"):
+            data = subprocess.run(["zstd", "-q", "-c"], input=data, capture_output=True, check=True).stdout
+        feed: Path = feeds_dir / f"{name}{suffix}"
+        feed.write_bytes(data)
+        (feeds_dir / f"{name}.md5").write_text(hashlib.md5(data).hexdigest())
+        return feed
+    return make
+
+class HashingSource:
+    def __init__(self, f, h):
+        self._f = f
+        self._h = h
+
+    def read(self, size: int = -1) -> bytes:
+        data: bytes = self._f.read(size)
+        self._h.update(data)
+        return data
+
+class TestCompression:
+    @pytest.mark.parametrize(
+        "name, stem, kind",
+        [
+            ("tf.1.v1.tar", "tf.1.v1", None),
+            ("tf.1.v1.tar.gz", "tf.1.v1", "gzip"),
+            ("tf.1.v1.TAR.ZST", "tf.1.v1", "zstd"),
+            ("tf.1.v1.tgz", "tf.1.v1", "gzip"),
+            ("tf.1.v1", "tf.1", None),
+        ]
+    )
+    def test_suffixes(self, name, stem, kind):
+        assert feed_stem(name) == stem
+        assert feed_compression(Path(name)) == kind
+        assert checksum_file(Path("/foo") / name, ".md5") == Path("/foo") / f"{stem}.md5"
+
+    @pytest.mark.parametrize(
+        "suffix, threads",
+        [(".tar.gz", 4), (".tar.gz", 0), pytest.param(".tar.zst", 4, marks=needs_zstd)]
+    )
+    @pytest.mark.parametrize("hashing_source", [False, True])
+    def test_decompress(self, tmp_path, suffix, threads, hashing_source, make_compressed_feed, tar_bytes):
+        feed: Path = make_compressed_feed(tmp_path, "feed_0", suffix)
+        h = hashlib.md5()
+
+        with open(feed, "rb") as f:
+            # a source without a file descriptor goes through the pump thread
+            source = HashingSource(f, h) if hashing_source else f
+            with Decompressor(threads=threads).open(feed, source) as stream:
+                assert stream.read() == tar_bytes("feed_0")
+
+        if hashing_source:
+            assert h.hexdigest() == hashlib.md5(feed.read_bytes()).hexdigest()
+
+    def test_zstd_without_decoder(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(compression, "zstandard", None)
+        feed: Path = tmp_path / "feed.tar.zst"
+        feed.write_bytes(b"foo")
+
+        with pytest.raises(IOError) as exc_info:
+            with open(feed, "rb") as f, Decompressor(threads=0).open(feed, f):
+                pass
+
+        assert "zstd" in str(exc_info.value)
+
+    def test_corrupted_stream(self, tmp_path, tar_bytes):
+        feed: Path = tmp_path / "feed.tar.gz"
+        feed.write_bytes(gzip.compress(tar_bytes("feed"))[:-8])
+
+        with pytest.raises(IOError):
+            with open(feed, "rb") as f, Decompressor().open(feed, f) as stream:
+                stream.read()
+
+    @pytest.mark.parametrize("suffix", [".tar.gz", pytest.param(".tar.zst", marks=needs_zstd)])
+    @pytest.mark.parametrize("single_pass, streaming_upload", [(False, False), (True, False), (False, True)])
+    def test_run_compressed_feed(self, tmp_path, suffix, single_pass, streaming_upload, make_compressed_feed):
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        feed: Path = make_compressed_feed(feeds_dir, "feed_0", suffix)
+        uploaded: dict[str, str] = {}
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: uploaded.setdefault(file.name, file.read_text())
+        pipeline = Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            single_pass=single_pass,
+            streaming_upload=streaming_upload
+        )
+
+        pipeline.run(feed)
+
+        assert list(uploaded) == ["sample.csv", "feed.control"]
+        assert uploaded["sample.csv"] == "col1,col2\nfeed_0,val2"
+        assert not any(feeds_dir.iterdir())
+
+    def test_run_compressed_feed_checksum_not_match(self, tmp_path, make_compressed_feed):
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        feed: Path = make_compressed_feed(feeds_dir, "feed_0", ".tar.gz")
+        (feeds_dir / "feed_0.md5").write_text("foo")
+        pipeline = Pipeline(
+            uploader=Mock(),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing"
+        )
+
+        with pytest.raises(ValueError):
+            pipeline.run(feed)
+
+        assert sorted(p.name for p in (tmp_path / "failed").iterdir()) == ["feed_0.md5", "feed_0.tar.gz"]
+
+    def test_scanner_pairs_sidecar(self, tmp_path, make_compressed_feed):
+        make_compressed_feed(tmp_path, "feed_0", ".tar.gz")
+        (tmp_path / "feed_1.tar.gz").write_bytes(b"foo")
+
+        scanner = Scanner(tmp_path, r"feed_\d\.tar(\.gz|\.zst)?$", ".md5", quiet_period=10, trust_checksum_file=True)
+
+        assert [p.name for p in scanner.scan()] == ["feed_0.tar.gz"]
@@ -0,0 +1,43 @@
+import time
+from pathlib import Path
+
+from src.ubs_landing_zone.digest_index import DigestIndex
+
+class TestDigestIndex:
+    def test_add_contains(self, tmp_path):
+        index = DigestIndex(tmp_path / "index.sqlite")
+
+        index.add("md5:aaaa")
+        index.add("md5:aaaa")
+
+        assert index.contains("md5:aaaa")
+        assert not index.contains("md5:bbbb")
+        assert index.size == 1
+
+    def test_ttl(self, tmp_path, monkeypatch):
+        index = DigestIndex(tmp_path / "index.sqlite", ttl=60)
+        index.add("md5:aaaa")
+
+        now: float = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+
+        assert not index.contains("md5:aaaa")
+
+    def test_max_entries_evicts_oldest(self, tmp_path):
+        index = DigestIndex(tmp_path / "index.sqlite", max_entries=100)
+
+        for i in range(250):
+            index.add(f"md5:{i}")
+
+        assert index.size <= 101
+        assert index.contains("md5:249")
+        assert not index.contains("md5:0")
+
+    def test_survives_reopen(self, tmp_path):
+        path: Path = tmp_path / "index.sqlite"
+        DigestIndex(path).add("md5:aaaa")
+
+        index = DigestIndex(path)
+
+        assert index.contains("md5:aaaa")
+        assert index.size == 1
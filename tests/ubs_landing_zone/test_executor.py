@@ -1,10 +1,14 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
-from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.executor import Executor, FeedOrdering
 from unittest.mock import Mock
 from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.scanner import Scanner
 from pathlib import Path
 
 class TestExecutor:
@@ -57,3 +61,114 @@ class TestExecutor:
             
         assert "Tasks failed (2 sub-exceptions)" in str(exc_info.value)
         assert len(exc_info.value.exceptions) == 2
+
+
+    @pytest.mark.parametrize(
+        "ordering, expected",
+        [
+            (FeedOrdering.LARGEST_FIRST, ["c.tar", "b.tar", "a.tar"]),
+            (FeedOrdering.SMALLEST_FIRST, ["a.tar", "b.tar", "c.tar"]),
+            (FeedOrdering.OLDEST_FIRST, ["b.tar", "c.tar", "a.tar"]),
+        ]
+    )
+    def test_executor_ordering(self, tmp_path, ordering, expected):
+        for name, size, mtime in [("a.tar", 1, 300), ("b.tar", 2, 100), ("c.tar", 3, 200)]:
+            (tmp_path / name).write_bytes(b"x" * size)
+            os.utime(tmp_path / name, (mtime, mtime))
+        processed: list[str] = []
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        pipeline_mock.run = lambda feed: processed.append(feed.name)
+
+        executor = Executor(
+            pipeline=pipeline_mock,
+            directory=tmp_path,
+            file_pattern=r".*\.tar",
+            parallelism=1,
+            queue_size=0,
+            ordering=ordering
+        )
+        executor.execute_parallel()
+
+        assert processed == expected
+
+    def test_executor_streams_feeds(self, tmp_path, monkeypatch):
+        for i in range(3):
+            (tmp_path / f"feed{i}.tar").touch()
+        events: list[str] = []
+        ready = Scanner.ready
+        def listed(scanner, feed, now = None):
+            events.append(f"listed {feed.name}")
+            return ready(scanner, feed, now)
+        monkeypatch.setattr(Scanner, "ready", listed)
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        pipeline_mock.run = lambda feed: events.append(f"ran {feed.name}")
+
+        Executor(
+            pipeline=pipeline_mock,
+            directory=tmp_path,
+            file_pattern=r".*\.tar",
+            parallelism=1,
+            queue_size=0,
+            scanner=Scanner(tmp_path, r".*\.tar", ".md5")
+        ).execute_parallel()
+
+        # no ordering: the first feed runs before the rest of the directory is listed
+        listing: list[str] = [event.split()[1] for event in events if event.startswith("listed")]
+        assert len(listing) == 3
+        assert events.index(f"ran {listing[0]}") < events.index(f"listed {listing[-1]}")
+
+    def test_executor_bounded_queue(self, monkeypatch):
+        finished: list[int] = [0]
+        max_outstanding: list[int] = [0]
+        lock = threading.Lock()
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        def mock_run(feed):
+            time.sleep(0.001)
+            with lock:
+                finished[0] += 1
+        pipeline_mock.run = mock_run
+        submitted: list[int] = [0]
+        original_submit = ThreadPoolExecutor.submit
+        def counting_submit(self, fn, *args):
+            with lock:
+                submitted[0] += 1
+                max_outstanding[0] = max(max_outstanding[0], submitted[0] - finished[0])
+            return original_submit(self, fn, *args)
+        monkeypatch.setattr(ThreadPoolExecutor, "submit", counting_submit)
+        monkeypatch.setattr(os, 'listdir', lambda feed: [f"feed{i}.tar" for i in range(200)])
+
+        executor = Executor(
+            pipeline=pipeline_mock,
+            directory=Path("test_dir"),
+            file_pattern=".*",
+            parallelism=4,
+            queue_size=2
+        )
+        executor.execute_parallel()
+
+        assert submitted[0] == 200
+        assert max_outstanding[0] <= 4 + 2
+
+    def test_executor_fail_fast(self, monkeypatch):
+        processed: list[str] = []
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        def mock_run(feed):
+            processed.append(feed.name)
+            raise IOError(f"Test error {feed.name}")
+        pipeline_mock.run = mock_run
+        monkeypatch.setattr(os, 'listdir', lambda feed: [f"feed{i}.tar" for i in range(100)])
+
+        executor = Executor(
+            pipeline=pipeline_mock,
+            directory=Path("test_dir"),
+            file_pattern=".*",
+            parallelism=1,
+            queue_size=1,
+            max_failures=3
+        )
+
+        with pytest.raises(ExceptionGroup) as exc_info:
+            executor.execute_parallel()
+
+        assert 3 <= len(exc_info.value.exceptions) <= 4
+        assert len(processed) < 10
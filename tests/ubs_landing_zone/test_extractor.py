@@ -0,0 +1,73 @@
+import os
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from src.ubs_landing_zone.extractor import Extractor
+
+def tree(root: Path) -> dict[str, tuple[bytes, int, int]]:
+    return {
+        str(p.relative_to(root)): (p.read_bytes(), p.stat().st_mode, int(p.stat().st_mtime))
+        for p in sorted(root.rglob("*")) if p.is_file()
+    }
+
+members: dict[str, bytes] = {
+    "data/a.csv": b"col1,col2\nval1,val2",
+    "data/nested/b.xml": os.urandom(300 * 1024),
+    "empty.txt": b"",
+    "feed.control": b"",
+}
+
+class TestExtractor:
+    @pytest.mark.parametrize("threads", [1, 4])
+    def test_same_result_as_tarfile(self, tmp_path, threads, monkeypatch, make_tar):
+        monkeypatch.setattr(Extractor, "_CHUNK", 64 * 1024)
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+        expected: Path = tmp_path / "expected"
+        with tarfile.open(feed) as tar:
+            tar.extractall(expected, filter="data")
+        target: Path = tmp_path / "target"
+        target.mkdir()
+
+        Extractor(threads=threads).extract(feed, target)
+
+        assert tree(target) == tree(expected)
+
+    def test_sendfile_fallback(self, tmp_path, monkeypatch, make_tar):
+        def unsupported(*args):
+            raise OSError(18, "Invalid cross-device link")
+        monkeypatch.setattr(os, "copy_file_range", unsupported)
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+        target: Path = tmp_path / "target"
+        target.mkdir()
+
+        Extractor().extract(feed, target)
+
+        assert (target / "data/nested/b.xml").read_bytes() == members["data/nested/b.xml"]
+
+    @pytest.mark.parametrize("compress, symlink", [(True, None), (False, "link.csv")])
+    def test_falls_back_to_tarfile(self, tmp_path, compress, symlink, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members, compress=compress, symlink=symlink)
+        target: Path = tmp_path / "target"
+        target.mkdir()
+
+        Extractor().extract(feed, target)
+
+        assert (target / "data/a.csv").read_bytes() == members["data/a.csv"]
+        assert (target / "link.csv").is_symlink() == bool(symlink)
+
+    def test_unsafe_member_rejected_before_writing(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", {"a.csv": b"foo", "../evil.csv": b"bar"})
+        target: Path = tmp_path / "target"
+        target.mkdir()
+
+        with pytest.raises(tarfile.FilterError):
+            Extractor().extract(feed, target)
+
+        assert not (tmp_path / "evil.csv").exists()
+        assert not any(target.iterdir())
+
+    def test_invalid_threads(self):
+        with pytest.raises(ValueError):
+            Extractor(threads=0)
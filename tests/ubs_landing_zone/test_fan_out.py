@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import BinaryIO
+
+import pytest
+
+from src.ubs_landing_zone import metrics
+from src.ubs_landing_zone.fan_out import FanOutPolicy, FanOutUploader
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.uploader import Uploader
+
+class RecordingUploader(Uploader):
+    def __init__(self, fail: set[str] = frozenset(), barrier: threading.Barrier = None):
+        self.uploaded: dict[str, bytes] = {}
+        self._fail: set[str] = fail
+        self._barrier: threading.Barrier = barrier
+        self._lock: threading.Lock = threading.Lock()
+
+    def upload(self, file: Path) -> None:
+        with open(file, "rb") as f:
+            self.upload_stream(f, file.name)
+
+    def upload_stream(self, stream: BinaryIO, blob_name: str) -> None:
+        if self._barrier:
+            # every destination has to be uploading the same file at the same time
+            self._barrier.wait(timeout=5)
+        if Path(blob_name).name in self._fail:
+            raise IOError(f"FOO-ERROR {blob_name}")
+        content: bytes = stream.read()
+        with self._lock:
+            self.uploaded[Path(blob_name).name] = content
+
+class TestFanOut:
+    @pytest.fixture
+    def feeds_dir(self, tmp_path: Path) -> Path:
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        return feeds_dir
+
+    def _pipeline(self, tmp_path: Path, uploader: Uploader, **kwargs) -> Pipeline:
+        return Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            **kwargs
+        )
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{}, {"upload_concurrency": 4}, {"batch_upload": True}, {"streaming_upload": True}, {"single_pass": True}]
+    )
+    def test_run_uploads_to_every_destination(self, tmp_path, feeds_dir, kwargs, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        primary, dr = RecordingUploader(), RecordingUploader()
+        pipeline: Pipeline = self._pipeline(tmp_path, FanOutUploader({"primary": primary, "dr": dr}), **kwargs)
+
+        pipeline.run(feed)
+
+        for destination in (primary, dr):
+            assert list(destination.uploaded) == ["sample.csv", "feed.control"]
+            assert destination.uploaded["sample.csv"] == b"col1,col2\nfeed_0,val2"
+        assert not feed.exists()
+
+    @pytest.mark.parametrize("streaming_upload", [False, True])
+    def test_destinations_upload_concurrently(self, tmp_path, feeds_dir, streaming_upload, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        barrier: threading.Barrier = threading.Barrier(2)
+        primary, dr = RecordingUploader(barrier=barrier), RecordingUploader(barrier=barrier)
+        pipeline: Pipeline = self._pipeline(
+            tmp_path, FanOutUploader({"primary": primary, "dr": dr}), streaming_upload=streaming_upload
+        )
+
+        pipeline.run(feed)
+
+        assert primary.uploaded == dr.uploaded
+
+    def test_all_policy_fails_feed(self, tmp_path, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        primary, dr = RecordingUploader(), RecordingUploader(fail={"sample.csv"})
+        pipeline: Pipeline = self._pipeline(tmp_path, FanOutUploader({"primary": primary, "dr": dr}))
+        failed: float = metrics.DESTINATION_UPLOADS.value(destination="dr", result="failed")
+
+        with pytest.raises(IOError) as exc_info:
+            pipeline.run(feed)
+
+        assert "to 1 of 2 destination(s): dr: FOO-ERROR" in str(exc_info.value)
+        assert "feed.control" not in primary.uploaded and "feed.control" not in dr.uploaded
+        assert metrics.DESTINATION_UPLOADS.value(destination="dr", result="failed") == failed + 1
+        assert (tmp_path / "failed" / feed.name).exists()
+
+    @pytest.mark.parametrize("streaming_upload", [False, True])
+    def test_primary_policy_drops_secondary(self, tmp_path, feeds_dir, streaming_upload, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        primary, dr = RecordingUploader(), RecordingUploader(fail={"sample.csv"})
+        fan_out: FanOutUploader = FanOutUploader({"primary": primary, "dr": dr}, policy=FanOutPolicy.PRIMARY)
+        pipeline: Pipeline = self._pipeline(tmp_path, fan_out, streaming_upload=streaming_upload)
+        dropped: float = metrics.DESTINATION_FEEDS_DROPPED.value(destination="dr")
+
+        pipeline.run(feed)
+
+        assert list(primary.uploaded) == ["sample.csv", "feed.control"]
+        # a destination that missed a data file never gets the control file
+        assert dr.uploaded == {}
+        assert metrics.DESTINATION_FEEDS_DROPPED.value(destination="dr") == dropped + 1
+
+        # dropped for that feed only
+        feed = make_feed(feeds_dir, "feed_1")
+        dr._fail = set()
+        pipeline.run(feed)
+        assert list(dr.uploaded) == ["sample.csv", "feed.control"]
+
+    def test_primary_policy_primary_failed(self, tmp_path, feeds_dir, make_feed):
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        primary, dr = RecordingUploader(fail={"sample.csv"}), RecordingUploader()
+        fan_out: FanOutUploader = FanOutUploader({"primary": primary, "dr": dr}, policy=FanOutPolicy.PRIMARY)
+
+        with pytest.raises(IOError):
+            self._pipeline(tmp_path, fan_out).run(feed)
+
+        assert "feed.control" not in dr.uploaded
+
+    def test_upload_async(self, tmp_path):
+        file: Path = tmp_path / "sample.csv"
+        file.write_text("foo")
+        primary, dr = RecordingUploader(), RecordingUploader(fail={"sample.csv"})
+        feed_fan_out = FanOutUploader({"primary": primary, "dr": dr}, policy=FanOutPolicy.PRIMARY).for_feed(tmp_path / "feed_0.tar")
+
+        asyncio.run(feed_fan_out.upload_async(file))
+        asyncio.run(feed_fan_out.upload_async(file))
+
+        assert primary.uploaded == {"sample.csv": b"foo"}
+        assert feed_fan_out._active() == ["primary"]
+
+    def test_no_destination(self):
+        with pytest.raises(ValueError):
+            FanOutUploader({})
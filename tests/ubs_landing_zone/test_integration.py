@@ -45,6 +45,9 @@ class TestIntegration:
         
         main()
 
+        assert not any(base_dirs["landing_zone"].iterdir())
+        assert not base_dirs["failed"].exists() or not any(base_dirs["failed"].iterdir())
+
     def test_ok_100_feeds(self, env_vars, base_dirs, monkeypatch):
         shutil.copytree(
             self.resource_dir / "OK_100_feeds",
@@ -58,6 +61,9 @@ class TestIntegration:
 
         main()
 
+        assert not any(base_dirs["landing_zone"].iterdir())
+        assert not base_dirs["failed"].exists() or not any(base_dirs["failed"].iterdir())
+
     def test_ok_3_feeds_not_ok_3_feeds(self, env_vars, base_dirs, monkeypatch):
         shutil.copytree(
             self.resource_dir / "OK_3_feeds_NOT_OK_3_feeds",
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from src.ubs_landing_zone.journal import UploadJournal
+
+class TestUploadJournal:
+    def test_record_and_forget(self, tmp_path):
+        journal = UploadJournal(tmp_path / "state" / "journal.sqlite")
+
+        journal.record("md5:aaaa", "sample.csv")
+        journal.record("md5:aaaa", "sample.xml")
+        journal.record("md5:aaaa", "sample.xml")
+        journal.record("md5:bbbb", "sample.csv")
+
+        assert journal.uploaded("md5:aaaa") == {"sample.csv", "sample.xml"}
+        assert journal.uploaded("md5:cccc") == set()
+
+        journal.forget("md5:aaaa")
+
+        assert journal.uploaded("md5:aaaa") == set()
+        assert journal.uploaded("md5:bbbb") == {"sample.csv"}
+        journal.close()
+
+    def test_survives_reopen(self, tmp_path):
+        path: Path = tmp_path / "journal.sqlite"
+        journal = UploadJournal(path)
+        journal.record("md5:aaaa", "sample.csv")
+        journal.close()
+
+        assert UploadJournal(path).uploaded("md5:aaaa") == {"sample.csv"}
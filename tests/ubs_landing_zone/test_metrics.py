@@ -0,0 +1,81 @@
+import urllib.request
+from pathlib import Path
+from unittest.mock import Mock
+
+from src.ubs_landing_zone import metrics
+from src.ubs_landing_zone.metrics import Registry
+from src.ubs_landing_zone.pipeline import Pipeline
+
+class TestMetrics:
+    def test_render(self):
+        registry = Registry()
+        counter = registry.counter("foo_total", "Foo", ("result",))
+        gauge = registry.gauge("bar", "Bar")
+        histogram = registry.histogram("baz_seconds", "Baz", buckets=(0.1, 1))
+
+        counter.inc(result="ok")
+        counter.inc(2, result="ok")
+        gauge.inc()
+        with gauge.track():
+            assert gauge.value() == 2
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text: str = registry.render()
+        assert "# TYPE foo_total counter\nfoo_total{result=\"ok\"} 3\n" in text
+        assert "bar 1\n" in text
+        assert 'baz_seconds_bucket{le="0.1"} 1\n' in text
+        assert 'baz_seconds_bucket{le="1"} 2\n' in text
+        assert 'baz_seconds_bucket{le="+Inf"} 3\n' in text
+        assert "baz_seconds_sum 5.55\n" in text
+        assert "baz_seconds_count 3\n" in text
+
+    def test_write_textfile(self, tmp_path):
+        registry = Registry()
+        registry.counter("foo_total", "Foo").inc()
+        path: Path = tmp_path / "textfile" / "ubs.prom"
+
+        registry.write_textfile(path)
+
+        assert "foo_total 1" in path.read_text()
+        assert [f.name for f in path.parent.iterdir()] == ["ubs.prom"]
+
+    def test_serve(self):
+        registry = Registry()
+        registry.gauge("bar", "Bar").set(7)
+        server = registry.serve(0)
+
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                body: str = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert "bar 7" in body
+
+    def test_pipeline_stages_recorded(self, tmp_path, make_feed):
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        stages: list[str] = ["verify_checksum", "unpack", "verify_feed_content", "order_feed_content", "upload", "delete"]
+        before: dict[str, int] = {stage: metrics.STAGE_SECONDS.count(stage=stage) for stage in stages}
+        files_before: float = metrics.FILES_UPLOADED.value()
+        bytes_before: float = metrics.BYTES_UPLOADED.value()
+        ok_before: float = metrics.FEEDS.value(result="ok")
+        pipeline = Pipeline(
+            uploader=Mock(),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing"
+        )
+
+        pipeline.run(feed)
+
+        for stage in stages:
+            assert metrics.STAGE_SECONDS.count(stage=stage) > before[stage], stage
+        assert metrics.FILES_UPLOADED.value() - files_before == 2
+        assert metrics.BYTES_UPLOADED.value() - bytes_before == len("col1,col2\nfeed_0,val2")
+        assert metrics.FEEDS.value(result="ok") - ok_before == 1
@@ -1,14 +1,37 @@
+import asyncio
 import os
 from pathlib import Path
 from unittest.mock import Mock, mock_open
 import pytest
 import tarfile
+import threading
+import time
 from src.ubs_landing_zone.az_copy import AzCopy
+from src.ubs_landing_zone.digest_index import DigestIndex, DuplicatePolicy
+from src.ubs_landing_zone.extractor import Extractor
+from src.ubs_landing_zone.journal import UploadJournal
 from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.uploader import Uploader
+from src.ubs_landing_zone.validator import FeedValidator
 import hashlib
 
 checksum_algorithm: str = "md5"
 
+class LocalDestination(Uploader):
+    def __init__(self, root: Path):
+        self.root: Path = root
+        self.uploaded: list[str] = []
+
+    def upload(self, file: Path) -> None:
+        with open(file, "rb") as f:
+            self.upload_stream(f, file.name)
+
+    def upload_stream(self, stream, blob_name: str) -> None:
+        target: Path = self.root / blob_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(stream.read())
+        self.uploaded.append(blob_name)
+
 @pytest.fixture
 def pipeline(
     tmp_path: Path,
@@ -16,7 +39,7 @@ def pipeline(
     algorithm: str = checksum_algorithm,
 ) -> Pipeline:
     return Pipeline(
-            az_copy=Mock(),
+            uploader=Mock(),
             checksum_extension=checksum_extension,
             algorithm=algorithm,
             failed_dir=tmp_path / "failed",
@@ -120,6 +143,32 @@ class TestPipeline:
             pipeline._verify_checksum(feed_path)
         assert "Checksum doesn't match" in str(exc_info.value)
 
+    @pytest.mark.parametrize("checksum_buffer_size", [1, 7, 512, 1024 * 1024])
+    def test_verify_checksum_chunked_successful(self, az_copy_mock, base_dirs, checksum_buffer_size):
+        pipeline = Pipeline(
+            uploader=az_copy_mock,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            checksum_buffer_size=checksum_buffer_size
+        )
+        valid_feed_tar: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+
+        pipeline._verify_checksum(valid_feed_tar)
+
+    def test_invalid_checksum_buffer_size(self, az_copy_mock, base_dirs):
+        with pytest.raises(ValueError) as exc_info:
+            Pipeline(
+                uploader=az_copy_mock,
+                checksum_extension=".md5",
+                algorithm=checksum_algorithm,
+                failed_dir=base_dirs["failed_dir"],
+                processing_dir=base_dirs["processing_dir"],
+                checksum_buffer_size=0
+            )
+        assert "Checksum buffer size must be positive" in str(exc_info.value)
+
     @pytest.mark.parametrize(
         "checksum_extension, algorithm",
         [
@@ -128,7 +177,7 @@ class TestPipeline:
     )
     def test_unpack_successful(self, az_copy_mock, base_dirs, checksum_extension, algorithm):
         pipeline = Pipeline(
-            az_copy=az_copy_mock,
+            uploader=az_copy_mock,
             checksum_extension=checksum_extension,
             algorithm=algorithm,
             failed_dir=base_dirs["failed_dir"],
@@ -143,6 +192,22 @@ class TestPipeline:
         assert temp_dir.is_dir()
         assert len(list(temp_dir.iterdir())) == 3
 
+    def test_unpack_with_extractor(self, az_copy_mock, base_dirs):
+        pipeline = Pipeline(
+            uploader=az_copy_mock,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            extractor=Extractor(threads=2)
+        )
+        valid_feed_tar: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+
+        temp_dir: Path = pipeline._unpack(valid_feed_tar)
+
+        assert sorted(f.name for f in temp_dir.iterdir()) == ["control.control", "sample.csv", "sample.xml"]
+        assert (temp_dir / "sample.csv").read_text() == "col1,col2\nval1,val2"
+
     @pytest.mark.parametrize(
         "checksum_extension, algorithm",
         [
@@ -151,7 +216,7 @@ class TestPipeline:
     )
     def test_unpack_failed(self, az_copy_mock, base_dirs, checksum_extension, algorithm):
         pipeline = Pipeline(
-            az_copy=az_copy_mock,
+            uploader=az_copy_mock,
             checksum_extension=checksum_extension,
             algorithm=algorithm,
             failed_dir=base_dirs["failed_dir"],
@@ -167,6 +232,58 @@ class TestPipeline:
 
         assert "Corrupted archive (feed), cannot extract" in str(exc_info.value)
 
+    @pytest.fixture
+    def single_pass_pipeline(self, az_copy_mock, base_dirs) -> Pipeline:
+        return Pipeline(
+            uploader=az_copy_mock,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            checksum_buffer_size=100,
+            single_pass=True
+        )
+
+    def test_verify_and_unpack_successful(self, single_pass_pipeline, base_dirs):
+        valid_feed_tar: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+
+        unpacked_dir: Path = single_pass_pipeline._verify_and_unpack(valid_feed_tar)
+
+        assert sorted(f.name for f in unpacked_dir.iterdir()) == ["control.control", "sample.csv", "sample.xml"]
+        assert [d.name for d in base_dirs["processing_dir"].iterdir()] == [unpacked_dir.name]
+
+    def test_verify_and_unpack_checksum_not_match_error(self, single_pass_pipeline, base_dirs):
+        valid_feed_tar: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        valid_feed_tar.with_suffix(".md5").write_text("aaaa")
+
+        with pytest.raises(ValueError) as exc_info:
+            single_pass_pipeline._verify_and_unpack(valid_feed_tar)
+
+        assert "Checksum doesn't match" in str(exc_info.value)
+        assert not any(base_dirs["processing_dir"].iterdir())
+
+    def test_verify_and_unpack_corrupted_archive_error(self, single_pass_pipeline, base_dirs):
+        invalid_feed_tar: Path = base_dirs["feeds_dir"] / "invalid_feed.tar"
+        invalid_feed_tar.write_bytes(b"not a tar archive")
+        invalid_feed_tar.with_suffix(".md5").write_text(hashlib.md5(b"not a tar archive").hexdigest())
+
+        with pytest.raises(IOError) as exc_info:
+            single_pass_pipeline._verify_and_unpack(invalid_feed_tar)
+
+        assert "Corrupted archive (feed), cannot extract" in str(exc_info.value)
+        assert not base_dirs["processing_dir"].exists() or not any(base_dirs["processing_dir"].iterdir())
+
+    def test_run_single_pass_checksum_not_match(self, single_pass_pipeline, base_dirs):
+        feed_path: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        feed_path.with_suffix(".md5").write_text("aaaa")
+
+        with pytest.raises(ValueError):
+            single_pass_pipeline.run(feed_path)
+
+        assert (base_dirs["failed_dir"] / feed_path.name).exists()
+        assert (base_dirs["failed_dir"] / feed_path.with_suffix(".md5").name).exists()
+        assert single_pass_pipeline._uploader.upload.call_count == 0
+
     @pytest.mark.parametrize(
         "file_list",
         [
@@ -185,6 +302,13 @@ class TestPipeline:
         assert len(ret) == len(file_list)
         assert ret[-1].suffix == ".control"
 
+    def test_order_feed_content_skips_apple_double_control(self, pipeline, monkeypatch):
+        monkeypatch.setattr(os, "listdir", lambda path: ["._control.control", "control.control", "._file1.csv", "file1.csv"])
+
+        ret: list[Path] = pipeline._order_feed_content(Path("/path/to/unpacked"), Path("test_feed.tar"))
+
+        assert [f.name for f in ret] == ["file1.csv", "control.control"]
+
     @pytest.mark.parametrize(
         "file_list",
         [
@@ -210,21 +334,103 @@ class TestPipeline:
     )
     def test_upload_successful(self, pipeline, file_list):
         feed_path = Path("test_feed.tar")
-        pipeline._az_copy.upload.return_value = None
+        pipeline._uploader.upload.return_value = None
 
         pipeline._upload(file_list, feed_path)
 
-        assert pipeline._az_copy.upload.call_count == len(file_list)
+        assert pipeline._uploader.upload.call_count == len(file_list)
 
     def test_upload_failed(self, pipeline):
         file_list: list[Path] = [Path("file1"), Path("file2")]
         feed_path: Path = Path("test_feed.tar")
-        pipeline._az_copy.upload.side_effect = lambda file: exec('raise IOError(f"FOO-ERROR")')
+        pipeline._uploader.upload.side_effect = lambda file: exec('raise IOError(f"FOO-ERROR")')
 
         with pytest.raises(IOError) as exc_info:
             pipeline._upload(file_list, feed_path)
         assert f"Upload failed for {file_list[0]}, in feed: {feed_path}" in str(exc_info.value)
 
+    @pytest.mark.parametrize(
+        "file_list, expected_batches",
+        [
+            ([], []),
+            ([Path("control.control")], [["control.control"]]),
+            ([Path("file1"), Path("file2"), Path("control.control")], [["file1", "file2"], ["control.control"]]),
+        ]
+    )
+    def test_upload_batch_successful(self, pipeline, file_list, expected_batches):
+        pipeline._batch_upload = True
+        feed_path = Path("test_feed.tar")
+
+        pipeline._upload(file_list, feed_path)
+
+        batches = [[f.name for f in call.args[0]] for call in pipeline._uploader.upload_batch.call_args_list]
+        assert batches == expected_batches
+        assert pipeline._uploader.upload.call_count == 0
+
+    def test_upload_batch_failed_skips_control(self, pipeline):
+        pipeline._batch_upload = True
+        file_list: list[Path] = [Path("file1"), Path("file2"), Path("control.control")]
+        pipeline._uploader.upload_batch.side_effect = IOError("FOO-ERROR")
+
+        with pytest.raises(IOError) as exc_info:
+            pipeline._upload(file_list, Path("test_feed.tar"))
+
+        assert "Upload failed for ['file1', 'file2']" in str(exc_info.value)
+        assert pipeline._uploader.upload_batch.call_count == 1
+
+    def test_upload_concurrently_control_last(self, pipeline):
+        pipeline._upload_concurrency = 4
+        file_list: list[Path] = [Path(f"file{i}") for i in range(20)] + [Path("control.control")]
+        uploaded: list[str] = []
+        lock = threading.Lock()
+        def upload(file: Path):
+            time.sleep(0.001)
+            with lock:
+                uploaded.append(file.name)
+        pipeline._uploader.upload.side_effect = upload
+
+        pipeline._upload(file_list, Path("test_feed.tar"))
+
+        assert len(uploaded) == len(file_list)
+        assert uploaded[-1] == "control.control"
+
+    def test_upload_concurrently_failed_skips_control(self, pipeline):
+        pipeline._upload_concurrency = 4
+        file_list: list[Path] = [Path(f"file{i}") for i in range(20)] + [Path("control.control")]
+        uploaded: list[str] = []
+        def upload(file: Path):
+            if file.name == "file7":
+                raise IOError("FOO-ERROR")
+            uploaded.append(file.name)
+        pipeline._uploader.upload.side_effect = upload
+
+        with pytest.raises(IOError) as exc_info:
+            pipeline._upload(file_list, Path("test_feed.tar"))
+
+        assert "Upload failed for file7" in str(exc_info.value)
+        assert "control.control" not in uploaded
+
+    def test_upload_async_failed_waits_for_cancelled_uploads(self, pipeline):
+        pipeline._upload_concurrency = 4
+        file_list: list[Path] = [Path(f"file{i}") for i in range(4)] + [Path("control.control")]
+        finished: list[str] = []
+        async def upload_async(file: Path):
+            try:
+                if file.name == "file0":
+                    raise IOError("FOO-ERROR")
+                await asyncio.sleep(10)
+            finally:
+                finished.append(file.name)
+        pipeline._uploader.upload_async.side_effect = upload_async
+
+        async def run() -> list[str]:
+            with pytest.raises(IOError):
+                await pipeline._upload_async(file_list, Path("test_feed.tar"))
+            # nothing may still be reading the unpacked dir once the failure surfaces
+            return list(finished)
+
+        assert sorted(asyncio.run(run())) == ["file0", "file1", "file2", "file3"]
+
     def test_run_failed_first_step(self, pipeline, monkeypatch):
         feed_path = Path("test_feed.tar")
         
@@ -241,7 +447,7 @@ class TestPipeline:
         az_copy_mock.upload.side_effect = lambda file: exec('raise IOError(f"FOO-ERROR")')
         
         pipeline = Pipeline(
-            az_copy=az_copy_mock,
+            uploader=az_copy_mock,
             checksum_extension=".md5",
             algorithm=checksum_algorithm,
             failed_dir=base_dirs["failed_dir"],
@@ -258,4 +464,217 @@ class TestPipeline:
         assert not feed_path.with_suffix(pipeline._checksum_extension).exists()
         assert not any(pipeline._processing_dir.iterdir())
 
-        
+    def test_run_streaming_upload_successful(self, base_dirs, tmp_path):
+        feed_path: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        destination: LocalDestination = LocalDestination(tmp_path / "destination")
+        pipeline = Pipeline(
+            uploader=destination,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            streaming_upload=True
+        )
+
+        pipeline.run(feed_path)
+
+        assert sorted(destination.uploaded) == ["control.control", "sample.csv", "sample.xml"]
+        assert destination.uploaded[-1] == "control.control"
+        assert (destination.root / "sample.csv").read_text() == 'col1,col2\nval1,val2'
+        assert not base_dirs["processing_dir"].exists()
+        assert not feed_path.exists()
+
+    def test_run_single_pass_streaming_upload_checksum_not_match(self, base_dirs, tmp_path):
+        feed_path: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        feed_path.with_suffix(".md5").write_text("aaaa")
+        destination: LocalDestination = LocalDestination(tmp_path / "destination")
+        pipeline = Pipeline(
+            uploader=destination,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            single_pass=True,
+            streaming_upload=True
+        )
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline.run(feed_path)
+
+        assert "Checksum doesn't match" in str(exc_info.value)
+        assert destination.uploaded == []
+        assert (base_dirs["failed_dir"] / feed_path.name).exists()
+
+    def test_run_streaming_upload_missing_control(self, base_dirs, tmp_path):
+        sample_csv: Path = base_dirs["feeds_dir"] / "sample.csv"
+        sample_csv.write_text('col1,col2\nval1,val2')
+        feed_path: Path = base_dirs["feeds_dir"] / "feed.tar"
+        with tarfile.open(feed_path, 'w') as tar:
+            tar.add(sample_csv, arcname=sample_csv.name)
+        destination: LocalDestination = LocalDestination(tmp_path / "destination")
+        pipeline = Pipeline(
+            uploader=destination,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            streaming_upload=True
+        )
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline.run(feed_path)
+
+        assert "No control file" in str(exc_info.value)
+        assert destination.uploaded == []
+        assert (base_dirs["failed_dir"] / feed_path.name).exists()
+
+    upload_modes: list[dict] = [
+        {},
+        {"validator": FeedValidator()},
+        {"batch_upload": True},
+        {"upload_concurrency": 2},
+        {"streaming_upload": True},
+        {"streaming_upload": True, "validator": FeedValidator()}
+    ]
+
+    @pytest.mark.parametrize("kwargs", upload_modes)
+    def test_run_nested_feed_lands_flat(self, base_dirs, tmp_path, kwargs, make_tar):
+        feed_path: Path = make_tar(
+            base_dirs["feeds_dir"] / "feed.tar",
+            {"sample.csv": b"col1,col2", "data/sample.xml": b"<root/>", "control.control": b""}
+        )
+        destination: LocalDestination = LocalDestination(tmp_path / "destination")
+        pipeline = Pipeline(
+            uploader=destination,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            **kwargs
+        )
+
+        pipeline.run(feed_path)
+
+        assert sorted(destination.uploaded) == ["control.control", "sample.csv", "sample.xml"]
+        assert destination.uploaded[-1] == "control.control"
+        assert (destination.root / "sample.xml").read_bytes() == b"<root/>"
+
+    @pytest.mark.parametrize("kwargs", upload_modes)
+    def test_run_nested_feed_duplicate_names(self, base_dirs, tmp_path, kwargs, make_tar):
+        feed_path: Path = make_tar(
+            base_dirs["feeds_dir"] / "feed.tar",
+            {"sample.csv": b"col1,col2", "data/sample.csv": b"col3,col4", "control.control": b""}
+        )
+        destination: LocalDestination = LocalDestination(tmp_path / "destination")
+        pipeline = Pipeline(
+            uploader=destination,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            **kwargs
+        )
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline.run(feed_path)
+
+        assert "Duplicate file name 'sample.csv'" in str(exc_info.value)
+        assert destination.uploaded == []
+        assert (base_dirs["failed_dir"] / feed_path.name).exists()
+
+    def test_order_archive_members_skips_apple_double_and_directories(self, pipeline):
+        members: list[tarfile.TarInfo] = []
+        for name, type in [(".", tarfile.DIRTYPE), ("./._control.control", tarfile.REGTYPE), ("./control.control", tarfile.REGTYPE), ("./sample.csv", tarfile.REGTYPE)]:
+            member = tarfile.TarInfo(name)
+            member.type = type
+            members.append(member)
+
+        ordered = pipeline._order_archive_members(members, Path("test_feed.tar"))
+
+        assert [blob_name for _, blob_name in ordered] == ["sample.csv", "control.control"]
+
+    def test_order_archive_members_unsafe_path(self, pipeline):
+        member = tarfile.TarInfo("../../etc/passwd.control")
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline._order_archive_members([member], Path("test_feed.tar"))
+        assert "Unsafe member" in str(exc_info.value)
+
+    @pytest.mark.parametrize("streaming_upload", [False, True])
+    def test_run_resumes_from_journal(self, base_dirs, tmp_path, streaming_upload):
+        feed_path: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        journal = UploadJournal(tmp_path / "journal.sqlite")
+        uploaded: list[str] = []
+        def upload(name: str):
+            if len(uploaded) == 1:
+                raise IOError("FOO-ERROR")
+            uploaded.append(name)
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: upload(file.name)
+        uploader.upload_stream.side_effect = lambda stream, blob_name: upload(blob_name)
+        pipeline = Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            streaming_upload=streaming_upload,
+            journal=journal
+        )
+
+        with pytest.raises(IOError):
+            pipeline.run(feed_path)
+        assert len(uploaded) == 1
+        feed_digest: str = f"md5:{(base_dirs['failed_dir'] / 'feed.md5').read_text()}"
+        assert journal.uploaded(feed_digest) == set(uploaded)
+
+        # manual retry from failed_dir
+        for f in base_dirs["failed_dir"].iterdir():
+            f.rename(base_dirs["feeds_dir"] / f.name)
+        uploader.upload.side_effect = lambda file: uploaded.append(file.name)
+        uploader.upload_stream.side_effect = lambda stream, blob_name: uploaded.append(blob_name)
+
+        pipeline.run(feed_path)
+
+        assert sorted(uploaded) == ["control.control", "sample.csv", "sample.xml"]
+        assert uploaded[-1] == "control.control"
+        assert journal.uploaded(feed_digest) == set()
+
+    @pytest.mark.parametrize("duplicate_policy", [DuplicatePolicy.LOG, DuplicatePolicy.DELETE, DuplicatePolicy.MOVE])
+    def test_run_skips_duplicate_feed(self, az_copy_mock, base_dirs, tmp_path, duplicate_policy):
+        feed_path: Path = self._prepare_valid_feed(base_dirs["feeds_dir"])
+        redelivered: Path = base_dirs["feeds_dir"] / "redelivered.tar"
+        redelivered.write_bytes(feed_path.read_bytes())
+        redelivered.with_suffix(".md5").write_text(feed_path.with_suffix(".md5").read_text())
+        pipeline = Pipeline(
+            uploader=az_copy_mock,
+            checksum_extension=".md5",
+            algorithm=checksum_algorithm,
+            failed_dir=base_dirs["failed_dir"],
+            processing_dir=base_dirs["processing_dir"],
+            digest_index=DigestIndex(tmp_path / "index.sqlite"),
+            duplicate_policy=duplicate_policy,
+            duplicates_dir=tmp_path / "duplicates"
+        )
+
+        pipeline.run(feed_path)
+        assert az_copy_mock.upload.call_count == 3
+
+        pipeline.run(redelivered)
+
+        assert az_copy_mock.upload.call_count == 3
+        assert redelivered.exists() == (duplicate_policy == DuplicatePolicy.LOG)
+        assert (tmp_path / "duplicates" / redelivered.name).exists() == (duplicate_policy == DuplicatePolicy.MOVE)
+        assert not base_dirs["failed_dir"].exists()
+
+    def test_move_duplicate_policy_requires_dir(self, az_copy_mock, base_dirs, tmp_path):
+        with pytest.raises(ValueError):
+            Pipeline(
+                uploader=az_copy_mock,
+                checksum_extension=".md5",
+                algorithm=checksum_algorithm,
+                failed_dir=base_dirs["failed_dir"],
+                processing_dir=base_dirs["processing_dir"],
+                digest_index=DigestIndex(tmp_path / "index.sqlite"),
+                duplicate_policy=DuplicatePolicy.MOVE
+            )
@@ -0,0 +1,60 @@
+import pstats
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.profiling import FeedProfiler
+
+class TestFeedProfiler:
+    def test_profiles_pipeline_run(self, tmp_path, make_feed):
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        feed: Path = make_feed(feeds_dir, "feed_0")
+        profile_dir: Path = tmp_path / "profiles"
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: time.sleep(0.05)
+        pipeline = Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            profiler=FeedProfiler(profile_dir, cpu=True, memory=True, sample_interval=0.001)
+        )
+
+        pipeline.run(feed)
+
+        [prof] = profile_dir.glob("feed_0.tar.*.prof")
+        stats: pstats.Stats = pstats.Stats(str(prof))
+        assert any(name == "_verify_checksum" for _, _, name in stats.stats)
+        [collapsed] = profile_dir.glob("feed_0.tar.*.collapsed")
+        assert "Pipeline._upload_file" in collapsed.read_text()
+        [allocations] = profile_dir.glob("feed_0.tar.*.allocations.txt")
+        assert allocations.read_text().startswith("feed: feed_0.tar, traced memory")
+
+    @pytest.mark.parametrize(
+        "every, pattern, expected",
+        [
+            (1, None, ["a_1.tar", "a_2.tar", "b_3.tar", "a_4.tar"]),
+            (2, None, ["a_1.tar", "b_3.tar"]),
+            (1, r"^a_", ["a_1.tar", "a_2.tar", "a_4.tar"]),
+            (2, r"^a_", ["a_1.tar", "a_4.tar"]),
+        ]
+    )
+    def test_sampling(self, tmp_path, every, pattern, expected):
+        profiler = FeedProfiler(tmp_path, every=every, pattern=pattern)
+
+        selected: list[str] = [name for name in ["a_1.tar", "a_2.tar", "b_3.tar", "a_4.tar"] if profiler.selected(Path(name))]
+
+        assert selected == expected
+
+    def test_not_selected_writes_nothing(self, tmp_path):
+        profiler = FeedProfiler(tmp_path / "profiles", pattern=r"^never")
+
+        with profiler.profile(Path("feed.tar")):
+            pass
+
+        assert not (tmp_path / "profiles").exists()
@@ -0,0 +1,145 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone import metrics, retry
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.retry import RetryPolicy
+from src.ubs_landing_zone.uploader import UploadError
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    slept: list[float] = []
+    monkeypatch.setattr(retry.time, "sleep", slept.append)
+    # upper bound of the jitter range
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    return slept
+
+def failing(errors: list[Exception]) -> Mock:
+    # raises the given errors in turn, then succeeds
+    return Mock(side_effect=[*errors, "ok"])
+
+class TestRetryPolicy:
+    def test_recovers_with_exponential_backoff(self, sleeps):
+        policy: RetryPolicy = RetryPolicy(retries=3, base_delay=1, max_delay=3)
+        operation: Mock = failing([UploadError("FOO-ERROR", retryable=True)] * 3)
+        recovered: float = metrics.UPLOAD_RETRIES.value(outcome="recovered")
+
+        assert policy.call(operation, "sample.csv") == "ok"
+
+        assert sleeps == [1, 2, 3]
+        assert metrics.UPLOAD_RETRIES.value(outcome="recovered") == recovered + 1
+
+    def test_exhausted(self, sleeps):
+        policy: RetryPolicy = RetryPolicy(retries=2)
+        operation: Mock = failing([UploadError("FOO-ERROR", retryable=True)] * 3)
+
+        with pytest.raises(UploadError):
+            policy.call(operation, "sample.csv")
+
+        assert operation.call_count == 3
+
+    @pytest.mark.parametrize("error", [UploadError("FOO-ERROR"), IOError("FOO-ERROR"), ValueError("FOO-ERROR")])
+    def test_fatal_not_retried(self, sleeps, error):
+        operation: Mock = failing([error])
+
+        with pytest.raises(type(error)):
+            RetryPolicy().call(operation, "sample.csv")
+
+        assert operation.call_count == 1 and sleeps == []
+
+    def test_budget_shared_across_files(self, sleeps):
+        policy: RetryPolicy = RetryPolicy(retries=3, budget=2, budget_ratio=0.5)
+        exhausted: float = metrics.UPLOAD_RETRIES.value(outcome="budget_exhausted")
+
+        policy.call(failing([UploadError("FOO-ERROR", retryable=True)] * 2), "sample.csv")
+        with pytest.raises(UploadError):
+            policy.call(failing([UploadError("FOO-ERROR", retryable=True)]), "sample.xml")
+        assert metrics.UPLOAD_RETRIES.value(outcome="budget_exhausted") == exhausted + 1
+
+        # successful uploads earn retries back
+        policy.call(Mock(), "a.csv")
+        policy.call(Mock(), "b.csv")
+        assert policy.call(failing([UploadError("FOO-ERROR", retryable=True)]), "sample.xml") == "ok"
+
+    def test_call_async(self, monkeypatch):
+        async def no_sleep(delay: float) -> None:
+            pass
+        monkeypatch.setattr(retry.asyncio, "sleep", no_sleep)
+        attempts: list[int] = []
+        async def operation() -> str:
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise UploadError("FOO-ERROR", retryable=True)
+            return "ok"
+
+        assert asyncio.run(RetryPolicy().call_async(operation, "sample.csv")) == "ok"
+        assert len(attempts) == 2
+
+    def test_delay_jittered_and_capped(self):
+        policy: RetryPolicy = RetryPolicy(base_delay=1, max_delay=10)
+
+        delays: list[float] = [policy.delay(10) for _ in range(100)]
+
+        assert all(0 <= delay <= 10 for delay in delays)
+        assert len(set(delays)) > 1
+
+    @pytest.mark.parametrize("kwargs", [{"retries": -1}, {"base_delay": 2, "max_delay": 1}, {"budget": -1}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            RetryPolicy(**kwargs)
+
+class TestPipelineRetry:
+    def _pipeline(self, tmp_path: Path, uploader, **kwargs) -> Pipeline:
+        return Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            retry=RetryPolicy(),
+            **kwargs
+        )
+
+    @pytest.mark.parametrize("kwargs", [{}, {"upload_concurrency": 2}, {"batch_upload": True}])
+    def test_transient_failure_does_not_fail_feed(self, tmp_path, sleeps, kwargs, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        uploader = Mock()
+        uploader.upload.side_effect = [UploadError("FOO-ERROR", retryable=True), None, None]
+        uploader.upload_batch.side_effect = [UploadError("FOO-ERROR", retryable=True), None, None]
+
+        self._pipeline(tmp_path, uploader, **kwargs).run(feed)
+
+        assert not feed.exists()
+        assert not (tmp_path / "failed" / feed.name).exists()
+        assert len(sleeps) == 1
+
+    def test_stream_reread_on_retry(self, tmp_path, sleeps, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        uploaded: dict[str, bytes] = {}
+        def upload_stream(stream, blob_name: str) -> None:
+            content: bytes = stream.read()
+            if blob_name not in uploaded:
+                # partly sent before the connection dropped
+                uploaded[blob_name] = b""
+                raise UploadError("FOO-ERROR", retryable=True)
+            uploaded[blob_name] = content
+        uploader = Mock()
+        uploader.upload_stream.side_effect = upload_stream
+
+        self._pipeline(tmp_path, uploader, streaming_upload=True).run(feed)
+
+        assert uploaded["sample.csv"] == b"col1,col2\nfeed_0,val2"
+
+    def test_fatal_failure_fails_feed(self, tmp_path, sleeps, make_feed):
+        feed: Path = make_feed(tmp_path, "feed_0")
+        uploader = Mock()
+        uploader.upload.side_effect = UploadError("FOO-ERROR")
+
+        with pytest.raises(IOError):
+            self._pipeline(tmp_path, uploader).run(feed)
+
+        assert uploader.upload.call_count == 1
+        assert (tmp_path / "failed" / feed.name).exists()
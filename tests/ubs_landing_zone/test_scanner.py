@@ -0,0 +1,87 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.executor import Executor
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.scanner import Scanner
+
+def write(path: Path, age: float = 0) -> None:
+    path.write_text("foo")
+    if age:
+        mtime: float = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+class TestScanner:
+    def _scanner(self, directory: Path, **kwargs) -> Scanner:
+        return Scanner(directory=directory, file_pattern=r".+\.tar", checksum_extension=".md5", **kwargs)
+
+    def test_matches_pattern_and_skips_sidecars(self, tmp_path):
+        write(tmp_path / "a.tar")
+        write(tmp_path / "a.md5")
+        write(tmp_path / "B.TAR")
+        write(tmp_path / "notes.txt")
+
+        assert sorted(p.name for p in self._scanner(tmp_path).scan()) == ["B.TAR", "a.tar"]
+
+    def test_quiet_period(self, tmp_path):
+        write(tmp_path / "stable.tar", age=60)
+        write(tmp_path / "stable.md5", age=60)
+        write(tmp_path / "writing.tar")
+        write(tmp_path / "sidecar_writing.tar", age=60)
+        write(tmp_path / "sidecar_writing.md5")
+        write(tmp_path / "no_sidecar.tar", age=60)
+
+        ready: list[str] = sorted(p.name for p in self._scanner(tmp_path, quiet_period=10).scan())
+
+        # no checksum file yet: still being delivered, however old the tar
+        assert ready == ["stable.tar"]
+
+    def test_trust_checksum_file(self, tmp_path):
+        write(tmp_path / "done.tar")
+        write(tmp_path / "done.md5")
+        write(tmp_path / "writing.tar")
+
+        ready: list[Path] = list(self._scanner(tmp_path, quiet_period=10, trust_checksum_file=True).scan())
+
+        assert [p.name for p in ready] == ["done.tar"]
+
+    def test_negative_quiet_period(self, tmp_path):
+        with pytest.raises(ValueError):
+            self._scanner(tmp_path, quiet_period=-1)
+
+    def test_executor_uses_scanner(self, tmp_path):
+        write(tmp_path / "stable.tar", age=60)
+        write(tmp_path / "stable.md5", age=60)
+        write(tmp_path / "writing.tar")
+        write(tmp_path / "writing.md5")
+        processed: list[str] = []
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        pipeline_mock.run = lambda feed: processed.append(feed.name)
+
+        Executor(
+            pipeline=pipeline_mock,
+            directory=tmp_path,
+            file_pattern=r".+\.tar",
+            parallelism=2,
+            scanner=self._scanner(tmp_path, quiet_period=10)
+        ).execute_parallel()
+
+        assert processed == ["stable.tar"]
+
+    def test_large_directory(self, tmp_path, monkeypatch):
+        for i in range(20000):
+            (tmp_path / f"other_{i}.csv").touch()
+        write(tmp_path / "feed.tar", age=60)
+        write(tmp_path / "feed.md5", age=60)
+        stat = Mock(side_effect=os.stat)
+        monkeypatch.setattr(os, "stat", stat)
+
+        ready: list[Path] = list(self._scanner(tmp_path, quiet_period=10).scan())
+
+        assert [p.name for p in ready] == ["feed.tar"]
+        # the checksum file of the one matching feed, nothing per directory entry
+        assert stat.call_count == 1
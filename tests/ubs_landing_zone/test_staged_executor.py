@@ -0,0 +1,147 @@
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.staged_executor import StagedExecutor
+from src.ubs_landing_zone.validator import FeedValidator
+
+class TestStagedExecutor:
+    @pytest.fixture
+    def feeds_dir(self, tmp_path: Path) -> Path:
+        feeds_dir: Path = tmp_path / "feeds"
+        feeds_dir.mkdir()
+        return feeds_dir
+
+    def _pipeline(self, uploader, tmp_path: Path) -> Pipeline:
+        return Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing"
+        )
+
+    def _executor(self, pipeline: Pipeline, feeds_dir: Path, **kwargs) -> StagedExecutor:
+        return StagedExecutor(
+            pipeline=pipeline,
+            directory=feeds_dir,
+            file_pattern=r"feed_\d+\.tar$",
+            hash_parallelism=kwargs.pop("hash_parallelism", 2),
+            unpack_parallelism=kwargs.pop("unpack_parallelism", 2),
+            upload_parallelism=kwargs.pop("upload_parallelism", 1),
+            **kwargs
+        )
+
+    @pytest.mark.parametrize("hash_in_processes", [False, True])
+    def test_all_feeds_uploaded(self, feeds_dir, tmp_path, hash_in_processes, make_feed):
+        feeds: list[Path] = [make_feed(feeds_dir, f"feed_{i}") for i in range(5)]
+        uploaded: list[str] = []
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: uploaded.append(f"{file.parent.name}/{file.name}")
+
+        self._executor(self._pipeline(uploader, tmp_path), feeds_dir, hash_in_processes=hash_in_processes).execute_parallel()
+
+        assert len(uploaded) == 10
+        assert not any(feed.exists() for feed in feeds)
+        assert not any((tmp_path / "processing").iterdir())
+
+    def test_next_feed_prepared_while_uploading(self, feeds_dir, tmp_path, make_feed):
+        for i in range(3):
+            make_feed(feeds_dir, f"feed_{i}")
+        pipeline: Pipeline = self._pipeline(Mock(), tmp_path)
+        prepared: list[Path] = []
+        all_prepared: threading.Event = threading.Event()
+        prepare = pipeline.prepare
+        def prepare_and_count(feed: Path) -> Path:
+            unpacked_dir: Path = prepare(feed)
+            prepared.append(feed)
+            if len(prepared) == 3:
+                all_prepared.set()
+            return unpacked_dir
+        pipeline.prepare = prepare_and_count
+        publish = pipeline.publish
+        def slow_publish(feed: Path, unpacked_dir: Path) -> None:
+            # the single upload worker holds the first feed until the other two are unpacked
+            assert all_prepared.wait(timeout=5)
+            publish(feed, unpacked_dir)
+        pipeline.publish = slow_publish
+
+        self._executor(pipeline, feeds_dir, queue_size=2).execute_parallel()
+
+        assert len(prepared) == 3
+
+    def test_failed_feeds_moved_per_stage(self, feeds_dir, tmp_path, make_feed):
+        make_feed(feeds_dir, "feed_0")
+        make_feed(feeds_dir, "feed_1", valid_checksum=False)
+        make_feed(feeds_dir, "feed_2")
+        uploader = Mock()
+        def upload(file: Path) -> None:
+            if "feed_2" in file.read_text():
+                raise IOError("FOO-ERROR")
+        uploader.upload.side_effect = upload
+
+        with pytest.raises(ExceptionGroup) as exc_info:
+            self._executor(self._pipeline(uploader, tmp_path), feeds_dir).execute_parallel()
+
+        assert len(exc_info.value.exceptions) == 2
+        assert sorted(f.name for f in (tmp_path / "failed").iterdir()) == ["feed_1.md5", "feed_1.tar", "feed_2.md5", "feed_2.tar"]
+        assert not (feeds_dir / "feed_0.tar").exists()
+        assert not any((tmp_path / "processing").iterdir())
+
+    def test_max_failures_stops_feeding(self, feeds_dir, tmp_path, make_feed):
+        for i in range(6):
+            make_feed(feeds_dir, f"feed_{i}", valid_checksum=False)
+
+        with pytest.raises(ExceptionGroup) as exc_info:
+            self._executor(
+                self._pipeline(Mock(), tmp_path), feeds_dir, hash_parallelism=1, queue_size=1, max_failures=1
+            ).execute_parallel()
+
+        assert len(exc_info.value.exceptions) == 1
+        assert any(feeds_dir.glob("feed_*.tar"))
+
+    def test_cancelled_feed_resubmitted(self, feeds_dir, tmp_path, make_feed):
+        for i in range(2):
+            make_feed(feeds_dir, f"feed_{i}")
+        uploader = Mock()
+        pipeline: Pipeline = Pipeline(
+            uploader=uploader,
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            validator=FeedValidator()
+        )
+        verified: threading.Semaphore = threading.Semaphore(0)
+        verify = pipeline.verify
+        def verify_and_signal(feed: Path, digest_executor=None) -> bool:
+            ok: bool = verify(feed, digest_executor)
+            verified.release()
+            return ok
+        pipeline.verify = verify_and_signal
+        prepare = pipeline.prepare
+        def fail_first(feed: Path) -> Path:
+            # the other feed is hashed and queued behind this one, cancelled once fail-fast trips
+            for _ in range(2):
+                assert verified.acquire(timeout=5)
+            raise IOError("FOO-ERROR")
+        pipeline.prepare = fail_first
+
+        with pytest.raises(ExceptionGroup):
+            self._executor(pipeline, feeds_dir, hash_parallelism=1, unpack_parallelism=1, max_failures=1).execute_parallel()
+
+        assert len(list(feeds_dir.glob("feed_*.tar"))) == 1
+        assert not pipeline._indexes
+
+        pipeline.prepare = prepare
+        self._executor(pipeline, feeds_dir).execute_parallel()
+
+        assert not list(feeds_dir.glob("feed_*.tar"))
+        assert uploader.upload.call_count == 2
+
+    def test_invalid_parallelism(self, feeds_dir, tmp_path):
+        with pytest.raises(ValueError):
+            self._executor(self._pipeline(Mock(), tmp_path), feeds_dir, unpack_parallelism=0)
@@ -0,0 +1,167 @@
+import os
+import shutil
+import tarfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone import pipeline as pipeline_module
+from src.ubs_landing_zone.extractor import Extractor
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.validator import FeedValidator
+
+resource_dir: Path = Path(os.path.abspath(__file__)).parent.parent / "resources"
+
+members: dict[str, bytes] = {
+    "./._control.control": b"apple",
+    "./control.control": b"",
+    "./._sample.csv": b"apple",
+    "./sample.csv": b"col1,col2\nval1,val2",
+    "./data/sample.xml": b"<root/>",
+}
+
+class TestFeedValidator:
+    def test_index(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+
+        index = FeedValidator().validate(feed)
+
+        assert [name for _, name in index.files] == ["sample.csv", "data/sample.xml", "control.control"]
+        assert len(index.members) == len(members)
+        assert index.size == len(members["./sample.csv"]) + len(members["./data/sample.xml"])
+
+    def test_missing_control_resource(self):
+        feed: Path = resource_dir / "NOT_OK_missing_checksum_corrupted_tar_missing_control" / "3_missing_control.tar"
+
+        with pytest.raises(ValueError) as exc_info:
+            FeedValidator().validate(feed)
+
+        assert "No control file" in str(exc_info.value)
+
+    def test_apple_double_control_only(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", {"._feed.control": b"apple", "sample.csv": b"foo"})
+
+        with pytest.raises(ValueError) as exc_info:
+            FeedValidator().validate(feed)
+
+        assert "No control file" in str(exc_info.value)
+
+    @pytest.mark.parametrize(
+        "kwargs, error",
+        [
+            ({"max_members": 2}, "Too many files"),
+            ({"max_member_size": 10}, "too large"),
+            ({"max_size": 20}, "Feed content too large"),
+            ({"forbidden_names": r"\.xml$"}, "Forbidden member"),
+        ]
+    )
+    def test_limits(self, tmp_path, kwargs, error, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+
+        with pytest.raises(ValueError) as exc_info:
+            FeedValidator(**kwargs).validate(feed)
+
+        assert error in str(exc_info.value)
+
+    def test_unsafe_member(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", {"../evil.csv": b"foo", "feed.control": b""})
+
+        with pytest.raises(ValueError) as exc_info:
+            FeedValidator().validate(feed)
+
+        assert "Unsafe member" in str(exc_info.value)
+
+    @pytest.mark.parametrize("content", [b"not a tar archive", None])
+    def test_unreadable(self, tmp_path, content):
+        feed: Path = tmp_path / "feed.tar"
+        if content:
+            feed.write_bytes(content)
+
+        with pytest.raises(IOError) as exc_info:
+            FeedValidator().validate(feed)
+
+        assert "Corrupted archive" in str(exc_info.value)
+
+    def test_invalid_limit(self):
+        with pytest.raises(ValueError):
+            FeedValidator(max_members=0)
+
+class TestPipelinePreflight:
+    def _pipeline(self, tmp_path: Path, **kwargs) -> Pipeline:
+        return Pipeline(
+            uploader=kwargs.pop("uploader", Mock()),
+            checksum_extension=".md5",
+            algorithm="md5",
+            failed_dir=tmp_path / "failed",
+            processing_dir=tmp_path / "processing",
+            validator=FeedValidator(),
+            **kwargs
+        )
+
+    def test_rejected_before_hashing(self, tmp_path, monkeypatch):
+        feed: Path = tmp_path / "3_missing_control.tar"
+        for name in ("3_missing_control.tar", "3_missing_control.md5"):
+            shutil.copy(resource_dir / "NOT_OK_missing_checksum_corrupted_tar_missing_control" / name, tmp_path)
+        digest = Mock(side_effect=AssertionError("hashed"))
+        monkeypatch.setattr(pipeline_module, "file_digest", digest)
+        pipeline: Pipeline = self._pipeline(tmp_path)
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline.run(feed)
+
+        assert "No control file" in str(exc_info.value)
+        assert not digest.called
+        assert not (tmp_path / "processing").exists()
+        assert (tmp_path / "failed" / feed.name).exists()
+        assert not pipeline._indexes
+
+    # tarfile.open reads the first header on its own; single pass streams the whole archive once more to hash it
+    @pytest.mark.parametrize(
+        "kwargs, header_reads",
+        [
+            ({}, len(members) + 1),
+            ({"extractor": Extractor(threads=2)}, len(members) + 1),
+            ({"streaming_upload": True}, len(members) + 1),
+            ({"single_pass": True}, 2 * len(members)),
+        ]
+    )
+    def test_headers_read_once(self, tmp_path, monkeypatch, kwargs, header_reads, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+        uploaded: list[str] = []
+        uploader = Mock()
+        uploader.upload.side_effect = lambda file: uploaded.append(file.name)
+        uploader.upload_stream.side_effect = lambda stream, blob_name: uploaded.append(Path(blob_name).name)
+        reads: list[str] = []
+        from_tarfile = tarfile.TarInfo.fromtarfile.__func__
+        def counting_from_tarfile(cls, tar):
+            member: tarfile.TarInfo = from_tarfile(cls, tar)
+            reads.append(member.name)
+            return member
+        monkeypatch.setattr(tarfile.TarInfo, "fromtarfile", classmethod(counting_from_tarfile))
+        pipeline: Pipeline = self._pipeline(tmp_path, uploader=uploader, **kwargs)
+
+        pipeline.run(feed)
+
+        assert uploaded == ["sample.csv", "sample.xml", "control.control"]
+        assert len(reads) == header_reads
+        assert not pipeline._indexes
+
+    def test_compressed_feed_validated_while_streaming(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar.gz", {"sample.csv": b"foo", "._feed.control": b"apple"}, compress=True)
+        pipeline: Pipeline = self._pipeline(tmp_path)
+
+        with pytest.raises(ValueError) as exc_info:
+            pipeline.run(feed)
+
+        assert "No control file" in str(exc_info.value)
+        assert not any((tmp_path / "processing").iterdir())
+        assert pipeline._uploader.upload.call_count == 0
+
+    def test_unpack_dirs_unique(self, tmp_path, make_tar):
+        feed: Path = make_tar(tmp_path / "feed.tar", members)
+        pipeline: Pipeline = self._pipeline(tmp_path)
+
+        unpacked: set[Path] = {pipeline._unpack(feed) for _ in range(20)}
+
+        assert len(unpacked) == 20
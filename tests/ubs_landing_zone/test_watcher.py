@@ -0,0 +1,122 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.ubs_landing_zone.pipeline import Pipeline
+from src.ubs_landing_zone.scanner import Scanner
+from src.ubs_landing_zone.watcher import Watcher
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+class TestWatcher:
+    @pytest.fixture
+    def processed(self) -> list[str]:
+        return []
+
+    @pytest.fixture
+    def pipeline_mock(self, processed) -> Pipeline:
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        def run(feed: Path):
+            processed.append(feed.name)
+            feed.unlink()
+            feed.with_suffix(".md5").unlink()
+        pipeline_mock.run = run
+        return pipeline_mock
+
+    def _start(self, pipeline_mock, directory: Path, use_inotify: bool, **kwargs) -> tuple[Watcher, threading.Thread]:
+        watcher = Watcher(
+            pipeline=pipeline_mock,
+            scanner=Scanner(
+                directory=directory,
+                file_pattern=r".+\.tar",
+                checksum_extension=".md5",
+                quiet_period=kwargs.pop("quiet_period", 0.2),
+                **kwargs
+            ),
+            parallelism=2,
+            poll_interval=0.05,
+            use_inotify=use_inotify
+        )
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        return watcher, thread
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_dispatches_feed_once_checksum_arrives(self, pipeline_mock, processed, tmp_path, use_inotify):
+        (tmp_path / "existing.tar").write_text("foo")
+        (tmp_path / "existing.md5").write_text("bar")
+        watcher, thread = self._start(pipeline_mock, tmp_path, use_inotify)
+
+        try:
+            assert wait_for(lambda: processed == ["existing.tar"])
+
+            (tmp_path / "new.tar").write_text("foo")
+            time.sleep(0.4)
+            assert "new.tar" not in processed
+
+            (tmp_path / "new.md5").write_text("bar")
+            assert wait_for(lambda: "new.tar" in processed)
+        finally:
+            watcher.stop()
+            thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert sorted(processed) == ["existing.tar", "new.tar"]
+
+    def test_waits_for_quiet_period(self, pipeline_mock, processed, tmp_path):
+        watcher, thread = self._start(pipeline_mock, tmp_path, use_inotify=False)
+
+        try:
+            (tmp_path / "feed.md5").write_text("bar")
+            with open(tmp_path / "feed.tar", "w") as f:
+                for _ in range(5):
+                    f.write("foo")
+                    f.flush()
+                    time.sleep(0.1)
+                    assert processed == []
+
+            assert wait_for(lambda: processed == ["feed.tar"])
+        finally:
+            watcher.stop()
+            thread.join(timeout=5)
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_trust_checksum_file(self, pipeline_mock, processed, tmp_path, use_inotify):
+        watcher, thread = self._start(pipeline_mock, tmp_path, use_inotify, quiet_period=60, trust_checksum_file=True)
+
+        try:
+            (tmp_path / "feed.tar").write_text("foo")
+            time.sleep(0.2)
+            assert processed == []
+
+            (tmp_path / "feed.md5").write_text("bar")
+            assert wait_for(lambda: processed == ["feed.tar"])
+        finally:
+            watcher.stop()
+            thread.join(timeout=5)
+
+    def test_stop_drains_in_flight_feeds(self, tmp_path):
+        finished: list[str] = []
+        pipeline_mock: Pipeline = Mock(Pipeline)
+        def run(feed: Path):
+            time.sleep(0.3)
+            finished.append(feed.name)
+        pipeline_mock.run = run
+        (tmp_path / "feed.tar").write_text("foo")
+        (tmp_path / "feed.md5").write_text("bar")
+        watcher, thread = self._start(pipeline_mock, tmp_path, use_inotify=False)
+
+        assert wait_for(lambda: "feed.tar" in watcher._in_flight)
+        watcher.stop()
+        thread.join(timeout=5)
+
+        assert finished == ["feed.tar"]